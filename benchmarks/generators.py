@@ -0,0 +1,75 @@
+"""
+generators.py
+
+Seeded synthetic market data for the benchmarks.
+
+Everything here is deterministic for a given seed, so two benchmark runs
+(or a run and the stored baseline) always see the same inputs.
+"""
+
+import numpy as np
+
+from bot.orderbook import OrderBook
+
+
+def prices(n, seed=0, start=30_000.0, step=5.0):
+    """Random-walk closes with occasional volatility bursts."""
+    rng = np.random.default_rng(seed)
+    scale = np.where(rng.random(n) < 0.02, step * 5, step)
+    return start + np.cumsum(rng.normal(0.0, 1.0, n) * scale)
+
+
+def imbalance(n, seed=0):
+    """Book imbalance in [-1, 1], persistent enough to trigger entries."""
+    rng = np.random.default_rng(seed + 1)
+    raw = np.convolve(rng.uniform(-1, 1, n + 9), np.ones(10) / 10, mode="valid")
+    return np.clip(raw * 2, -1, 1)
+
+
+def book_levels(price, rng, depth=25, tick=0.5):
+    """[[price, size], ...] bids and asks around price."""
+    offsets = np.arange(1, depth + 1) * tick
+    bids = np.column_stack((price - offsets, rng.exponential(2.0, depth))).tolist()
+    asks = np.column_stack((price + offsets, rng.exponential(2.0, depth))).tolist()
+    return bids, asks
+
+
+def order_books(closes, depth=25, seed=0):
+    """One ccxt-shaped order book dict per close."""
+    rng = np.random.default_rng(seed + 2)
+    out = []
+    for price in closes.tolist():
+        bids, asks = book_levels(price, rng, depth)
+        out.append({"bids": bids, "asks": asks})
+    return out
+
+
+def book_deltas(n, depth=25, seed=0, start=30_000.0, tick=0.5):
+    """A seeded OrderBook plus n small [bids, asks] deltas around its top."""
+    rng = np.random.default_rng(seed + 3)
+    book = OrderBook()
+    bids, asks = book_levels(start, rng, depth, tick)
+    book.apply_snapshot(bids, asks)
+    deltas = []
+    for _ in range(n):
+        side = rng.integers(2)
+        level = start + (1 if side else -1) * tick * rng.integers(1, depth + 1)
+        size = 0.0 if rng.random() < 0.2 else float(rng.exponential(2.0))
+        deltas.append(([], [[level, size]]) if side else ([[level, size]], []))
+    return book, deltas
+
+
+def trades(n, seed=0):
+    """Closed-trade dicts shaped like bot.brain.apply() output."""
+    rng = np.random.default_rng(seed + 4)
+    entry = prices(n, seed)
+    exit_ = entry + rng.normal(0, 10, n)
+    sides = np.where(rng.random(n) < 0.5, "buy", "sell")
+    qty = np.full(n, 0.003)
+    pnl = (exit_ - entry) * qty * np.where(sides == "buy", 1, -1)
+    return [
+        {"side": s, "entry": e, "exit": x, "qty": q, "pnl": p, "symbol": "BTC/USDT",
+         "live": False, "timestamp": 1.7e9 + i, "confidence": 100}
+        for i, (s, e, x, q, p) in enumerate(zip(sides.tolist(), entry.tolist(), exit_.tolist(),
+                                                qty.tolist(), pnl.tolist()))
+    ]
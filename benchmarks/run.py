@@ -0,0 +1,334 @@
+"""
+run.py
+
+Benchmark harness for the bot's hot paths.
+
+Each case builds its inputs from benchmarks.generators (seeded), then is
+timed twice: a throughput pass (best of --repeat loops of n calls) and a
+sampled pass that times individual calls into a bot.latency histogram for
+p50/p99. Results are compared against benchmarks/baseline.json; a case
+whose mean per-call time grew by more than --tolerance is a regression and
+makes the run exit with status 1.
+
+Usage:
+    python -m benchmarks.run                    # run everything, compare with the baseline
+    python -m benchmarks.run -k features -k decide
+    python -m benchmarks.run --update           # store this run as the new baseline
+    python -m benchmarks.run --quick            # n / 10, for a fast smoke run
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks import generators as gen
+from bot.latency import LatencyHistogram
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+CASES = {}
+
+
+def case(name, n):
+    """Register factory(n) -> step() as a benchmark doing n calls of step per loop."""
+    def register(factory):
+        CASES[name] = (factory, n)
+        return factory
+    return register
+
+
+# ── Features ──
+@case("features.imbalance_dict", 100_000)
+def _imbalance_dict(n):
+    from bot.features import orderbook_imbalance
+    books = gen.order_books(gen.prices(1000), depth=25)
+    it = iter(range(1 << 62))
+    return lambda: orderbook_imbalance(books[next(it) % 1000])
+
+@case("features.imbalance_orderbook", 200_000)
+def _imbalance_orderbook(n):
+    from bot.features import orderbook_imbalance
+    book, _ = gen.book_deltas(0)
+    return lambda: orderbook_imbalance(book)
+
+@case("orderbook.apply_delta", 100_000)
+def _apply_delta(n):
+    book, deltas = gen.book_deltas(n)
+    it = iter(deltas * 2)
+    return lambda: book.apply_delta(*next(it))
+
+@case("features.list_functions", 50_000)
+def _list_functions(n):
+    from bot.features import momentum, trend_strength, volatility
+    from bot.ringbuffer import PriceBuffer
+    prices = PriceBuffer(500)
+    prices.extend(gen.prices(500).tolist())
+
+    def step():
+        momentum(prices)
+        volatility(prices)
+        trend_strength(prices)
+    return step
+
+@case("features.engine_update", 200_000)
+def _engine_update(n):
+    from bot.features import FeatureEngine
+    engine = FeatureEngine()
+    closes = gen.prices(n * 2).tolist()
+    it = iter(closes)
+
+    def step():
+        engine.update(next(it))
+        engine.momentum()
+        engine.volatility()
+        engine.trend_strength()
+    return step
+
+@case("bars.aggregator_update", 200_000)
+def _bars_update(n):
+    from bot.bars import BarAggregator
+    bars = BarAggregator()
+    closes = gen.prices(n * 2).tolist()
+    it = iter(range(n * 2))
+
+    def step():
+        # 0.25 s apart: a 1s bar closes every 4 ticks, 1m/5m mostly update in place
+        i = next(it)
+        bars.update(closes[i], 1.0, 1_700_000_000 + i * 0.25)
+    return step
+
+
+# ── Strategy ──
+@case("brain.decide", 100_000)
+def _decide(n):
+    from bot import brain
+    from bot.backtest import StaticImbalance
+    from bot.features import FeatureEngine
+    closes, imb = gen.prices(1000), gen.imbalance(1000)
+    state = brain.new_state(features=FeatureEngine())
+    for price, value in zip(closes.tolist(), imb.tolist()):
+        brain.mark(state, price, StaticImbalance(value))
+    return lambda: brain.decide(state)
+
+@case("brain.mark_decide_apply", 100_000)
+def _tick(n):
+    from bot import brain
+    from bot.backtest import StaticImbalance
+    from bot.features import FeatureEngine
+    closes, imb = gen.prices(n * 2).tolist(), gen.imbalance(n * 2).tolist()
+    state = brain.new_state(features=FeatureEngine())
+    it = iter(range(n * 2))
+
+    def step():
+        i = next(it)
+        brain.mark(state, closes[i], StaticImbalance(imb[i]))
+        action = brain.decide(state)
+        brain.apply(state, action, closes[i], 0.003)
+    return step
+
+
+# ── Persistence ──
+@case("journal.save_trade", 50_000)
+def _save_trade(n):
+    from bot import brain, journal
+    root = tempfile.mkdtemp(prefix="bench-journal-")
+    previous = journal._journal
+    RESTORE.append(lambda: setattr(journal, "_journal", previous))
+    journal._journal = journal.TradeJournal(root, flush_interval=None)
+    trades = gen.trades(1000)
+    it = iter(range(1 << 62))
+    TEMP_DIRS.append(root)
+    return lambda: brain.save_trade(trades[next(it) % 1000])
+
+
+# ── Replay ──
+@case("replay.capture_source", 20_000)
+def _replay_source(n):
+    from bot.capture import Recorder, ReplaySource
+    root = tempfile.mkdtemp(prefix="bench-capture-")
+    TEMP_DIRS.append(root)
+    closes = gen.prices(n + 1)
+    books = gen.order_books(closes)
+
+    class Feed:
+        i = 0
+        def get_price(self, symbol):
+            return closes[self.i]
+        def book(self, symbol):
+            return books[self.i]
+
+    feed = Feed()
+    rec = Recorder(feed, os.path.join(root, "capture"), chunk_records=5000)
+    for i in range(n + 1):
+        feed.i = i
+        rec.get_price("BTC/USDT")
+        rec.book("BTC/USDT")
+        rec.tick += 1
+        if len(rec.buffer) >= rec.chunk_records:
+            rec.flush()
+    rec.close()
+    source = ReplaySource(rec.path)
+
+    def step():
+        source.get_price("BTC/USDT")
+        source.book("BTC/USDT")
+        source.advance()
+    return step
+
+@case("replay.backtest_100k", 5)
+def _backtest(n):
+    from bot.backtest import run_backtest
+    closes, imb = gen.prices(100_000), gen.imbalance(100_000)
+    return lambda: run_backtest(closes, imb)
+
+
+# ── UI rendering (headless) ──
+def _chart():
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    from ui.charting import LiveLine
+
+    fig = Figure(figsize=(8, 4))
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    chart = LiveLine(canvas, ax, window=300)
+    chart.extend(gen.prices(300).tolist())
+    chart.render(force=True)
+    return canvas, chart
+
+@case("ui.chart_blit_frame", 2_000)
+def _chart_blit(n):
+    canvas, chart = _chart()
+    # Small moves around the visible range keep the limits still, like a live feed does
+    ys = (gen.prices(300)[-1] + np.sin(np.arange(n * 2) / 7.0)).tolist()
+    it = iter(ys)
+
+    def step():
+        chart.append(next(it))
+        chart.render()
+    return step
+
+@case("ui.chart_full_draw", 200)
+def _chart_full(n):
+    canvas, chart = _chart()
+    return canvas.draw
+
+
+# ── Harness ──
+TEMP_DIRS = []
+RESTORE = []  # undo callbacks for module state a case swapped out, run newest first
+
+def measure(factory, n, repeat=5, samples=2000):
+    best = float("inf")
+    for _ in range(repeat):
+        step = factory(n)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            step()
+        best = min(best, time.perf_counter() - t0)
+
+    hist = LatencyHistogram(resolution=1e-9)
+    count = min(n, samples)
+    step = factory(count)
+    clock = time.perf_counter
+    for _ in range(count):
+        t0 = clock()
+        step()
+        hist.record(clock() - t0)
+    p = hist.percentiles((50, 99))
+    return {
+        "n": n,
+        "ops_per_sec": n / best,
+        "mean_us": best / n * 1e6,
+        "p50_us": p[50] * 1e6,
+        "p99_us": p[99] * 1e6,
+    }
+
+
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "system": platform.system()}
+
+
+def compare(results, baseline, tolerance):
+    """Rows of (name, baseline mean, ratio, regressed) for every case in both runs."""
+    rows = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        ratio = result["mean_us"] / base["mean_us"] if base["mean_us"] else float("inf")
+        rows.append((name, base["mean_us"], ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the bot benchmarks")
+    parser.add_argument("-k", action="append", default=[], help="only cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="divide every n by 10")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    selected = {name: spec for name, spec in CASES.items() if not args.k or any(k in name for k in args.k)}
+    results = {}
+    print(f"{'case':<30} {'ops/s':>12} {'mean us':>10} {'p50 us':>10} {'p99 us':>10}")
+    try:
+        for name, (factory, n) in selected.items():
+            n = max(1, n // 10) if args.quick else n
+            r = results[name] = measure(factory, n, args.repeat)
+            print(f"{name:<30} {r['ops_per_sec']:>12,.0f} {r['mean_us']:>10.2f} "
+                  f"{r['p50_us']:>10.2f} {r['p99_us']:>10.2f}")
+    finally:
+        while RESTORE:
+            RESTORE.pop()()
+        for path in TEMP_DIRS:
+            shutil.rmtree(path, ignore_errors=True)
+
+    report = {"taken": time.time(), "environment": environment(), "results": results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=1)
+
+    if args.update:
+        baseline = {"results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(taken=report["taken"], environment=report["environment"])
+        baseline["results"].update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+        print(f"[INFO] Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("[INFO] No baseline yet; run with --update to store one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != report["environment"]:
+        print(f"[INFO] Baseline was taken on {baseline.get('environment')}; ratios are indicative only")
+
+    regressed = False
+    print(f"\n{'case':<30} {'baseline us':>12} {'ratio':>8}")
+    for name, base_us, ratio, bad in compare(results, baseline, args.tolerance):
+        regressed |= bad
+        print(f"{name:<30} {base_us:>12.2f} {ratio:>8.2f}{'  REGRESSION' if bad else ''}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
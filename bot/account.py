@@ -0,0 +1,337 @@
+"""
+account.py
+
+Cached account state: balances, open positions, leverage and fills.
+
+AccountCache is the in-memory copy every reader uses. Reads never touch
+the network and come with staleness timestamps (age()), and an unknown
+value is None, never 0. AccountStream feeds the cache from Bybit's
+private WebSocket (wallet, position and execution topics, HMAC-signed
+auth) on its own asyncio loop in a daemon thread. It also reconciles the
+cache against one REST snapshot (fetch_balance + fetch_positions) every
+reconcile_every seconds and after each reconnect, so a missed message
+cannot drift the cache for long. A snapshot only replaces coins and
+positions the stream has not updated since the fetch started; those
+stream values are newer than anything REST returned.
+
+Usage:
+    account = AccountStream(["BTC/USDT"]).start()
+    bot.trader.use_account(account.cache)
+    account.cache.free("USDT"), account.cache.age("wallet")
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import deque
+
+import websockets
+
+from bot.stream import market_id
+
+PRIVATE_LINEAR_URL = "wss://stream.bybit.com/v5/private"
+
+
+def _num(value, default=None):
+    return default if value in (None, "") else float(value)
+
+
+class AccountCache:
+    """Latest known balances/positions/fills; safe to read and write from any thread."""
+
+    def __init__(self, symbols=(), fills_kept=500):
+        """
+        Args:
+            symbols: Symbols ("BTC/USDT") whose exchange ids map back to them
+            fills_kept: Recent fills kept
+        """
+        self.ids = {market_id(s): s for s in symbols}
+        self.lock = threading.Lock()
+        self.balances = {}   # coin -> {"total", "free", "used"}
+        self.positions = {}  # symbol -> {"side", "qty", "entry", "leverage", "mark", "unrealized"}
+        self.fills = deque(maxlen=fills_kept)
+        self.updated = {}    # "wallet" / "position" / "execution" / "rest" -> time.time()
+        self.stamps = {}     # ("wallet", coin) / ("position", symbol) -> time.time() of its last write
+
+    def symbol(self, exchange_symbol):
+        """BTCUSDT or BTC/USDT:USDT -> BTC/USDT."""
+        return self.ids.get(exchange_symbol) or self.ids.get(market_id(exchange_symbol)) \
+            or exchange_symbol.split(":")[0]
+
+    # ── Writers (stream / reconciliation) ──
+    def apply_wallet(self, data, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            for account in data:
+                for coin in account.get("coin", []):
+                    total = _num(coin.get("equity"), _num(coin.get("walletBalance"), 0.0))
+                    used = _num(coin.get("totalPositionIM"), 0.0) + _num(coin.get("totalOrderIM"), 0.0)
+                    free = _num(coin.get("availableToWithdraw"))
+                    self.balances[coin["coin"]] = {
+                        "total": total, "used": used, "free": total - used if free is None else free}
+                    self.stamps[("wallet", coin["coin"])] = now
+            self.updated["wallet"] = now
+
+    def apply_positions(self, data, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            for p in data:
+                symbol = self.symbol(p["symbol"])
+                qty = _num(p.get("size"), 0.0)
+                self.stamps[("position", symbol)] = now
+                if not qty or not p.get("side"):
+                    self.positions.pop(symbol, None)
+                    continue
+                self.positions[symbol] = {
+                    "side": "buy" if p["side"] == "Buy" else "sell",
+                    "qty": qty,
+                    "entry": _num(p.get("entryPrice") or p.get("avgPrice")),
+                    "leverage": _num(p.get("leverage")),
+                    "mark": _num(p.get("markPrice")),
+                    "unrealized": _num(p.get("unrealisedPnl"), 0.0),
+                }
+            self.updated["position"] = now
+
+    def apply_executions(self, data, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            for e in data:
+                self.fills.append({
+                    "symbol": self.symbol(e["symbol"]), "order_id": e.get("orderId"),
+                    "side": (e.get("side") or "").lower(), "price": _num(e.get("execPrice")),
+                    "qty": _num(e.get("execQty")), "fee": _num(e.get("execFee"), 0.0),
+                    "timestamp": _num(e.get("execTime"), now * 1000) / 1000,
+                })
+            self.updated["execution"] = now
+
+    def apply_rest(self, balance, positions, now=None, since=None):
+        """
+        Replace balances and positions with a ccxt fetch_balance/fetch_positions snapshot.
+
+        since is when the fetch started: a coin or position the stream wrote
+        after it keeps the stream's value. Without it the snapshot counts as taken at now.
+        """
+        now = time.time() if now is None else now
+        since = now if since is None else since
+        balances = {}
+        for coin, total in (balance.get("total") or {}).items():
+            if total is None:
+                continue
+            balances[coin] = {"total": float(total),
+                              "free": _num((balance.get("free") or {}).get(coin), 0.0),
+                              "used": _num((balance.get("used") or {}).get(coin), 0.0)}
+        open_positions = {}
+        for p in positions:
+            qty = _num(p.get("contracts"), 0.0)
+            if not qty:
+                continue
+            open_positions[self.symbol(p["symbol"])] = {
+                "side": "buy" if p.get("side") == "long" else "sell",
+                "qty": qty,
+                "entry": _num(p.get("entryPrice")),
+                "leverage": _num(p.get("leverage")),
+                "mark": _num(p.get("markPrice")),
+                "unrealized": _num(p.get("unrealizedPnl"), 0.0),
+            }
+        with self.lock:
+            for kind, current, fresh in (("wallet", self.balances, balances),
+                                         ("position", self.positions, open_positions)):
+                for key in set(current) | set(fresh):
+                    if self.stamps.get((kind, key), float("-inf")) > since:
+                        continue  # the stream saw this after the snapshot was taken
+                    if key in fresh:
+                        current[key] = fresh[key]
+                    else:
+                        current.pop(key, None)
+                    self.stamps[(kind, key)] = since
+                self.updated[kind] = max(self.updated.get(kind, since), since)
+            self.updated["rest"] = now
+
+    # ── Reads (no network I/O) ──
+    def balance(self, coin="USDT"):
+        """Total equity in coin, or None when it has never been seen."""
+        with self.lock:
+            entry = self.balances.get(coin)
+            return None if entry is None else entry["total"]
+
+    def free(self, coin="USDT"):
+        """Margin available for new positions, or None when unknown."""
+        with self.lock:
+            entry = self.balances.get(coin)
+            return None if entry is None else entry["free"]
+
+    def position(self, symbol):
+        """Copy of the open position on symbol, or None when flat."""
+        with self.lock:
+            p = self.positions.get(symbol)
+            return None if p is None else dict(p)
+
+    def leverage(self, symbol):
+        with self.lock:
+            p = self.positions.get(symbol)
+            return None if p is None else p["leverage"]
+
+    def recent_fills(self, n=50):
+        with self.lock:
+            return list(self.fills)[-n:]
+
+    def age(self, kind="wallet"):
+        """Seconds since kind ("wallet", "position", "execution", "rest") was last updated; inf if never."""
+        updated = self.updated.get(kind)
+        return time.time() - updated if updated else float("inf")
+
+    def snapshot(self):
+        with self.lock:
+            return {"balances": {c: dict(b) for c, b in self.balances.items()},
+                    "positions": {s: dict(p) for s, p in self.positions.items()},
+                    "updated": dict(self.updated)}
+
+
+class AccountStream:
+    def __init__(self, symbols=(), cache=None, url=PRIVATE_LINEAR_URL, api_key=None, api_secret=None,
+                 exchange=None, reconcile_every=60, ping_interval=20, max_backoff=30):
+        """
+        Args:
+            symbols: Symbols traded (maps exchange ids back to them in the cache)
+            cache: AccountCache to feed (defaults to a new one)
+            url: Private WebSocket endpoint (point it at a local server for tests)
+            api_key, api_secret: Credentials (default: bot.trader's)
+            exchange: ccxt-style client for REST reconciliation (default: bot.trader's)
+            reconcile_every: Seconds between REST snapshots (0 disables periodic ones)
+            ping_interval: Seconds between application-level pings
+            max_backoff: Upper bound for the reconnect delay in seconds
+        """
+        from bot import trader
+
+        self.cache = cache if cache is not None else AccountCache(symbols)
+        self.url = url
+        self.api_key = trader.API_KEY if api_key is None else api_key
+        self.api_secret = trader.API_SECRET if api_secret is None else api_secret
+        self.exchange = exchange
+        self.reconcile_every = reconcile_every
+        self.ping_interval = ping_interval
+        self.max_backoff = max_backoff
+
+        self.connected = threading.Event()
+        self.reconnects = 0
+        self.reconcile_errors = 0
+        self.loop = None
+        self.task = None
+        self.thread = None
+        self._stopping = False
+
+    # ── Lifecycle ──
+    def start(self):
+        """Run the stream in a background thread; returns self."""
+        self._stopping = False
+        self.loop = asyncio.new_event_loop()
+        self.task = self.loop.create_task(self.run())
+        self.thread = threading.Thread(target=self.loop.run_until_complete, args=(self.task,), daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stopping = True
+        if self.task is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.task.cancel)
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    async def run(self):
+        """Connect, authenticate, stream and reconcile until stopped; reconnects with backoff."""
+        reconciler = asyncio.ensure_future(self._reconcile_loop()) if self.reconcile_every else None
+        backoff = 0.5
+        try:
+            while not self._stopping:
+                try:
+                    async with websockets.connect(self.url, ping_interval=None) as ws:
+                        await self._auth(ws)
+                        backoff = 0.5
+                        # Messages may have been missed while disconnected
+                        asyncio.ensure_future(self.reconcile_async())
+                        await self._session(ws)
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    print(f"[ERROR] Account stream: {e}")
+                self.connected.clear()
+                if self._stopping:
+                    break
+                self.reconnects += 1
+                try:
+                    await asyncio.sleep(backoff)
+                except asyncio.CancelledError:
+                    break
+                backoff = min(backoff * 2, self.max_backoff)
+        finally:
+            if reconciler is not None:
+                reconciler.cancel()
+
+    def auth_message(self, expires=None):
+        """Bybit v5 private auth: HMAC-SHA256 of "GET/realtime<expires ms>" with the API secret."""
+        expires = int((time.time() + 10) * 1000) if expires is None else expires
+        signature = hmac.new(self.api_secret.encode(), f"GET/realtime{expires}".encode(),
+                             hashlib.sha256).hexdigest()
+        return {"op": "auth", "args": [self.api_key, expires, signature]}
+
+    async def _auth(self, ws):
+        await ws.send(json.dumps(self.auth_message()))
+        reply = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+        if not reply.get("success"):
+            raise ConnectionError(f"auth rejected: {reply.get('ret_msg') or reply}")
+
+    async def _session(self, ws):
+        await ws.send(json.dumps({"op": "subscribe", "args": ["wallet", "position", "execution"]}))
+        self.connected.set()
+
+        pinger = asyncio.ensure_future(self._ping(ws))
+        try:
+            async for raw in ws:
+                self.handle(json.loads(raw))
+        finally:
+            pinger.cancel()
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send(json.dumps({"op": "ping"}))
+
+    # ── Message handling ──
+    def handle(self, msg):
+        """Apply one decoded message to the cache."""
+        topic = msg.get("topic")
+        if topic == "wallet":
+            self.cache.apply_wallet(msg["data"])
+        elif topic == "position":
+            self.cache.apply_positions(msg["data"])
+        elif topic == "execution":
+            self.cache.apply_executions(msg["data"])
+        # anything else: subscription acks, pongs
+
+    # ── REST reconciliation ──
+    def reconcile(self):
+        """Replace the cache with one REST snapshot (blocking; runs off the stream loop)."""
+        from bot import trader
+
+        client = self.exchange if self.exchange is not None else trader.get_exchange()
+        trader.LIMITER.acquire()
+        started = time.time()  # stream messages after this are newer than the snapshot
+        balance = client.fetch_balance({"accountType": "UNIFIED"})
+        trader.LIMITER.acquire()
+        positions = client.fetch_positions()
+        self.cache.apply_rest(balance, positions, since=started)
+
+    async def reconcile_async(self):
+        try:
+            await asyncio.to_thread(self.reconcile)
+        except Exception as e:
+            self.reconcile_errors += 1
+            print(f"[ERROR] Account reconcile: {e}")
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(self.reconcile_every)
+            await self.reconcile_async()
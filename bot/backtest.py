@@ -0,0 +1,256 @@
+"""
+backtest.py
+
+Headless backtesting of bot.brain.decide over whole price arrays.
+
+- run_backtest(): vectorized engine. Features are computed once as NumPy
+  arrays; flat periods jump straight to the next entry signal and open
+  trades are resolved by scanning exit conditions in growing array chunks.
+- run_reference(): the per-tick path (mark -> decide -> apply), kept as
+  the ground truth the vectorized engine has to reproduce.
+
+Usage:
+    python -m bot.backtest candles.csv [--reference]
+    python -m bot.backtest bars-1m.npy          # bot.bars BAR_DTYPE file (BarSeries.save)
+    python -m bot.backtest --history BTC/USDT --start 2024-03-01 --end 2024-03-08   # bot.history cache
+"""
+
+import argparse
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from bot import brain
+
+
+# ── Inputs ──
+class StaticImbalance:
+    """Stands in for an orderbook when only a precomputed imbalance is known."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def imbalance(self, depth=10):
+        return self.value
+
+
+def load_csv(path):
+    """
+    Load close prices and book imbalance from a candle CSV.
+
+    Imbalance is taken from an "imbalance" column, or derived from
+    "bid_volume"/"ask_volume"; plain OHLC files get zero imbalance, which
+    means the strategy never enters.
+    """
+    import pandas as pd
+
+    return frame_arrays(pd.read_csv(path))
+
+
+def load_bars(path):
+    """
+    Close prices of a saved bot.bars BAR_DTYPE array (BarSeries.save / resample).
+
+    Bars carry no book data, so imbalance is zero, like plain OHLC CSVs.
+    """
+    return bar_arrays(np.load(path))
+
+
+def bar_arrays(bars):
+    """load_bars() for bars already in memory (e.g. bot.history.KlineCache reads)."""
+    close = np.ascontiguousarray(bars["close"], dtype=np.float64)
+    return close, np.zeros_like(close)
+
+
+def frame_arrays(df):
+    """load_csv() for a DataFrame that is already in memory."""
+    close = df["close"].to_numpy(dtype=np.float64)
+    if "imbalance" in df.columns:
+        imb = df["imbalance"].to_numpy(dtype=np.float64)
+    elif "bid_volume" in df.columns and "ask_volume" in df.columns:
+        bid = df["bid_volume"].to_numpy(dtype=np.float64)
+        ask = df["ask_volume"].to_numpy(dtype=np.float64)
+        total = bid + ask
+        imb = np.divide(bid - ask, total, out=np.zeros_like(total), where=total != 0)
+    else:
+        imb = np.zeros_like(close)
+    return close, imb
+
+
+# ── Vectorized features ──
+def lagged_diff(close, lookback):
+    """prices[-1] - prices[-lookback] at every index, 0 during warm-up."""
+    out = np.zeros_like(close)
+    if len(close) >= lookback:
+        out[lookback - 1:] = close[lookback - 1:] - close[:len(close) - lookback + 1]
+    return out
+
+def rolling_std(close, lookback):
+    """np.std of the trailing window at every index, 0 during warm-up."""
+    out = np.zeros_like(close)
+    if len(close) >= lookback:
+        out[lookback - 1:] = sliding_window_view(close, lookback).std(axis=1)
+    return out
+
+def base_features(close):
+    """Parameter-independent feature arrays; compute once per series."""
+    return {
+        "vol": rolling_std(close, 20),
+        "mom": lagged_diff(close, 6),
+        "trend": lagged_diff(close, 50),
+    }
+
+def compute_features(close, imbalance, params=None, base=None):
+    p = brain.DEFAULT_PARAMS if params is None else params
+    base = base_features(close) if base is None else base
+    vol, mom, trend = base["vol"], base["mom"], base["trend"]
+
+    # Entry gate as written in decide(): trend filter first, then imbalance + momentum
+    th = p["entry_imbalance"]
+    buy = (imbalance > th) & (mom > 0) & ~(trend < 0)
+    sell = (imbalance < -th) & (mom < 0) & ~(trend > 0)
+    signal = np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+
+    return {
+        "vol": vol,
+        "target": p["base_target"] + vol * p["target_vol_factor"],
+        "stop": -np.maximum(p["stop_floor"], vol * p["stop_vol_factor"]),
+        "signal": signal,
+        "entries": np.flatnonzero(signal),
+    }
+
+
+# ── Vectorized engine ──
+def _find_exit(close, imbalance, feats, p, e, side, entry, qty, chunk=64):
+    """First index after entry e where decide() would return "exit"."""
+    n = len(close)
+    peak = -np.inf
+    k0 = e + 1
+    while k0 < n:
+        k1 = min(n, k0 + chunk)
+        pnl = (close[k0:k1] - entry) * qty
+        if side == "sell":
+            pnl = -pnl
+
+        # Trailing stop, ratcheted from ticks strictly before k
+        active = pnl >= p["trail_activate"]
+        running = np.maximum.accumulate(np.where(active, pnl, -np.inf))
+        prev = np.empty_like(running)
+        prev[0] = peak
+        prev[1:] = np.maximum(running[:-1], peak)
+        trail_hit = active & (prev > -np.inf) & (pnl <= prev - p["trail_distance"])
+
+        target_hit = pnl >= feats["target"][k0:k1]
+
+        imb = imbalance[k0:k1]
+        wick_th = p["wick_imbalance"]
+        wick = (pnl < 0) & ((imb > -wick_th) if side == "buy" else (imb < wick_th))
+        held = np.arange(k0 - e, k1 - e)
+        stop_hit = ~wick & (pnl <= feats["stop"][k0:k1]) & (held >= p["min_hold"])
+
+        hit = trail_hit | target_hit | stop_hit
+        if hit.any():
+            j = int(hit.argmax())
+            return k0 + j, float(pnl[j])
+
+        peak = max(peak, running[-1])
+        k0 = k1
+        chunk *= 2
+    return None, None
+
+def run_backtest(close, imbalance=None, leverage=10, usdt_per_trade=10, params=None, base=None):
+    """
+    Return the list of closed trades decide() would produce over close.
+
+    base: optional precomputed base_features(close), shared across runs
+    """
+    p = brain.DEFAULT_PARAMS if params is None else params
+    close = np.asarray(close, dtype=np.float64)
+    imbalance = np.zeros_like(close) if imbalance is None else np.asarray(imbalance, dtype=np.float64)
+    feats = compute_features(close, imbalance, p, base)
+    entries = feats["entries"]
+
+    trades = []
+    i = 0
+    while True:
+        pos = np.searchsorted(entries, i)
+        if pos >= len(entries):
+            break
+        e = int(entries[pos])
+        side = "buy" if feats["signal"][e] > 0 else "sell"
+        entry = float(close[e])
+        qty = round((usdt_per_trade * leverage) / entry, 6)
+
+        x, pnl = _find_exit(close, imbalance, feats, p, e, side, entry, qty)
+        if x is None:
+            break
+        trades.append({
+            "side": side, "entry": entry, "exit": float(close[x]), "qty": qty,
+            "pnl": pnl, "entry_index": e, "exit_index": x,
+        })
+        i = x + p["cooldown"] + 1
+    return trades
+
+
+# ── Per-tick reference ──
+def run_reference(close, imbalance=None, leverage=10, usdt_per_trade=10, params=None):
+    """Same contract as run_backtest(), driving decide() one tick at a time."""
+    close = np.asarray(close, dtype=np.float64)
+    imbalance = np.zeros_like(close) if imbalance is None else np.asarray(imbalance, dtype=np.float64)
+    state = brain.new_state(history=64)
+
+    trades = []
+    entry_index = None
+    for i, (price, imb) in enumerate(zip(close.tolist(), imbalance.tolist())):
+        brain.mark(state, price, StaticImbalance(imb))
+        action = brain.decide(state, params)
+        qty = round((usdt_per_trade * leverage) / price, 6) if price else 0
+        if action in ("buy", "sell") and state.position is None:
+            entry_index = i
+        trade = brain.apply(state, action, price, qty, params)
+        if trade is not None:
+            trade.update(entry_index=entry_index, exit_index=i)
+            trades.append(trade)
+    return trades
+
+
+# ── Reporting ──
+def summarize(trades):
+    pnl = np.array([t["pnl"] for t in trades], dtype=np.float64)
+    if len(pnl) == 0:
+        return {"trades": 0, "pnl": 0.0, "win_rate": 0.0, "max_drawdown": 0.0}
+    equity = np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.maximum(equity, 0.0))
+    return {
+        "trades": len(pnl),
+        "pnl": float(equity[-1]),
+        "win_rate": float((pnl > 0).mean() * 100),
+        "max_drawdown": float((peak - equity).max()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest bot.brain.decide over a candle CSV or bars file")
+    parser.add_argument("csv", nargs="?", help="candle CSV, or .npy of bot.bars bars")
+    parser.add_argument("--reference", action="store_true", help="use the slow per-tick path")
+    parser.add_argument("--history", metavar="SYMBOL", help="read bars from the bot.history cache instead")
+    parser.add_argument("--timeframe", default="1m")
+    parser.add_argument("--start", help="YYYY-MM-DD UTC, with --history")
+    parser.add_argument("--end", help="YYYY-MM-DD UTC, with --history")
+    args = parser.parse_args()
+    if bool(args.csv) == bool(args.history):
+        parser.error("give either a file or --history SYMBOL")
+
+    if args.history:
+        from bot.history import KlineCache
+        close, imb = bar_arrays(KlineCache().bars(args.history, args.timeframe, args.start, args.end))
+    else:
+        close, imb = (load_bars if args.csv.endswith(".npy") else load_csv)(args.csv)
+    t0 = time.perf_counter()
+    trades = (run_reference if args.reference else run_backtest)(close, imb)
+    elapsed = time.perf_counter() - t0
+
+    print(f"[INFO] {len(close)} candles in {elapsed:.3f}s")
+    for key, value in summarize(trades).items():
+        print(f"[INFO] {key}: {value}")
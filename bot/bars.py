@@ -0,0 +1,210 @@
+"""
+bars.py
+
+Streaming OHLCV bars.
+
+BarSeries folds ticks (or public trades) into bars of one timeframe: the
+bar being built lives in plain attributes and every update is an O(1)
+in-place change to them; when a tick lands in a later bucket the bar is
+closed into a fixed-capacity structured NumPy store (written twice like
+bot.ringbuffer.PriceBuffer, so the last n bars are always one contiguous
+view). BarAggregator drives several timeframes from the same ticks.
+
+resample() builds the same BAR_DTYPE bars from whole arrays (captures,
+CSVs), so charts, features and backtests all read one bar format.
+
+Bars only exist for buckets that saw at least one tick; quiet periods
+leave no empty bars behind. A tick for a bucket that has already closed
+is dropped (and counted in BarSeries.late): the closed bar is out of the
+live store's reach, and folding it into the open bar would give that bar
+a range and volume resample() never sees.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+TIMEFRAMES = {"1s": 1, "1m": 60, "5m": 300}
+
+BAR_DTYPE = np.dtype([
+    ("start", "<f8"),   # bucket start, epoch seconds
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("ticks", "<i4"),
+])
+
+
+def timeframe_seconds(timeframe):
+    """Seconds per bar for "1s"/"1m"/"5m" (or a number of seconds as is)."""
+    if isinstance(timeframe, str):
+        try:
+            return TIMEFRAMES[timeframe]
+        except KeyError:
+            raise ValueError(f"Unknown timeframe {timeframe!r}; expected one of {', '.join(TIMEFRAMES)}")
+    return float(timeframe)
+
+
+class BarSeries:
+    def __init__(self, timeframe="1m", capacity=5000):
+        """
+        Args:
+            timeframe: Key of TIMEFRAMES or a bar length in seconds
+            capacity: Closed bars retained; older ones are overwritten
+        """
+        self.timeframe = timeframe
+        self.seconds = timeframe_seconds(timeframe)
+        self.capacity = int(capacity)
+        self._bars = np.zeros(2 * self.capacity, dtype=BAR_DTYPE)
+        self._head = 0  # slot the next closed bar is written to
+        self._count = 0
+        self.lock = threading.Lock()
+        self.version = 0  # bumped on every update, lets readers skip unchanged frames
+        self.late = 0  # ticks dropped because their bucket had already closed
+
+        # The open bar (start is None until the first tick)
+        self.start = None
+        self.open = self.high = self.low = self.close = 0.0
+        self.volume = 0.0
+        self.ticks = 0
+
+    # ── Writing ──
+    def update(self, price, volume=0.0, ts=None):
+        """Fold one tick into the open bar; True when it closed the previous bar."""
+        ts = time.time() if ts is None else ts
+        start = ts - ts % self.seconds
+        with self.lock:
+            if self.start is not None and start < self.start:
+                self.late += 1
+                return False
+            self.version += 1
+            if start == self.start:
+                if price > self.high:
+                    self.high = price
+                elif price < self.low:
+                    self.low = price
+                self.close = price
+                self.volume += volume
+                self.ticks += 1
+                return False
+            closed = self.start is not None
+            if closed:
+                self._push()
+            self.start = start
+            self.open = self.high = self.low = self.close = price
+            self.volume = volume
+            self.ticks = 1
+            return closed
+
+    def _push(self):
+        i = self._head
+        self._bars[i] = self._bars[i + self.capacity] = (
+            self.start, self.open, self.high, self.low, self.close, self.volume, self.ticks)
+        self._head = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def clear(self):
+        with self.lock:
+            self._head = 0
+            self._count = 0
+            self.start = None
+            self.version += 1
+
+    # ── Reading ──
+    def closed(self, n=None):
+        """
+        View of the last n closed bars, oldest first.
+
+        Shares memory with the store and is overwritten once capacity more
+        bars close; copy it if it has to live that long.
+        """
+        n = self._count if n is None else min(n, self._count)
+        end = self._head + self.capacity
+        return self._bars[end - n:end]
+
+    def current(self):
+        """The open bar as a BAR_DTYPE record (None before the first tick)."""
+        with self.lock:
+            if self.start is None:
+                return None
+            return np.array((self.start, self.open, self.high, self.low, self.close,
+                             self.volume, self.ticks), dtype=BAR_DTYPE)
+
+    def bars(self, n=None):
+        """Copy of the last n bars including the open one (a consistent snapshot)."""
+        with self.lock:
+            live = self.start is not None
+            n = self._count + live if n is None else n
+            done = self.closed(max(0, n - live))
+            out = np.empty(len(done) + live, dtype=BAR_DTYPE)
+            out[:len(done)] = done
+            if live:
+                out[-1] = (self.start, self.open, self.high, self.low, self.close, self.volume, self.ticks)
+        return out
+
+    def closes(self, n=None):
+        """Close prices of the last n closed bars (a view, like PriceBuffer.window)."""
+        return self.closed(n)["close"]
+
+    def __len__(self):
+        return self._count
+
+    def save(self, path):
+        """Write the closed bars to a .npy file (bot.backtest.load_bars reads it)."""
+        np.save(path, self.closed())
+
+
+class BarAggregator:
+    """One BarSeries per timeframe, all fed by the same ticks."""
+
+    def __init__(self, timeframes=tuple(TIMEFRAMES), capacity=5000):
+        self.series = {tf: BarSeries(tf, capacity) for tf in timeframes}
+
+    def update(self, price, volume=0.0, ts=None):
+        """Fold one tick into every timeframe; returns the timeframes whose bar just closed."""
+        ts = time.time() if ts is None else ts
+        return [tf for tf, series in self.series.items() if series.update(price, volume, ts)]
+
+    def __getitem__(self, timeframe):
+        return self.series[timeframe]
+
+    def __contains__(self, timeframe):
+        return timeframe in self.series
+
+    def clear(self):
+        for series in self.series.values():
+            series.clear()
+
+
+def resample(times, prices, timeframe="1m", volumes=None):
+    """
+    BAR_DTYPE bars from whole tick arrays, matching what BarSeries builds live.
+
+    Args:
+        times: Tick timestamps in epoch seconds, ascending
+        prices: Tick prices
+        timeframe: Key of TIMEFRAMES or a bar length in seconds
+        volumes: Optional traded size per tick
+    """
+    times = np.asarray(times, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    if not len(prices):
+        return np.empty(0, dtype=BAR_DTYPE)
+    seconds = timeframe_seconds(timeframe)
+    starts = times - times % seconds
+    first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    last = np.r_[first[1:], len(prices)] - 1
+
+    bars = np.empty(len(first), dtype=BAR_DTYPE)
+    bars["start"] = starts[first]
+    bars["open"] = prices[first]
+    bars["high"] = np.maximum.reduceat(prices, first)
+    bars["low"] = np.minimum.reduceat(prices, first)
+    bars["close"] = prices[last]
+    bars["volume"] = 0.0 if volumes is None else np.add.reduceat(np.asarray(volumes, dtype=np.float64), first)
+    bars["ticks"] = last - first + 1
+    return bars
@@ -1,67 +1,164 @@
-import os
-import pandas as pd
 from bot.features import orderbook_imbalance, momentum, volatility, trend_strength
+from bot.state import TickState
 
 BASE_TARGET = 0.50
 TRAIL_ACTIVATE = 0.30
+TRAIL_DISTANCE = 0.15
+COOLDOWN_TICKS = 5
 
-def decide(state):
+# Every tunable of decide()/apply(); pass a full copy (see make_params) to
+# override any of them without touching the module globals.
+DEFAULT_PARAMS = {
+    "base_target": BASE_TARGET,
+    "trail_activate": TRAIL_ACTIVATE,
+    "trail_distance": TRAIL_DISTANCE,
+    "cooldown": COOLDOWN_TICKS,
+    "entry_imbalance": 0.18,
+    "wick_imbalance": 0.1,
+    "target_vol_factor": 0.25,
+    "stop_floor": 0.4,
+    "stop_vol_factor": 0.6,
+    "min_hold": 3,
+}
+
+def make_params(**overrides):
+    unknown = set(overrides) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise KeyError(f"Unknown strategy params: {sorted(unknown)}")
+    return dict(DEFAULT_PARAMS, **overrides)
+
+def decide(state, params=None):
     """
-    state keys:
+    state: bot.state.TickState (see new_state); reads
     price, prices, orderbook, position, entry_price,
     pnl, cooldown, time_in_trade, trail_stop, trend_bias
+
+    prices may be a list or a bot.ringbuffer.PriceBuffer.
+
+    features: a FeatureEngine already fed with the latest price; when
+    present it is used instead of rescanning prices.
+
+    An old-style state dict is still accepted (converted on each call).
+
+    params: full parameter dict (defaults to DEFAULT_PARAMS)
     """
+    if type(state) is dict:
+        state = TickState.from_dict(state)
+    p = DEFAULT_PARAMS if params is None else params
 
-    if state["cooldown"] > 0:
+    if state.cooldown > 0:
         return "hold"
 
-    vol = volatility(state["prices"])
-    dyn_target = BASE_TARGET + vol * 0.25
-    soft_stop = -max(0.4, vol * 0.6)
+    engine = state.features
+    vol = engine.volatility() if engine is not None else volatility(state.prices)
+    dyn_target = p["base_target"] + vol * p["target_vol_factor"]
+    soft_stop = -max(p["stop_floor"], vol * p["stop_vol_factor"])
 
     # ── ENTRY ──
-    if state["position"] is None:
-        imb = orderbook_imbalance(state["orderbook"])
-        mom = momentum(state["prices"])
+    position = state.position
+    if position is None:
+        imb = orderbook_imbalance(state.orderbook)
+        mom = engine.momentum() if engine is not None else momentum(state.prices)
 
-        if state["trend_bias"] == "up" and imb < 0:
+        bias = state.trend_bias
+        if bias == "up" and imb < 0:
             return "hold"
-        if state["trend_bias"] == "down" and imb > 0:
+        if bias == "down" and imb > 0:
             return "hold"
 
-        if imb > 0.18 and mom > 0:
+        if imb > p["entry_imbalance"] and mom > 0:
             return "buy"
-        if imb < -0.18 and mom < 0:
+        if imb < -p["entry_imbalance"] and mom < 0:
             return "sell"
         return "hold"
 
+    pnl = state.pnl
+
     # ── TRAILING STOP ──
-    if state["pnl"] >= TRAIL_ACTIVATE:
-        if state["trail_stop"] is not None:
-            if state["pnl"] <= state["trail_stop"]:
+    if pnl >= p["trail_activate"]:
+        if state.trail_stop is not None:
+            if pnl <= state.trail_stop:
                 return "exit"
 
     # ── PROFIT EXIT ──
-    if state["pnl"] >= dyn_target:
+    if pnl >= dyn_target:
         return "exit"
 
     # ── WICK PROTECTION ──
-    imb = orderbook_imbalance(state["orderbook"])
-    if state["pnl"] < 0:
-        if state["position"] == "buy" and imb > -0.1:
+    imb = orderbook_imbalance(state.orderbook)
+    if pnl < 0:
+        if position == "buy" and imb > -p["wick_imbalance"]:
             return "hold"
-        if state["position"] == "sell" and imb < 0.1:
+        if position == "sell" and imb < p["wick_imbalance"]:
             return "hold"
 
     # ── HARD INVALIDATION ──
-    if state["pnl"] <= soft_stop and state["time_in_trade"] >= 3:
+    if pnl <= soft_stop and state.time_in_trade >= p["min_hold"]:
         return "exit"
 
     return "hold"
 
+# ── Per-tick bookkeeping ──
+def new_state(history=500, features=None):
+    return TickState(history, features)
+
+def mark(state, price, orderbook):
+    """Feed a new tick into the state and mark any open position to market."""
+    state.price = price
+    state.prices.append(price)
+    state.orderbook = orderbook
+
+    engine = state.features
+    if engine is not None:
+        engine.update(price)
+        trend = engine.trend_strength()
+    else:
+        trend = trend_strength(state.prices)
+    state.trend_bias = "up" if trend > 0 else "down" if trend < 0 else None
+
+    if state.position is not None:
+        pnl = (price - state.entry_price) * state.qty
+        if state.position == "sell":
+            pnl = -pnl
+        state.pnl = pnl
+        state.time_in_trade += 1
+
+def apply(state, action, price, qty, params=None):
+    """
+    Apply a decide() result at the given fill price.
+
+    Returns the closed trade dict on exit, otherwise None.
+    """
+    p = DEFAULT_PARAMS if params is None else params
+    if state.cooldown > 0:
+        state.cooldown -= 1
+
+    trade = None
+    if action in ("buy", "sell") and state.position is None:
+        state.open(action, price, qty)
+    elif action == "exit" and state.position is not None:
+        # PnL of the fills, not of the last mark (an exit fill can differ from it)
+        pnl = (price - state.entry_price) * state.qty
+        trade = {
+            "side": state.position,
+            "entry": state.entry_price,
+            "exit": price,
+            "qty": state.qty,
+            "pnl": -pnl if state.position == "sell" else pnl,
+        }
+        state.flatten()
+        state.cooldown = p["cooldown"]
+
+    # Trail is ratcheted after the decision, so it bites from the next tick
+    if state.position is not None and state.pnl >= p["trail_activate"]:
+        peak = state.pnl if state.peak_pnl is None else max(state.peak_pnl, state.pnl)
+        state.peak_pnl = peak
+        state.trail_stop = peak - p["trail_distance"]
+
+    return trade
+
 def save_trade(trade):
-    os.makedirs("data", exist_ok=True)
-    path = "data/trade_history.csv"
-    df = pd.DataFrame([trade])
-    df.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+    """Buffer a closed trade in the journal (flushed in batches and at exit)."""
+    from bot.journal import get_journal
+    get_journal().append(trade)
 
@@ -0,0 +1,365 @@
+"""
+capture.py
+
+Recorded market data and deterministic replay.
+
+Recorder wraps any engine feed and writes every price and order book the
+bot reads as one fixed-size record per symbol per tick. Given the
+MarketStream behind the feed it also records the book and price after
+every stream message in between, marked read=0, so captures keep the full
+update sequence and not just the engine's once-per-tick polls. Records are
+buffered and written in chunks on a background thread, either as plain
+.npy files (memory-mappable, np.load(mmap_mode="r")) or as compressed .npz
+files. Chunks are only cut on tick boundaries.
+
+ReplaySource reads a capture back through the same get_price()/book()
+interface the live feeds expose, one recorded tick per engine tick (the
+rows the engine read), either at maximum speed or at the recorded pace
+scaled by a speed factor. A read that found no usable book (stale, or
+resyncing after a gap) is recorded with book=0 and replays as None, so
+the engine skips that tick exactly as it did live.
+
+Usage:
+    python -m bot.engine --stream --record data/capture/btc [--compress]  # record while trading
+    python -m bot.engine --replay data/capture/btc [--speed 10]  # play it back
+    python -m bot.capture info data/capture/btc
+    python -m bot.capture bars data/capture/btc BTC/USDT --timeframe 1m --out btc-1m.npy
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from bot.bars import resample
+from bot.orderbook import OrderBook, book_levels
+
+CAPTURE_DIR = os.path.join("data", "capture")
+CAPTURE_VERSION = 3  # 2 added the "read" field, 3 the "book" flag
+
+
+def record_dtype(depth, version=CAPTURE_VERSION):
+    """One row per symbol per read or stream update; book levels are [price, size] padded with NaN."""
+    fields = [
+        ("tick", "<i8"),
+        ("timestamp", "<f8"),
+        ("symbol", "S16"),
+        ("price", "<f8"),
+        ("bids", "<f8", (depth, 2)),
+        ("asks", "<f8", (depth, 2)),
+    ]
+    if version >= 2:
+        fields.append(("read", "u1"))  # 1: the engine read this row, 0: stream update in between
+    if version >= 3:
+        fields.append(("book", "u1"))  # 0: the feed had no usable book (levels are all NaN)
+    return np.dtype(fields)
+
+
+# ── Recording ──
+class Recorder:
+    """Feed wrapper that records what the engine reads, tick by tick."""
+
+    def __init__(self, feed, path, depth=25, chunk_records=20_000, compress=False, stream=None):
+        """
+        Args:
+            feed: Feed to record (RestFeed, StreamFeed, ...)
+            path: Capture directory (created; must not already hold a capture)
+            depth: Book levels kept per side
+            chunk_records: Buffered records that trigger a chunk write
+            compress: Write compressed .npz chunks instead of memory-mappable .npy
+            stream: bot.stream.MarketStream behind the feed; every message it applies is recorded too
+        """
+        self.feed = feed
+        self.blocking = getattr(feed, "blocking", False)
+        self.path = path
+        self.depth = depth
+        self.dtype = record_dtype(depth)
+        self.chunk_records = chunk_records
+        self.compress = compress
+
+        self.tick = 0
+        self.prices = {}
+        self.buffer = []
+        self.chunks = 0
+        self.lock = threading.Lock()
+        self.writer = ThreadPoolExecutor(max_workers=1)  # one thread keeps chunks in order
+
+        os.makedirs(path, exist_ok=True)
+        if glob.glob(os.path.join(path, "chunk-*")):
+            raise ValueError(f"{path} already holds a capture")
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"version": CAPTURE_VERSION, "depth": depth, "compressed": compress,
+                       "updates": stream is not None, "started": time.time()}, f)
+        self.stream = stream
+        if stream is not None:
+            stream.listeners.append(self.record_update)
+
+    def get_price(self, symbol):
+        price = self.feed.get_price(symbol)
+        self.prices[symbol] = price
+        return price
+
+    def book(self, symbol):
+        book = self.feed.book(symbol)
+        self._append(symbol, self.prices.get(symbol), book, read=1, has_book=book is not None)
+        return book
+
+    def record_update(self, symbol):
+        """Stream listener: record symbol's price and book right after a message was applied."""
+        stream = self.stream
+        # Listeners run on the stream's thread, the only one that changes synced
+        usable = symbol in stream.synced and stream.fresh(symbol)
+        self._append(symbol, stream.get_price(symbol), stream.get_orderbook(symbol, self.depth), read=0,
+                     has_book=usable)
+
+    def _append(self, symbol, price, book, read, has_book):
+        bids = np.full((self.depth, 2), np.nan)
+        asks = np.full((self.depth, 2), np.nan)
+        for out, rows in ((bids, book_levels(book, "bids", self.depth)), (asks, book_levels(book, "asks", self.depth))):
+            if rows:
+                out[:len(rows)] = np.asarray(rows, dtype=np.float64)
+        stamped = time.time()
+        with self.lock:
+            # tick is read under the lock: wait() bumps it and cuts chunks under the same lock
+            self.buffer.append((self.tick, stamped, symbol.encode()[:16], float(price or np.nan), bids, asks,
+                                read, has_book))
+
+    async def wait(self, interval):
+        """Tick boundary: maybe cut a chunk, then wait like the wrapped feed would."""
+        with self.lock:
+            # Cut and advance together, so no row of the new tick lands in the chunk being cut
+            self.tick += 1
+            cut = self._cut() if len(self.buffer) >= self.chunk_records else None
+        if cut is not None:
+            self.writer.submit(self._write, *cut)
+        inner = getattr(self.feed, "wait", None)
+        if inner is not None:
+            await inner(interval)
+        else:
+            await asyncio.sleep(interval)
+
+    @property
+    def finished(self):
+        return getattr(self.feed, "finished", False)
+
+    def flush(self):
+        with self.lock:
+            cut = self._cut()
+        return None if cut is None else self.writer.submit(self._write, *cut)
+
+    def _cut(self):
+        """(chunk name, records) of the whole buffer, emptying it; call with the lock held."""
+        if not self.buffer:
+            return None
+        records = np.array(self.buffer, dtype=self.dtype)
+        self.buffer = []
+        self.chunks += 1
+        return os.path.join(self.path, f"chunk-{self.chunks:06d}"), records
+
+    def _write(self, name, records):
+        if self.compress:
+            np.savez_compressed(name + ".npz", records=records)
+        else:
+            np.save(name + ".npy", records)
+
+    def close(self):
+        if self.stream is not None and self.record_update in self.stream.listeners:
+            self.stream.listeners.remove(self.record_update)
+        self.flush()
+        self.writer.shutdown(wait=True)
+
+
+# ── Reading ──
+class Capture:
+    """Read-only view of a capture directory."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.version = self.meta.get("version")
+        if self.version not in (1, 2, CAPTURE_VERSION):
+            raise ValueError(f"Capture at {path} has version {self.version}, "
+                             f"expected {CAPTURE_VERSION}")
+        self.depth = self.meta["depth"]
+        self.dtype = record_dtype(self.depth, self.version)
+
+    def chunk_paths(self):
+        return sorted(glob.glob(os.path.join(self.path, "chunk-*.np[yz]")))
+
+    def load(self, path):
+        """Records of one chunk; .npy chunks come back as memory maps."""
+        if path.endswith(".npz"):
+            with np.load(path) as archive:
+                return archive["records"]
+        return np.load(path, mmap_mode="r")
+
+    def chunks(self):
+        for path in self.chunk_paths():
+            yield self.load(path)
+
+    def records(self):
+        parts = list(self.chunks())
+        return np.concatenate(parts) if parts else np.empty(0, dtype=self.dtype)
+
+    def symbols(self):
+        found = set()
+        for chunk in self.chunks():
+            found.update(s.decode() for s in np.unique(chunk["symbol"]))
+        return sorted(found)
+
+    def series(self, symbol, depth=10, updates=False):
+        """
+        Close prices and top-depth book imbalance for one symbol (bot.backtest inputs).
+
+        One row per engine tick by default; updates=True adds every recorded
+        stream update in between.
+        """
+        records = self.records()
+        keep = records["symbol"] == symbol.encode()
+        if not updates and "read" in records.dtype.names:
+            keep &= records["read"] == 1
+        if not updates and "book" in records.dtype.names:
+            keep &= records["book"] == 1  # the engine skipped those ticks
+        rows = records[keep]
+        depth = min(depth, self.depth)
+        bid = np.nansum(rows["bids"][:, :depth, 1], axis=1)
+        ask = np.nansum(rows["asks"][:, :depth, 1], axis=1)
+        total = bid + ask
+        imb = np.divide(bid - ask, total, out=np.zeros_like(total), where=total != 0)
+        return np.ascontiguousarray(rows["price"], dtype=np.float64), imb
+
+    def bars(self, symbol, timeframe="1m"):
+        """bot.bars BAR_DTYPE bars of every recorded price of one symbol (no volume: reads carry none)."""
+        records = self.records()
+        rows = records[(records["symbol"] == symbol.encode()) & np.isfinite(records["price"])]
+        return resample(rows["timestamp"], rows["price"], timeframe)
+
+
+# ── Replay ──
+class ReplaySource:
+    """
+    Feed that plays a capture back tick by tick.
+
+    Every engine tick sees exactly the rows recorded for that tick. wait()
+    advances to the next recorded tick, sleeping for the recorded gap divided
+    by speed (speed=None replays as fast as the engine can go).
+    """
+
+    blocking = False
+
+    def __init__(self, path, speed=None, book_depths=(10,)):
+        self.capture = Capture(path)
+        self.speed = speed
+        self.book_depths = book_depths
+        self.chunks = iter(self.capture.chunk_paths())
+        self.chunk = None
+        self.starts = None
+        self.group = 0
+        self.rows = {}
+        self.books = {}
+        self.timestamp = None
+        self.finished = False
+        self._next_chunk()
+        self._load_group()
+
+    def _next_chunk(self):
+        for path in self.chunks:
+            chunk = self.capture.load(path)
+            if len(chunk):
+                self.chunk = chunk
+                self.starts = np.concatenate(([0], np.flatnonzero(np.diff(chunk["tick"])) + 1, [len(chunk)]))
+                self.group = 0
+                return True
+        self.chunk = None
+        return False
+
+    def _load_group(self):
+        if self.chunk is None:
+            self.finished = True
+            self.rows = {}
+            return
+        lo, hi = self.starts[self.group], self.starts[self.group + 1]
+        rows = self.chunk[lo:hi]
+        if "read" in rows.dtype.names:
+            rows = rows[rows["read"] == 1]  # the tick replays what the engine read, not stream updates
+        self.rows = {row["symbol"].decode(): row for row in rows}
+        if len(rows):
+            self.timestamp = float(rows["timestamp"][0])
+
+    def advance(self):
+        """Move to the next recorded tick; returns False once the capture is exhausted."""
+        if self.finished:
+            return False
+        self.group += 1
+        if self.group >= len(self.starts) - 1 and not self._next_chunk():
+            self.finished = True
+            self.rows = {}
+            return False
+        self._load_group()
+        return True
+
+    def now(self):
+        """Recorded wall-clock time of the current tick."""
+        return self.timestamp if self.timestamp is not None else time.time()
+
+    # ── Feed interface ──
+    def get_price(self, symbol):
+        row = self.rows.get(symbol)
+        if row is None or np.isnan(row["price"]):
+            return None
+        return float(row["price"])
+
+    def book(self, symbol):
+        row = self.rows.get(symbol)
+        if row is None or ("book" in row.dtype.names and not row["book"]):
+            return None
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(self.book_depths)
+        bids, asks = row["bids"], row["asks"]
+        book.apply_snapshot(bids[~np.isnan(bids[:, 0])].tolist(), asks[~np.isnan(asks[:, 0])].tolist())
+        return book
+
+    async def wait(self, interval):
+        previous = self.timestamp
+        if not self.advance():
+            return
+        if self.speed:
+            await asyncio.sleep(max(0.0, (self.timestamp - previous) / self.speed))
+        else:
+            await asyncio.sleep(0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Market data capture tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    i = sub.add_parser("info", help="summarize a capture directory")
+    i.add_argument("path")
+    b = sub.add_parser("bars", help="write one symbol's OHLC bars for bot.backtest")
+    b.add_argument("path")
+    b.add_argument("symbol")
+    b.add_argument("--timeframe", default="1m")
+    b.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    capture = Capture(args.path)
+    if args.cmd == "bars":
+        bars = capture.bars(args.symbol, args.timeframe)
+        np.save(args.out, bars)
+        print(f"[INFO] {len(bars)} {args.timeframe} bars -> {args.out}")
+        raise SystemExit(0)
+    records = capture.records()
+    print(f"[INFO] {len(capture.chunk_paths())} chunks, {len(records)} records, depth {capture.depth}")
+    if "read" in records.dtype.names:
+        print(f"[INFO] {int((records['read'] == 0).sum())} of them stream updates between reads")
+    if len(records):
+        span = records["timestamp"][-1] - records["timestamp"][0]
+        ticks = int(records["tick"][-1] - records["tick"][0]) + 1
+        print(f"[INFO] {ticks} ticks over {span:.1f}s, symbols: {', '.join(capture.symbols())}")
@@ -0,0 +1,140 @@
+"""
+config.py
+
+Versioned, immutable bot configuration.
+
+A Config is a frozen snapshot of every user setting (the ui.settings
+panel's values) plus the strategy params derived from them. ConfigStore
+holds the current snapshot in one attribute: readers take it with a
+single reference load (store.current) and keep using that object for the
+whole tick, so a change can never half-apply in the middle of a trade and
+the hot path never takes a lock. Writers build a new snapshot with a
+higher version and swap the reference.
+
+The UI coalesces and debounces slider drags before publishing (see
+ui.settings.Settings); the store persists snapshots to data/config.json
+and the shared store loads it at startup.
+
+Usage:
+    cfg = get_config().current          # once per tick
+    qty = cfg.usdt_per_trade * cfg.max_leverage / price
+"""
+
+import json
+import os
+import threading
+
+from bot import brain
+
+CONFIG_PATH = os.path.join("data", "config.json")
+
+DEFAULTS = {
+    "balance": 1000.0,
+    "usdt_per_trade": 10.0,
+    "max_leverage": 10,
+    "risk_percent": 1.0,
+    "trailing_stop": brain.TRAIL_DISTANCE,  # $ distance of the trail behind the peak PnL
+    "default_mode": "LEARNING",
+    "symbol": "BTC/USDT",
+}
+
+_TYPES = {"balance": float, "usdt_per_trade": float, "max_leverage": int, "risk_percent": float,
+          "trailing_stop": float, "default_mode": str, "symbol": str}
+
+
+class Config:
+    """One immutable configuration snapshot; build changed copies with replace()."""
+
+    __slots__ = tuple(DEFAULTS) + ("version", "params")
+    KEYS = tuple(DEFAULTS)
+
+    def __init__(self, version=0, **values):
+        unknown = set(values) - set(DEFAULTS)
+        if unknown:
+            raise KeyError(f"Unknown config keys: {sorted(unknown)}")
+        for key, default in DEFAULTS.items():
+            object.__setattr__(self, key, _TYPES[key](values.get(key, default)))
+        object.__setattr__(self, "version", version)
+        # Strategy params for brain.decide()/apply(); shared read-only by every tick
+        object.__setattr__(self, "params", brain.make_params(trail_distance=self.trailing_stop))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Config is immutable; use replace()")
+
+    def replace(self, **changes):
+        """New snapshot with changes applied and the version bumped."""
+        return Config(self.version + 1, **dict(self.as_dict(), **changes))
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.KEYS}
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.KEYS else default
+
+    def __repr__(self):
+        return f"Config(v{self.version}, {', '.join(f'{k}={getattr(self, k)!r}' for k in self.KEYS)})"
+
+
+class ConfigStore:
+    def __init__(self, config=None, path=None):
+        """
+        Args:
+            config: Initial snapshot (defaults to the file at path, else DEFAULTS)
+            path: JSON file save() writes and load() reads (None keeps the store in memory)
+        """
+        self.path = path
+        self.lock = threading.Lock()  # serializes writers only
+        self.listeners = []
+        self.current = config if config is not None else self.load()
+
+    def load(self):
+        """Snapshot stored at path (DEFAULTS when missing or unreadable)."""
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    stored = json.load(f)
+                values = {k: v for k, v in stored.get("values", {}).items() if k in DEFAULTS}
+                return Config(stored.get("version", 0), **values)
+            except (OSError, ValueError, TypeError) as e:
+                print(f"[ERROR] Failed to load config {self.path}: {e}")
+        return Config()
+
+    def publish(self, **changes):
+        """Swap in a new snapshot with changes; returns it (or the current one if nothing changed)."""
+        with self.lock:
+            current = self.current
+            changes = {k: v for k, v in changes.items() if k not in current.KEYS or current.get(k) != v}
+            if not changes:
+                return current
+            config = self.current = current.replace(**changes)
+        for callback in list(self.listeners):
+            try:
+                callback(config)
+            except Exception as e:
+                print(f"[ERROR] Config listener: {e}")
+        return config
+
+    def subscribe(self, callback):
+        """Register callback(config), called on the publishing thread after every change."""
+        self.listeners.append(callback)
+
+    def save(self):
+        """Write the current snapshot to path, atomically replacing the previous file."""
+        if not self.path:
+            return
+        config = self.current
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": config.version, "values": config.as_dict()}, f, indent=1)
+        os.replace(tmp, self.path)
+
+
+# ── Shared store (persisted) ──
+_store = None
+
+def get_config():
+    global _store
+    if _store is None:
+        _store = ConfigStore(path=CONFIG_PATH)
+    return _store
@@ -0,0 +1,496 @@
+"""
+engine.py
+
+Headless trading runtime.
+
+Engine runs market data, decide(), execution and trade persistence on its
+own asyncio event loop. Nothing here imports tkinter or matplotlib: a GUI
+attaches as an optional observer through subscribe() and is responsible
+for marshalling events onto its own thread.
+
+Every symbol gets its own SymbolSession (feature state, position,
+cooldown); all sessions tick concurrently and share the feed, executor,
+exchange connection and rate-limit budget. An order is awaited in its own
+task, so only its session pauses until the fill comes back.
+
+Usage:
+    python -m bot.engine --symbol BTC/USDT --symbol ETH/USDT --interval 1 [--stream] [--live]
+    python -m bot.engine --stream --record data/capture/btc [--compress]
+    python -m bot.engine --replay data/capture/btc [--speed 10]
+"""
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+from bot import brain, trader
+from bot.bars import BarAggregator
+from bot.config import Config, get_config
+from bot.features import FeatureEngine
+from bot.latency import LatencyRecorder
+from bot.orders import get_order_log, order_event
+from bot.simulator import UNLIMITED, AsyncSimExchange, SimExchange
+from bot.stats import TradeStats
+
+
+# ── Market data feeds ──
+class RestFeed:
+    """Polls prices and order books through bot.trader's REST client."""
+
+    blocking = True  # engine runs these calls in a worker thread
+
+    def get_price(self, symbol):
+        return trader.get_trader(symbol).get_price()
+
+    def book(self, symbol):
+        return trader.get_trader(symbol).get_orderbook()
+
+
+class StreamFeed:
+    """Reads the local snapshot of a bot.stream.MarketStream (no network I/O)."""
+
+    blocking = False
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def get_price(self, symbol):
+        return self.stream.get_price(symbol)
+
+    def book(self, symbol):
+        return self.stream.book(symbol)
+
+    def bars(self, symbol):
+        return self.stream.get_bars(symbol)
+
+    def age(self, symbol):
+        """Seconds since the book the engine reads last changed on the wire."""
+        return self.stream.age(symbol, "book")
+
+
+# ── Engine ──
+LATENCY_PATH = os.path.join("data", "latency.json")
+
+class SymbolSession:
+    """Per-symbol trading state; sessions never share anything mutable."""
+
+    def __init__(self, symbol, bars=None):
+        """
+        Args:
+            symbol: Market this session trades
+            bars: BarAggregator the feed already maintains (e.g. from public trades);
+                without one the session builds its own from its ticks
+        """
+        self.symbol = symbol
+        self.state = brain.new_state(features=FeatureEngine())
+        self.busy = False  # an order for this symbol is in flight
+        self.order = None  # asyncio task waiting for that order
+        self.own_bars = bars is None
+        self.bars = BarAggregator() if bars is None else bars
+
+
+class Engine:
+    def __init__(self, symbol="BTC/USDT", feed=None, executor=None, live=False,
+                 leverage=None, usdt_per_trade=None, interval=1.0, params=None, symbols=None, paper=None,
+                 latency_path=LATENCY_PATH, latency_every=10.0, orders=None, config=None,
+                 account=None):
+        """
+        Args:
+            symbol: Market to trade (ignored when symbols is given)
+            feed: RestFeed / StreamFeed / bot.capture.ReplaySource (anything with
+                get_price/book; optional wait(interval), now(), finished and bars(symbol))
+            executor: bot.execution.Executor used for LIVE orders
+            live: Send real orders (False = LEARNING, orders go to the paper simulator)
+            leverage: Leverage used for sizing and orders (overrides the config for this engine only)
+            usdt_per_trade: Margin per trade (overrides the config for this engine only)
+            interval: Seconds between decision ticks
+            params: Fixed strategy params for decide() (default: the config snapshot's params)
+            symbols: Several markets to trade concurrently
+            paper: bot.simulator.SimExchange for LEARNING orders (defaults to a fresh one)
+            latency_path: JSON file the latency snapshot is exported to (None disables)
+            latency_every: Seconds between latency exports
+            orders: bot.orders.OrderLog every order is recorded in (defaults to the shared one)
+            config: bot.config.ConfigStore read once per tick (defaults to the shared, persisted one)
+            account: bot.account.AccountCache checked before LIVE entries (in-memory, never blocks)
+        """
+        self.feed = feed or RestFeed()
+        feed_bars = getattr(self.feed, "bars", None)
+        self.sessions = {s: SymbolSession(s, feed_bars(s) if feed_bars else None)
+                         for s in (symbols or [symbol])}
+        self.symbol = next(iter(self.sessions))
+        self.executor = executor
+        self.live = live
+        self.config = config if config is not None else get_config()
+        # Kept out of the shared store: publishing them would overwrite the user's saved settings
+        overrides = {"max_leverage": leverage, "usdt_per_trade": usdt_per_trade}
+        self.overrides = {k: v for k, v in overrides.items() if v is not None}
+        self._derived = None  # (store snapshot, that snapshot with the overrides applied)
+        self.account = account
+        self.account_stream = None  # started by set_live() when no account cache was given
+        self.interval = interval
+        self.params = params
+        self.paper = paper if paper is not None else SimExchange()
+        self.paper_executor = None
+
+        self.stats = TradeStats()
+        self.latency = LatencyRecorder()
+        self.latency_path = latency_path
+        self.latency_every = latency_every
+        self.orders = orders
+        self.observers = []
+        self.running = False
+        self.generation = 0  # bumped per start; a loop from an older start exits at its next tick
+        self.loop = None
+        self.thread = None
+
+    # ── Config (one snapshot per tick, see bot.config) ──
+    def current_config(self):
+        """The store's current snapshot with this engine's overrides applied (rebuilt only when it changes)."""
+        cfg = self.config.current
+        if not self.overrides:
+            return cfg
+        derived = self._derived
+        if derived is None or derived[0] is not cfg:
+            derived = self._derived = (cfg, Config(cfg.version, **dict(cfg.as_dict(), **self.overrides)))
+        return derived[1]
+
+    @property
+    def leverage(self):
+        return self.current_config().max_leverage
+
+    @property
+    def usdt_per_trade(self):
+        return self.current_config().usdt_per_trade
+
+    # ── Observers ──
+    def subscribe(self, callback):
+        """
+        Register callback(event) for engine events.
+
+        Events are dicts with a "type" of "tick", "order", "trade" or
+        "error". Callbacks run on the engine thread and must not block.
+        Tick events carry the session's bot.bars.BarAggregator as "bars";
+        observers may read it from any thread but never update it.
+        """
+        self.observers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.observers:
+            self.observers.remove(callback)
+
+    def emit(self, event):
+        for callback in list(self.observers):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"[ERROR] Engine observer: {e}")
+
+    # ── Lifecycle ──
+    def start(self):
+        """Run the engine loop in a background thread."""
+        if self.running:
+            return
+        old = self.thread
+        if old is not None and old.is_alive() and old is not threading.current_thread():
+            # stop() lets the loop finish its current tick; never run two loops at once
+            old.join(self.interval + 5)
+        self.running = True
+        self.generation += 1
+        self.thread = threading.Thread(target=self.run_forever, args=(self.generation,), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Ask the loop to exit after its current tick (start() waits for that)."""
+        self.running = False
+
+    def set_live(self, live):
+        """Switch between LIVE and LEARNING; starts an Executor and the account stream on first use."""
+        if live and self.executor is None:
+            from bot.execution import Executor
+            self.executor = Executor().start()
+        if live and self.account is None:
+            from bot.account import AccountStream
+            self.account_stream = AccountStream(list(self.sessions)).start()
+            self.account = self.account_stream.cache
+            trader.use_account(self.account)
+        self.live = live
+
+    def order_executor(self):
+        """Executor for the current mode; LEARNING gets one backed by the simulator."""
+        if self.live:
+            return self.executor
+        if self.paper_executor is None:
+            from bot.execution import Executor
+            self.paper_executor = Executor(exchange=AsyncSimExchange(self.paper),
+                                           price_source=self.paper.last_price, limiter=UNLIMITED).start()
+        return self.paper_executor
+
+    def order_log(self):
+        if self.orders is None:
+            self.orders = get_order_log()
+        return self.orders
+
+    def run_forever(self, generation=None):
+        """Block the calling thread on the engine loop (used by the CLI)."""
+        if generation is None:
+            self.generation += 1
+            generation = self.generation
+        self.running = True
+        asyncio.run(self.run(generation))
+
+    async def run(self, generation=None):
+        generation = self.generation if generation is None else generation
+        self.loop = asyncio.get_running_loop()
+        exported = time.monotonic()
+        while self.running and self.generation == generation:
+            started = time.monotonic()
+            try:
+                await self.tick()
+            except Exception as e:
+                print(f"[ERROR] Engine tick: {e}")
+                self.emit({"type": "error", "error": str(e)})
+            if self.latency_path and started - exported >= self.latency_every:
+                exported = started
+                await self._export_latency()
+            await self._wait(max(0.0, self.interval - (time.monotonic() - started)))
+            if getattr(self.feed, "finished", False):
+                self.running = False  # a replay ran out of data
+        await self.drain()
+        if self.latency_path:
+            await self._export_latency()
+
+    async def _export_latency(self):
+        try:
+            await asyncio.to_thread(self.latency.export, self.latency_path)
+        except OSError as e:
+            print(f"[ERROR] Latency export: {e}")
+
+    async def _wait(self, delay):
+        # Replay feeds pace the engine themselves (recorded gaps or max speed)
+        wait = getattr(self.feed, "wait", None)
+        if wait is not None:
+            await wait(delay)
+        else:
+            await asyncio.sleep(delay)
+
+    def now(self):
+        """Wall-clock time, or the recorded time when the feed is a replay."""
+        now = getattr(self.feed, "now", None)
+        return now() if now is not None else time.time()
+
+    # ── One decision step ──
+    @property
+    def state(self):
+        """State of the first (or only) symbol."""
+        return self.sessions[self.symbol].state
+
+    async def _read(self, fn, symbol):
+        if getattr(self.feed, "blocking", False):
+            return await asyncio.to_thread(fn, symbol)
+        return fn(symbol)
+
+    async def tick(self):
+        """Advance every symbol session by one tick, concurrently."""
+        results = await asyncio.gather(*(self.tick_session(s) for s in self.sessions.values()),
+                                       return_exceptions=True)
+        for session, result in zip(self.sessions.values(), results):
+            if isinstance(result, Exception):
+                print(f"[ERROR] Engine tick {session.symbol}: {result}")
+                self.emit({"type": "error", "symbol": session.symbol, "error": str(result)})
+
+    async def tick_session(self, session):
+        if session.busy:
+            return  # previous order still in flight; never stack decisions
+        symbol = session.symbol
+        cfg = self.current_config()  # this tick's settings, even if the UI publishes mid-trade
+        leverage, usdt = cfg.max_leverage, cfg.usdt_per_trade
+        params = self.params if self.params is not None else cfg.params
+        record = self.latency.record
+        t_start = time.perf_counter()
+        price = await self._read(self.feed.get_price, symbol)
+        if not price:
+            return
+        book = await self._read(self.feed.book, symbol)
+        if book is None:
+            return  # stream book resyncing after a gap, or stale
+        t_data = time.perf_counter()
+        record("data", symbol, t_data - t_start)
+        age = getattr(self.feed, "age", None)
+        if age is not None:
+            age = age(symbol)
+            if age != float("inf"):
+                record("age", symbol, age)
+
+        state = session.state
+        if not self.live:
+            self.paper.update(symbol, price, book)
+        if session.own_bars:
+            session.bars.update(price, ts=self.now())
+        brain.mark(state, price, book)
+        t_features = time.perf_counter()
+        record("features", symbol, t_features - t_data)
+        action = brain.decide(state, params)
+        t_decided = time.perf_counter()
+        record("decide", symbol, t_decided - t_features)
+        self.emit({"type": "tick", "symbol": symbol, "price": price, "action": action,
+                   "state": state.position_state(), "leverage": leverage, "bars": session.bars})
+
+        qty = round((usdt * leverage) / price, 6)
+        if action in ("buy", "sell") and state.position is None:
+            if not self._margin_ok(symbol, usdt):
+                return
+            future = self.order_executor().submit(symbol, action, leverage, usdt=usdt, price=price)
+        elif action == "exit" and state.position is not None:
+            position = {"side": state.position, "qty": state.qty, "leverage": leverage}
+            future = self.order_executor().close_position(symbol, position, price=price)
+        else:
+            await self._settle(session, action, price, qty, params)
+            return
+        # The order completes in its own task: a slow ack for this symbol must not hold up
+        # the next tick of every other session (this one stays busy until it lands)
+        session.busy = True
+        session.order = asyncio.ensure_future(
+            self._order(session, action, future, qty, params, t_start, t_decided))
+
+    async def _order(self, session, action, future, qty, params, t_start, t_decided):
+        """Wait for one session's order, then apply its fill."""
+        symbol = session.symbol
+        try:
+            result = await self._execute(future, symbol, t_start, t_decided)
+            if result is None:
+                return
+            if action == "exit":
+                await self._settle(session, action, result["fill"], qty, params, closing=result)
+            else:
+                await self._settle(session, action, result["fill"], result["qty"], params)
+        except Exception as e:
+            print(f"[ERROR] Engine order {symbol}: {e}")
+            self.emit({"type": "error", "symbol": symbol, "error": str(e)})
+        finally:
+            session.busy = False
+
+    async def _settle(self, session, action, fill, qty, params, closing=None):
+        """Apply an action at its fill; closing is the successful exit order, logged with its PnL."""
+        trade = brain.apply(session.state, action, fill, qty, params)
+        if trade is not None and closing is not None:
+            # What the exchange booked for the close beats our own fill arithmetic
+            realized = (closing["order"] or {}).get("realizedPnl")
+            if realized is not None:
+                trade["pnl"] = float(realized)
+        if closing is not None:
+            self._log_order(closing, trade)
+        if trade is not None:
+            trade.update(symbol=session.symbol, live=self.live, timestamp=self.now())
+            self.stats.update(trade["pnl"], trade["side"])
+            await asyncio.to_thread(brain.save_trade, trade)
+            self.emit({"type": "trade", "trade": trade, "stats": self.stats.snapshot()})
+
+    async def drain(self):
+        """Wait for every order still in flight."""
+        pending = [s.order for s in self.sessions.values() if s.order is not None and not s.order.done()]
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _execute(self, future, symbol, t_start, t_decided):
+        """Await an Executor future; returns the result with a "fill" price, or None on error."""
+        self.latency.record("submit", symbol, time.perf_counter() - t_decided)
+        result = await asyncio.wrap_future(future)
+        self.emit({"type": "order", "result": result})
+        if result["error"] is not None or not result["reduce_only"]:
+            self._log_order(result)
+        if result["error"] is not None:
+            return None
+        self.latency.record("ack", symbol, result["latency"])
+        self.latency.record("rtt", symbol, result["rtt"])
+        self.latency.record("tick", symbol, time.perf_counter() - t_start)
+        order = result["order"] or {}
+        result["fill"] = order.get("average") or order.get("price") or result["price"]
+        return result
+
+    def _margin_ok(self, symbol, usdt):
+        """
+        LIVE entries need enough cached free margin; unknown margin is left to the exchange.
+
+        A wallet older than trader.ACCOUNT_MAX_AGE counts as unknown: a stale
+        balance could block entries that are affordable by now.
+        """
+        if not self.live or self.account is None:
+            return True
+        if self.account.age("wallet") > trader.ACCOUNT_MAX_AGE:
+            return True
+        free = self.account.free("USDT")
+        if free is None or free >= usdt:
+            return True
+        self.emit({"type": "error", "symbol": symbol,
+                   "error": f"Free margin {free:.2f} USDT < {usdt:.2f}, entry skipped"})
+        return False
+
+    def _log_order(self, result, trade=None):
+        self.order_log().append(order_event(result, self.live, self.now(), trade))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the trading engine without a GUI")
+    parser.add_argument("--symbol", action="append", default=[], help="repeat to trade several symbols")
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--leverage", type=int, default=None, help="override the saved config")
+    parser.add_argument("--stream", action="store_true", help="use the WebSocket feed instead of REST polling")
+    parser.add_argument("--live", action="store_true", help="send real orders")
+    parser.add_argument("--record", metavar="DIR", help="capture every price/book read into DIR")
+    parser.add_argument("--compress", action="store_true", help="write --record chunks as compressed .npz")
+    parser.add_argument("--replay", metavar="DIR", help="trade a recorded capture instead of the market")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="replay at N x the recorded pace (default: as fast as possible)")
+    args = parser.parse_args(argv)
+    if args.replay and (args.live or args.stream or args.record):
+        parser.error("--replay cannot be combined with --live, --stream or --record")
+
+    if args.compress and not args.record:
+        parser.error("--compress needs --record")
+
+    symbols = args.symbol or ["BTC/USDT"]
+    feed = stream = None
+    if args.replay:
+        from bot.capture import Capture, ReplaySource
+        symbols = args.symbol or Capture(args.replay).symbols()
+        feed = ReplaySource(args.replay, speed=args.speed)
+    if args.stream:
+        from bot.stream import MarketStream
+        stream = MarketStream(symbols).start()
+        trader.use_stream(stream)
+        feed = StreamFeed(stream)
+    if args.record:
+        from bot.capture import Recorder
+        feed = Recorder(feed or RestFeed(), args.record, compress=args.compress, stream=stream)
+
+    executor = account = None
+    if args.live:
+        from bot.account import AccountStream
+        from bot.execution import Executor
+        executor = Executor().start()
+        account = AccountStream(symbols).start()
+        trader.use_account(account.cache)
+
+    engine = Engine(symbols=symbols, feed=feed, executor=executor, live=args.live,
+                    leverage=args.leverage, interval=args.interval,
+                    account=account.cache if account is not None else None)
+    engine.subscribe(lambda e: e["type"] == "trade" and print(f"[TRADE] {e['trade']}"))
+    print(f"[INFO] Engine running on {', '.join(symbols)} ({'LIVE' if args.live else 'LEARNING'})")
+    try:
+        engine.run_forever()
+    except KeyboardInterrupt:
+        engine.stop()
+    finally:
+        if executor is not None:
+            executor.stop()
+        if account is not None:
+            account.stop()
+        if engine.paper_executor is not None:
+            engine.paper_executor.stop()
+        if args.record:
+            feed.close()
+
+
+if __name__ == "__main__":
+    main()
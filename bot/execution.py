@@ -0,0 +1,160 @@
+"""
+execution.py
+
+Non-blocking order execution.
+
+Executor owns an asyncio loop in a background thread and an async ccxt
+client whose aiohttp session (and its keep-alive connection pool) lives
+for the executor's lifetime. Markets are loaded once up front, leverage
+is cached per symbol and only re-sent when it changes, and order size is
+taken from the in-process price (streamed when bot.trader has a stream).
+submit() returns a concurrent Future immediately, so the decision loop
+never waits on the exchange.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+from bot import trader
+from bot.config import get_config
+
+# Bybit answers "leverage not modified" with this code; it is not a failure
+LEVERAGE_NOT_MODIFIED = "110043"
+
+
+def make_async_exchange():
+    import ccxt.async_support as ccxt_async
+
+    return ccxt_async.bybit({
+        "apiKey": trader.API_KEY,
+        "secret": trader.API_SECRET,
+        "enableRateLimit": True,
+        "options": {"defaultType": "linear"},
+    })
+
+
+class Executor:
+    def __init__(self, exchange=None, price_source=None, latency_kept=1000, limiter=None):
+        """
+        Args:
+            exchange: Async ccxt-compatible client (defaults to bybit with the trader keys)
+            price_source: function(symbol) -> last price, used for sizing
+            latency_kept: Number of submit-to-ack samples retained
+            limiter: RateLimiter shared with the REST traders (defaults to trader.LIMITER)
+        """
+        self.exchange = exchange
+        self.price_source = price_source or (lambda symbol: trader.get_trader(symbol).get_price())
+        self.limiter = limiter or trader.LIMITER
+        self.leverage = {}  # symbol -> leverage last confirmed by the exchange
+        self.latencies = deque(maxlen=latency_kept)  # (symbol, side, seconds)
+        self.loop = None
+        self.thread = None
+        self.warm = None
+
+    # ── Lifecycle ──
+    def start(self):
+        """Start the executor loop and warm up the connection; returns self."""
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.warm = asyncio.run_coroutine_threadsafe(self._warmup(), self.loop)
+        return self
+
+    def stop(self, timeout=5):
+        if self.loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close(), self.loop).result(timeout)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+
+    async def _warmup(self):
+        if self.exchange is None:
+            self.exchange = make_async_exchange()
+        try:
+            # Market metadata and the first TLS handshake are paid here, not on the first entry
+            await self.exchange.load_markets()
+        except Exception as e:
+            print(f"[ERROR] Executor warmup: {e}")
+
+    async def _close(self):
+        if self.exchange is not None and hasattr(self.exchange, "close"):
+            await self.exchange.close()
+
+    # ── Public API (callable from any thread) ──
+    def submit(self, symbol, side, leverage, usdt=None, qty=None, reduce_only=False, price=None):
+        """
+        Queue a market order and return a concurrent.futures.Future.
+
+        price is the sizing price the caller already has; without it the
+        price_source is asked off the executor loop (it may be a REST call).
+
+        The future resolves to a dict with symbol, side, qty, price (the
+        sizing price), order (exchange response or None), latency (seconds
+        from this call to the exchange ack), rtt (seconds the create_order
+        request itself took) and error.
+        """
+        submitted = time.perf_counter()
+        usdt = get_config().current.usdt_per_trade if usdt is None else usdt
+        return asyncio.run_coroutine_threadsafe(
+            self._submit(symbol, side, leverage, usdt, qty, reduce_only, price, submitted), self.loop)
+
+    def close_position(self, symbol, position, price=None):
+        side = "sell" if position["side"] == "buy" else "buy"
+        return self.submit(symbol, side, position.get("leverage"), qty=position["qty"], reduce_only=True,
+                           price=price)
+
+    # ── Internals ──
+    async def _submit(self, symbol, side, leverage, usdt, qty, reduce_only, price, submitted):
+        await asyncio.wrap_future(self.warm)
+        if price is None:
+            price = await asyncio.to_thread(self.price_source, symbol)
+        result = {"symbol": symbol, "side": side, "qty": qty, "price": price, "reduce_only": reduce_only,
+                  "order": None, "latency": None, "rtt": None, "error": None}
+        try:
+            if leverage and not reduce_only:
+                await self._ensure_leverage(symbol, leverage)
+            if qty is None:
+                if not price:
+                    raise ValueError(f"no price for {symbol}")
+                qty = round((usdt * leverage) / price, 6)
+                result["qty"] = qty
+
+            params = {"reduceOnly": True} if reduce_only else {}
+            await self.limiter.acquire_async()
+            sent = time.perf_counter()
+            result["order"] = await self.exchange.create_order(symbol, "market", side, qty, None, params)
+            acked = time.perf_counter()
+            result["rtt"] = acked - sent
+            result["latency"] = acked - submitted
+            self.latencies.append((symbol, side, result["latency"]))
+        except Exception as e:
+            result["error"] = str(e)
+            print(f"[ERROR] Order {side} {symbol}: {e}")
+        return result
+
+    async def _ensure_leverage(self, symbol, leverage):
+        if self.leverage.get(symbol) == leverage:
+            return
+        try:
+            await self.limiter.acquire_async()
+            await self.exchange.set_leverage(leverage, symbol)
+        except Exception as e:
+            if LEVERAGE_NOT_MODIFIED not in str(e):
+                raise
+        self.leverage[symbol] = leverage
+
+    def latency_summary(self):
+        """Submit-to-ack latency in milliseconds: count, mean, p50, p99, max."""
+        samples = sorted(s for _, _, s in self.latencies)
+        if not samples:
+            return {"count": 0}
+        pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+        return {
+            "count": len(samples),
+            "mean": sum(samples) / len(samples) * 1000,
+            "p50": pick(0.50),
+            "p99": pick(0.99),
+            "max": samples[-1] * 1000,
+        }
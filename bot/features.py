@@ -1,6 +1,14 @@
 import numpy as np
 
+# The list-based functions below accept any sequence with len() and
+# negative indexing, including a bot.ringbuffer.PriceBuffer, whose slices
+# are zero-copy views.
+
 def orderbook_imbalance(orderbook, depth=10):
+    # bot.orderbook.OrderBook (and backtest stand-ins) keep this cached
+    if hasattr(orderbook, "imbalance"):
+        return orderbook.imbalance(depth)
+
     bids = orderbook.get("bids", [])[:depth]
     asks = orderbook.get("asks", [])[:depth]
 
@@ -25,3 +33,91 @@ def trend_strength(prices, lookback=50):
     if len(prices) < lookback:
         return 0
     return prices[-1] - prices[-lookback]
+
+
+# ── Incremental Engine ──
+class FeatureEngine:
+    """
+    Stateful, constant-time version of the price features above.
+
+    Every call to update() pushes one price into a fixed ring and adjusts a
+    sliding-window Welford accumulator, so momentum(), volatility() and
+    trend_strength() are O(1) reads that match the list-based functions.
+    """
+
+    # Rebuild the variance accumulator from the ring every N updates so
+    # floating point drift from the sliding updates can never build up.
+    RESYNC_EVERY = 4096
+
+    def __init__(self, mom_lookback=6, vol_lookback=20, trend_lookback=50):
+        self.mom_lookback = mom_lookback
+        self.vol_lookback = vol_lookback
+        self.trend_lookback = trend_lookback
+        self.size = max(mom_lookback, vol_lookback, trend_lookback)
+        self.reset()
+
+    def reset(self):
+        self.ring = [0.0] * self.size
+        self.head = 0  # slot the next price is written to
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.since_resync = 0
+
+    def seed(self, prices):
+        """Reset and replay just enough of a price history to fill the ring."""
+        self.reset()
+        for price in prices[-self.size:]:
+            self.update(price)
+
+    def lag(self, n):
+        """Price n-1 ticks before the latest one (lag(1) is the latest)."""
+        return self.ring[(self.head - n) % self.size]
+
+    def update(self, price):
+        price = float(price)
+        n = self.vol_lookback
+        if self.count >= n:
+            old = self.lag(n)
+            mean = self.mean + (price - old) / n
+            self.m2 += (price - old) * (price - mean + old - self.mean)
+            self.mean = mean
+        else:
+            k = self.count + 1
+            delta = price - self.mean
+            self.mean += delta / k
+            self.m2 += delta * (price - self.mean)
+
+        self.ring[self.head] = price
+        self.head = (self.head + 1) % self.size
+        self.count += 1
+
+        self.since_resync += 1
+        if self.since_resync >= self.RESYNC_EVERY:
+            self.resync()
+
+    def resync(self):
+        """Recompute the window mean/M2 exactly from the ring."""
+        n = min(self.count, self.vol_lookback)
+        window = [self.lag(i) for i in range(1, n + 1)]
+        self.mean = sum(window) / n if n else 0.0
+        self.m2 = sum((p - self.mean) ** 2 for p in window)
+        self.since_resync = 0
+
+    def price(self):
+        return self.lag(1) if self.count else 0
+
+    def momentum(self):
+        if self.count < self.mom_lookback:
+            return 0
+        return self.lag(1) - self.lag(self.mom_lookback)
+
+    def volatility(self):
+        if self.count < self.vol_lookback:
+            return 0
+        return (max(self.m2, 0.0) / self.vol_lookback) ** 0.5
+
+    def trend_strength(self):
+        if self.count < self.trend_lookback:
+            return 0
+        return self.lag(1) - self.lag(self.trend_lookback)
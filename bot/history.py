@@ -0,0 +1,253 @@
+"""
+history.py
+
+Local cache of exchange OHLCV history for backtests and replay.
+
+KlineCache pages through the exchange's fetch_ohlcv and stores the bars
+as bot.bars BAR_DTYPE arrays, one .npy file per symbol / timeframe / UTC
+day:
+
+    data/history/BTCUSDT/1m/2024-03-01.npy          complete day
+    data/history/BTCUSDT/1m/2024-03-02.partial.npy  day that was not over yet
+
+A day is only stored as complete once the exchange has returned its final
+bucket (e.g. 23:59 for 1m) and that bar has closed; anything short of that
+stays .partial. Reads memory-map the day files and binary-search the
+requested window, so repeated backtests touch neither the network nor a
+CSV parser. bars() first backfills only what is missing: days without a
+file, and partial days from their first missing bar on (a hole, else the
+last stored bar, which may have still been forming). Exchange bars carry
+no tick count, so their "ticks" field is 0.
+
+Usage:
+    python -m bot.history BTC/USDT --timeframe 1m --start 2024-03-01 --end 2024-03-08
+    python -m bot.history BTC/USDT --start 2024-03-01 --end 2024-03-08 --out btc-1m.npy
+"""
+
+import argparse
+import datetime as dt
+import os
+
+import numpy as np
+
+from bot.bars import BAR_DTYPE, timeframe_seconds
+
+HISTORY_DIR = os.path.join("data", "history")
+DAY = 86400
+
+
+def market_id(symbol):
+    return symbol.split(":")[0].replace("/", "")
+
+
+def to_epoch(value):
+    """Epoch seconds from a number, a "YYYY-MM-DD[THH:MM]" string or a datetime (naive = UTC)."""
+    if isinstance(value, str):
+        value = dt.datetime.fromisoformat(value)
+    if isinstance(value, dt.date) and not isinstance(value, dt.datetime):
+        value = dt.datetime(value.year, value.month, value.day)
+    if isinstance(value, dt.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=dt.timezone.utc)
+        return value.timestamp()
+    return float(value)
+
+
+def day_name(day_start):
+    return dt.datetime.fromtimestamp(day_start, dt.timezone.utc).strftime("%Y-%m-%d")
+
+
+def first_missing(starts, day, step):
+    """Where a stored day should be refetched from: its first hole, else its last bar."""
+    if not len(starts) or starts[0] > day:
+        return day
+    holes = np.flatnonzero(np.diff(starts) > step)
+    return float(starts[holes[0]] + step) if len(holes) else float(starts[-1])
+
+
+def ohlcv_bars(rows):
+    """BAR_DTYPE bars from ccxt fetch_ohlcv rows ([ms, open, high, low, close, volume])."""
+    rows = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+    bars = np.zeros(len(rows), dtype=BAR_DTYPE)
+    bars["start"] = rows[:, 0] / 1000
+    for i, field in enumerate(("open", "high", "low", "close", "volume"), 1):
+        bars[field] = rows[:, i]
+    return bars
+
+
+class KlineCache:
+    def __init__(self, exchange=None, root=HISTORY_DIR, limiter=None, page_limit=1000, clock=None):
+        """
+        Args:
+            exchange: ccxt-style client with fetch_ohlcv (defaults to bot.trader's shared client)
+            root: Cache directory
+            limiter: bot.ratelimit.RateLimiter charged per page (defaults to bot.trader.LIMITER)
+            page_limit: Bars requested per fetch_ohlcv call
+            clock: Callable returning epoch seconds (decides which days are complete)
+        """
+        self.exchange = exchange
+        self.root = root
+        self.limiter = limiter
+        self.page_limit = page_limit
+        self.clock = clock
+        self.requests = 0  # fetch_ohlcv calls made, for reporting
+
+    def now(self):
+        return self.clock() if self.clock else dt.datetime.now(dt.timezone.utc).timestamp()
+
+    # ── Paths ──
+    def directory(self, symbol, timeframe):
+        return os.path.join(self.root, market_id(symbol), str(timeframe))
+
+    def day_path(self, symbol, timeframe, day_start, partial=False):
+        name = day_name(day_start) + (".partial" if partial else "") + ".npy"
+        return os.path.join(self.directory(symbol, timeframe), name)
+
+    def _stored(self, symbol, timeframe, day_start):
+        """(path, partial) of the file holding a day, or (None, None)."""
+        for partial in (False, True):
+            path = self.day_path(symbol, timeframe, day_start, partial)
+            if os.path.exists(path):
+                return path, partial
+        return None, None
+
+    # ── Network ──
+    def _client(self):
+        if self.exchange is None:
+            from bot import trader
+            self.exchange = trader.get_exchange()
+        return self.exchange
+
+    def _budget(self):
+        limiter = self.limiter
+        if limiter is None:
+            from bot import trader
+            limiter = trader.LIMITER
+        limiter.acquire()
+
+    def fetch(self, symbol, timeframe, since, until):
+        """Bars with since <= start < until, paged through fetch_ohlcv."""
+        step = timeframe_seconds(timeframe)
+        client = self._client()
+        pages = []
+        until = min(until, self.now())
+        while since < until:
+            self._budget()
+            rows = client.fetch_ohlcv(symbol, timeframe, since=int(since * 1000), limit=self.page_limit)
+            self.requests += 1
+            page = ohlcv_bars(rows) if rows else np.empty(0, dtype=BAR_DTYPE)
+            page = page[(page["start"] >= since) & (page["start"] < until)]
+            if len(page):
+                pages.append(page)
+                since = float(page["start"][-1]) + step
+            else:
+                # An empty page is a gap (before listing, an outage), not the end:
+                # skip the window it covered and keep going
+                since += self.page_limit * step
+        bars = np.concatenate(pages) if pages else np.empty(0, dtype=BAR_DTYPE)
+        # Pages can overlap at their edges; keep one bar per start
+        _, first = np.unique(bars["start"], return_index=True)
+        return bars[first]
+
+    # ── Backfill ──
+    def missing(self, symbol, timeframe, start, end):
+        """(day_start, fetch_from) for every day in [start, end) that is absent or partial."""
+        now = self.now()
+        step = timeframe_seconds(timeframe)
+        out = []
+        day = to_epoch(start) // DAY * DAY
+        end = min(to_epoch(end), now)
+        while day < end:
+            path, partial = self._stored(symbol, timeframe, day)
+            if path is None:
+                out.append((day, day))
+            elif partial:
+                out.append((day, first_missing(np.load(path, mmap_mode="r")["start"], day, step)))
+            day += DAY
+        return out
+
+    def complete(self, bars, timeframe, day):
+        """True when bars hold the day's final bucket and that bar has closed."""
+        step = timeframe_seconds(timeframe)
+        return bool(len(bars)) and bars["start"][-1] >= day + DAY - step and day + DAY <= self.now()
+
+    def backfill(self, symbol, timeframe="1m", start=None, end=None):
+        """Fetch and store whatever [start, end) is missing; returns the number of bars fetched."""
+        now = self.now()
+        start = to_epoch(start) if start is not None else now - DAY
+        end = to_epoch(end) if end is not None else now
+        fetched = 0
+        os.makedirs(self.directory(symbol, timeframe), exist_ok=True)
+        for day, since in self.missing(symbol, timeframe, start, end):
+            bars = self.fetch(symbol, timeframe, since, day + DAY)
+            fetched += len(bars)
+            old, _ = self._stored(symbol, timeframe, day)
+            if old is not None:
+                kept = np.load(old)
+                # Fetched bars replace stored ones; stored bars the fetch did not return stay
+                kept = kept[~np.isin(kept["start"], bars["start"])]
+                bars = np.concatenate([kept, bars])
+                bars = bars[np.argsort(bars["start"], kind="stable")]
+            complete = self.complete(bars, timeframe, day)
+            self._write(symbol, timeframe, day, bars, partial=not complete)
+            if old is not None and complete:
+                os.remove(old)  # the .partial file it replaces
+        return fetched
+
+    def _write(self, symbol, timeframe, day, bars, partial):
+        path = self.day_path(symbol, timeframe, day, partial)
+        tmp = path + ".tmp.npy"
+        np.save(tmp, bars)
+        os.replace(tmp, path)
+
+    # ── Reads ──
+    def read(self, symbol, timeframe="1m", start=None, end=None):
+        """Cached bars with start <= bar start < end; never touches the network."""
+        directory = self.directory(symbol, timeframe)
+        if not os.path.isdir(directory):
+            return np.empty(0, dtype=BAR_DTYPE)
+        start = to_epoch(start) if start is not None else -np.inf
+        end = to_epoch(end) if end is not None else np.inf
+        parts = []
+        seen = set()
+        # "<day>.npy" sorts before "<day>.partial.npy", so a completed day wins over a stale partial
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".npy") or ".tmp" in name:
+                continue
+            day_text = name.split(".")[0]
+            day = to_epoch(day_text)
+            if day_text in seen or day + DAY <= start or day >= end:
+                continue
+            seen.add(day_text)
+            bars = np.load(os.path.join(directory, name), mmap_mode="r")
+            lo, hi = np.searchsorted(bars["start"], (start, end))
+            parts.append(bars[lo:hi])
+        return np.concatenate(parts) if parts else np.empty(0, dtype=BAR_DTYPE)
+
+    def bars(self, symbol, timeframe="1m", start=None, end=None):
+        """Backfill the missing part of [start, end), then read it from the cache."""
+        now = self.now()
+        start = to_epoch(start) if start is not None else now - DAY
+        end = to_epoch(end) if end is not None else now
+        self.backfill(symbol, timeframe, start, end)
+        return self.read(symbol, timeframe, start, end)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill and read the local kline cache")
+    parser.add_argument("symbol")
+    parser.add_argument("--timeframe", default="1m")
+    parser.add_argument("--start", help="YYYY-MM-DD[THH:MM] UTC (default: 24h ago)")
+    parser.add_argument("--end", help="YYYY-MM-DD[THH:MM] UTC (default: now)")
+    parser.add_argument("--root", default=HISTORY_DIR)
+    parser.add_argument("--out", help="also write the bars to this .npy (python -m bot.backtest reads it)")
+    args = parser.parse_args()
+
+    cache = KlineCache(root=args.root)
+    bars = cache.bars(args.symbol, args.timeframe, args.start, args.end)
+    print(f"[INFO] {len(bars)} {args.timeframe} bars for {args.symbol} ({cache.requests} requests)")
+    if len(bars):
+        print(f"[INFO] {day_name(bars['start'][0])} .. {day_name(bars['start'][-1])}")
+    if args.out:
+        np.save(args.out, bars)
+        print(f"[INFO] Saved to {args.out}")
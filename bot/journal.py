@@ -0,0 +1,315 @@
+"""
+journal.py
+
+Append-only, columnar trade journal.
+
+Trades are buffered in memory and flushed in batches as fixed-size binary
+records (TRADE_DTYPE) into numbered segment files. Segments are plain
+record arrays, so reads are np.memmap views with no parsing at all.
+
+Usage:
+    python -m bot.journal migrate        # import data/trade_history.csv and logs/
+    python -m bot.journal show [-n 20]
+"""
+
+import argparse
+import ast
+import atexit
+import csv
+import glob
+import json
+import math
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+
+JOURNAL_DIR = os.path.join("data", "journal")
+SCHEMA_VERSION = 1
+
+TRADE_DTYPE = np.dtype([
+    ("timestamp", "<f8"),   # exit time, epoch seconds (NaN when unknown)
+    ("symbol", "S16"),
+    ("side", "S4"),         # buy / sell (legacy rows may say hold)
+    ("entry", "<f8"),
+    ("exit", "<f8"),
+    ("qty", "<f8"),
+    ("pnl", "<f8"),
+    ("confidence", "<f4"),
+    ("live", "i1"),
+    ("outcome", "i1"),      # 1 win, 0 loss, -1 unknown
+    ("order_id", "S40"),
+])
+
+_NAN = float("nan")
+
+
+def to_record(trade):
+    """Map a trade dict onto the journal schema (missing fields become NaN/empty)."""
+    pnl = trade.get("pnl")
+    pnl = _NAN if pnl is None else float(pnl)
+    outcome = trade.get("outcome")
+    if outcome is None:
+        won = trade.get("won")
+        outcome = (1 if pnl > 0 else 0) if not math.isnan(pnl) else (-1 if won is None else int(bool(won)))
+
+    def num(key):
+        value = trade.get(key)
+        return _NAN if value is None or value == "" else float(value)
+
+    return (
+        num("timestamp"),
+        str(trade.get("symbol") or "").encode()[:16],
+        str(trade.get("side") or "").encode()[:4],
+        num("entry"), num("exit"), num("qty"), pnl,
+        _NAN if trade.get("confidence") is None else float(trade["confidence"]),
+        1 if trade.get("live") else 0,
+        outcome,
+        str(trade.get("order_id") or "").encode()[:40],
+    )
+
+
+class TradeJournal:
+    def __init__(self, root=JOURNAL_DIR, flush_every=64, segment_records=100_000, flush_interval=5.0):
+        """
+        Args:
+            root: Directory holding the segment files
+            flush_every: Buffered trades that trigger a write
+            segment_records: Records per segment before rolling to a new file
+            flush_interval: Seconds a trade may sit in the buffer before it is written
+                            (None waits for flush_every / flush())
+        """
+        self.root = root
+        self.flush_every = flush_every
+        self.segment_records = segment_records
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.lock = threading.Lock()
+        self._timer = None
+        os.makedirs(root, exist_ok=True)
+        self._check_schema()
+        self._repair()
+
+    def _check_schema(self):
+        path = os.path.join(self.root, "schema.json")
+        schema = {"version": SCHEMA_VERSION, "dtype": TRADE_DTYPE.descr}
+        if os.path.exists(path):
+            with open(path) as f:
+                found = json.load(f)
+            if found.get("version") != SCHEMA_VERSION:
+                raise ValueError(f"Journal at {self.root} has schema version {found.get('version')}, "
+                                 f"expected {SCHEMA_VERSION}")
+            # Same version, other layout: reading it as TRADE_DTYPE would silently return garbage
+            if found.get("dtype") != json.loads(json.dumps(schema["dtype"])):
+                raise ValueError(f"Journal at {self.root} was written with a different record layout "
+                                 f"than TRADE_DTYPE; migrate it or bump SCHEMA_VERSION")
+        else:
+            with open(path, "w") as f:
+                json.dump(schema, f)
+
+    def _repair(self):
+        """Cut a torn record (a crash mid-write) off the end of each segment."""
+        for path in self.segments():
+            size = os.path.getsize(path)
+            extra = size % TRADE_DTYPE.itemsize
+            if extra:
+                print(f"[ERROR] Dropping {extra} bytes of a torn record at the end of {path}")
+                with open(path, "r+b") as f:
+                    f.truncate(size - extra)
+
+    # ── Writing ──
+    def append(self, trade):
+        with self.lock:
+            self.buffer.append(to_record(trade))
+            if len(self.buffer) >= self.flush_every:
+                self._flush()
+            elif self._timer is None and self.flush_interval is not None:
+                # Trades are rare: don't leave one unwritten until the next 63 arrive
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.buffer:
+            return
+        records = np.array(self.buffer, dtype=TRADE_DTYPE)
+        self.buffer = []
+        while len(records):
+            path, room = self._tail_segment()
+            chunk, records = records[:room], records[room:]
+            with open(path, "ab") as f:
+                f.write(chunk.tobytes())
+
+    def _tail_segment(self):
+        """Path of the segment to append to and how many records still fit."""
+        segments = self.segments()
+        if segments:
+            used = os.path.getsize(segments[-1]) // TRADE_DTYPE.itemsize
+            if used < self.segment_records:
+                return segments[-1], self.segment_records - used
+        path = os.path.join(self.root, f"trades-{len(segments) + 1:06d}.bin")
+        return path, self.segment_records
+
+    def close(self):
+        self.flush()
+
+    # ── Reading ──
+    def segments(self):
+        return sorted(glob.glob(os.path.join(self.root, "trades-*.bin")))
+
+    def maps(self):
+        """Read-only memory maps of every non-empty segment."""
+        out = []
+        for path in self.segments():
+            if os.path.getsize(path) >= TRADE_DTYPE.itemsize:
+                out.append(np.memmap(path, dtype=TRADE_DTYPE, mode="r"))
+        return out
+
+    def read(self, include_buffer=True):
+        """All records as one structured array (flushed segments + pending buffer)."""
+        parts = self.maps()
+        if include_buffer:
+            with self.lock:
+                if self.buffer:
+                    parts.append(np.array(self.buffer, dtype=TRADE_DTYPE))
+        if not parts:
+            return np.empty(0, dtype=TRADE_DTYPE)
+        return np.concatenate(parts)
+
+    def __len__(self):
+        flushed = sum(os.path.getsize(p) // TRADE_DTYPE.itemsize for p in self.segments())
+        return flushed + len(self.buffer)
+
+    def to_frame(self):
+        import pandas as pd
+
+        df = pd.DataFrame(self.read())
+        for col in ("symbol", "side", "order_id"):
+            df[col] = df[col].str.decode("utf-8")
+        return df
+
+
+# ── Shared instance used by bot.brain.save_trade ──
+_journal = None
+
+def get_journal():
+    global _journal
+    if _journal is None:
+        _journal = TradeJournal()
+        atexit.register(_journal.close)
+    return _journal
+
+
+# ── Migration of the legacy CSV and logs/ dumps ──
+def _epoch(value):
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(str(value)).timestamp()
+
+def _legacy_trade(row, outcome=None):
+    """Normalize the many historical trade shapes onto to_record() keys."""
+    live_order = row.get("live_order")
+    order_id = row.get("id") or (live_order.get("id") if isinstance(live_order, dict) else None)
+    won = row.get("won")
+    if isinstance(won, str):
+        won = {"True": True, "False": False}.get(won)
+    return {
+        "timestamp": _epoch(row.get("timestamp")),
+        "side": row.get("direction") or row.get("side"),
+        "entry": row.get("entry_price") or row.get("entry") or row.get("price"),
+        "exit": row.get("exit"),
+        "qty": row.get("amount") or row.get("qty"),
+        "pnl": row.get("pnl") if row.get("pnl") not in (None, "") else row.get("profit"),
+        "confidence": row.get("confidence") or None,
+        "live": isinstance(live_order, dict) or row.get("live") in (True, "True"),
+        "won": won if won is not None else outcome,
+        "order_id": order_id,
+    }
+
+def _legacy_csv_rows(path):
+    """
+    Rows of the old trade_history.csv as dicts.
+
+    Later rows carry a 4th, header-less column with the exchange order
+    (a dict repr) or "Failed"; it is returned as "live_order".
+    """
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        for values in reader:
+            row = dict(zip(header, values))
+            if len(values) > len(header):
+                extra = values[len(header)]
+                if extra.startswith("{"):
+                    try:
+                        extra = ast.literal_eval(extra)
+                    except (ValueError, SyntaxError):
+                        print(f"[ERROR] Unreadable order in {path}: {extra[:60]}")
+                row["live_order"] = extra
+            yield row
+
+def legacy_trades(csv_path=os.path.join("data", "trade_history.csv"), logs_dir="logs"):
+    """Yield normalized trade dicts from the old CSV and the logs/wins, logs/losses dumps."""
+    if os.path.exists(csv_path):
+        for row in _legacy_csv_rows(csv_path):
+            yield _legacy_trade(row)
+
+    for folder, outcome in (("wins", True), ("losses", False)):
+        for path in sorted(glob.glob(os.path.join(logs_dir, folder, "*"))):
+            if path.endswith(".csv"):
+                with open(path, newline="") as f:
+                    for row in csv.DictReader(f):
+                        yield _legacy_trade(row, outcome)
+            elif path.endswith(".txt"):
+                with open(path) as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            row = ast.literal_eval(line)
+                        except (ValueError, SyntaxError):
+                            print(f"[ERROR] Skipping unreadable line in {path}")
+                            continue
+                        yield _legacy_trade(row, outcome)
+
+def migrate(journal, csv_path=os.path.join("data", "trade_history.csv"), logs_dir="logs"):
+    count = 0
+    for trade in legacy_trades(csv_path, logs_dir):
+        journal.append(trade)
+        count += 1
+    journal.flush()
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trade journal tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("migrate", help="import the legacy CSV and logs/ trade dumps")
+    m.add_argument("--csv", default=os.path.join("data", "trade_history.csv"))
+    m.add_argument("--logs", default="logs")
+    m.add_argument("--root", default=JOURNAL_DIR)
+    m.add_argument("--force", action="store_true", help="import even if the journal is not empty")
+    s = sub.add_parser("show", help="print the last trades")
+    s.add_argument("-n", type=int, default=20)
+    s.add_argument("--root", default=JOURNAL_DIR)
+    args = parser.parse_args()
+
+    journal = TradeJournal(args.root)
+    if args.cmd == "migrate":
+        if len(journal) and not args.force:
+            raise SystemExit(f"[ERROR] {args.root} already holds {len(journal)} trades; use --force")
+        print(f"[INFO] Migrated {migrate(journal, args.csv, args.logs)} trades into {args.root}")
+    else:
+        print(journal.to_frame().tail(args.n).to_string())
@@ -0,0 +1,196 @@
+"""
+latency.py
+
+Hot-path latency histograms.
+
+LatencyHistogram is an HDR-style log-linear histogram over integer
+multiples of a resolution (1 us by default): values below 2**SUB_BITS
+units get one bucket each, above that every power of two is split into
+2**(SUB_BITS-1) equal buckets, so any recorded value is reported within
+~1% from 1 us to minutes in ~1.4k counters. record() is O(1); percentiles
+scan the counters.
+
+LatencyRecorder keeps one histogram per (stage, symbol), where stage is
+one of STAGES as timed by bot.engine, and exports snapshots as JSON.
+
+Usage:
+    python -m bot.latency data/latency.json    # print an exported snapshot
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+SUB_BITS = 7
+SUB = 1 << SUB_BITS
+HALF = SUB >> 1
+
+# Engine stages, in hot-path order:
+#   age       stream message arrival -> the tick reading that book (how old the data is)
+#   data      feed read (price + book)
+#   features  OHLCV bars + brain.mark (price history, FeatureEngine, mark to market)
+#   decide    brain.decide
+#   submit    decide returned -> order handed to the executor
+#   ack       executor submit -> exchange ack (our queueing + the exchange)
+#   rtt       create_order request alone (the exchange and the network)
+#   tick      tick start -> ack, for ticks that traded
+STAGES = ("age", "data", "features", "decide", "submit", "ack", "rtt", "tick")
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def _index(units):
+    if units < SUB:
+        return units
+    shift = units.bit_length() - SUB_BITS
+    return SUB + (shift - 1) * HALF + ((units >> shift) - HALF)
+
+def _value(index):
+    """Midpoint (in units) of the values that land in bucket index."""
+    if index < SUB:
+        return index
+    shift, offset = divmod(index - SUB, HALF)
+    shift += 1
+    return ((offset + HALF) << shift) + (1 << shift) // 2
+
+
+class LatencyHistogram:
+    def __init__(self, max_seconds=60.0, resolution=1e-6):
+        """
+        Args:
+            max_seconds: Largest trackable value; anything slower lands in the last bucket
+            resolution: Seconds per unit (1e-9 for sub-microsecond timings)
+        """
+        self.resolution = resolution
+        self.scale = 1.0 / resolution
+        self.size = _index(int(max_seconds * self.scale)) + 1
+        self.counts = [0] * self.size
+        self.reset()
+
+    def reset(self):
+        self.counts[:] = [0] * self.size
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds):
+        units = int(seconds * self.scale) if seconds > 0 else 0
+        self.counts[min(_index(units), self.size - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        if other.resolution != self.resolution:
+            raise ValueError("cannot merge histograms with different resolutions")
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        for attr, pick in (("min", min), ("max", max)):
+            mine, theirs = getattr(self, attr), getattr(other, attr)
+            setattr(self, attr, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentiles(self, qs=PERCENTILES):
+        """Seconds at each percentile in qs (ascending), from one pass over the counters."""
+        out = {}
+        if not self.count:
+            return {q: 0.0 for q in qs}
+        targets = iter(qs)
+        q = next(targets)
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            while q is not None and seen >= self.count * q / 100:
+                # Bucket midpoints can overshoot the true extremes
+                out[q] = min(max(_value(i) * self.resolution, self.min), self.max)
+                q = next(targets, None)
+            if q is None:
+                break
+        return out
+
+    def percentile(self, q):
+        return self.percentiles((q,))[q]
+
+    def summary(self):
+        """Milliseconds: count, mean, p50, p90, p99, p99.9, max."""
+        out = {"count": self.count, "mean": self.mean * 1000}
+        for q, value in self.percentiles().items():
+            out[f"p{q:g}"] = value * 1000
+        out["max"] = (self.max or 0.0) * 1000
+        return out
+
+
+class LatencyRecorder:
+    """Histograms per (stage, symbol); safe to record from several threads."""
+
+    def __init__(self, max_seconds=60.0):
+        self.max_seconds = max_seconds
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    def record(self, stage, symbol, seconds):
+        key = (stage, symbol)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = LatencyHistogram(self.max_seconds)
+            hist.record(seconds)
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        """
+        {"stages": {stage: {"all": summary, symbol: summary, ...}}} in ms.
+
+        "all" merges every symbol's histogram for that stage.
+        """
+        with self.lock:
+            items = sorted(self.histograms.items(),
+                           key=lambda kv: (STAGES.index(kv[0][0]) if kv[0][0] in STAGES else len(STAGES), kv[0]))
+            stages = {}
+            merged = {}
+            for (stage, symbol), hist in items:
+                stages.setdefault(stage, {})[symbol] = hist.summary()
+                merged.setdefault(stage, LatencyHistogram(self.max_seconds)).merge(hist)
+        for stage, hist in merged.items():
+            stages[stage] = {"all": hist.summary(), **stages[stage]}
+        return {"since": self.started, "taken": time.time(), "unit": "ms", "stages": stages}
+
+    def export(self, path):
+        """Write snapshot() as JSON, atomically replacing any previous file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f, indent=1)
+        os.replace(tmp, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print an exported latency snapshot")
+    parser.add_argument("path", nargs="?", default=os.path.join("data", "latency.json"))
+    args = parser.parse_args()
+
+    with open(args.path) as f:
+        snap = json.load(f)
+    print(f"{'stage':<9} {'symbol':<12} {'count':>8} {'mean':>9} {'p50':>9} {'p99':>9} {'max':>9}  (ms)")
+    for stage, symbols in snap["stages"].items():
+        for symbol, s in symbols.items():
+            print(f"{stage:<9} {symbol:<12} {s['count']:>8} {s['mean']:>9.3f} {s['p50']:>9.3f} "
+                  f"{s['p99']:>9.3f} {s['max']:>9.3f}")
@@ -0,0 +1,169 @@
+"""
+orderbook.py
+
+Incrementally maintained L2 order book.
+
+Levels live in a dict (price -> size) per side plus a sorted key list, so a
+snapshot or delta touches only the changed levels. Cumulative volume for
+each configured depth is adjusted on every change, which makes
+imbalance(), spread() and microprice() O(1) reads.
+"""
+
+from bisect import bisect_left
+
+
+class OrderBook:
+    # Rebuild the depth sums from the levels every N changes so that the
+    # incremental float additions cannot drift.
+    RESYNC_EVERY = 10000
+
+    def __init__(self, depths=(10,)):
+        """
+        Args:
+            depths: Depths (in levels) whose cumulative volume is kept cached
+        """
+        self.depths = tuple(sorted(set(depths)))
+        self.levels = {"bids": {}, "asks": {}}
+        # Sorted ascending; bids are stored negated so index 0 is always the best level
+        self.keys = {"bids": [], "asks": []}
+        self.sums = {"bids": dict.fromkeys(self.depths, 0.0), "asks": dict.fromkeys(self.depths, 0.0)}
+        self.changes = 0
+
+    # ── Updates ──
+    def apply_snapshot(self, bids, asks):
+        """Replace the book with [[price, size], ...] lists (strings or numbers)."""
+        for side, rows in (("bids", bids), ("asks", asks)):
+            levels = {float(p): float(s) for p, s in rows if float(s) > 0}
+            self.levels[side] = levels
+            self.keys[side] = sorted(-p for p in levels) if side == "bids" else sorted(levels)
+        self.resync()
+
+    def apply_delta(self, bids, asks):
+        """Apply [[price, size], ...] changes; size 0 removes the level."""
+        for price, size in bids:
+            self._set("bids", float(price), float(size))
+        for price, size in asks:
+            self._set("asks", float(price), float(size))
+        if self.changes >= self.RESYNC_EVERY:
+            self.resync()
+
+    def _set(self, side, price, size):
+        levels = self.levels[side]
+        keys = self.keys[side]
+        sums = self.sums[side]
+        key = -price if side == "bids" else price
+        old = levels.get(price)
+
+        if size <= 0:
+            if old is None:
+                return
+            rank = bisect_left(keys, key)
+            del keys[rank]
+            del levels[price]
+            for d in self.depths:
+                if rank < d:
+                    sums[d] -= old
+                    if len(keys) >= d:  # the next level slides into the window
+                        sums[d] += levels[self._price(side, keys[d - 1])]
+        elif old is None:
+            rank = bisect_left(keys, key)
+            keys.insert(rank, key)
+            levels[price] = size
+            for d in self.depths:
+                if rank < d:
+                    sums[d] += size
+                    if len(keys) > d:  # the old last level is pushed out
+                        sums[d] -= levels[self._price(side, keys[d])]
+        else:
+            levels[price] = size
+            rank = bisect_left(keys, key)
+            for d in self.depths:
+                if rank < d:
+                    sums[d] += size - old
+        self.changes += 1
+
+    @staticmethod
+    def _price(side, key):
+        return -key if side == "bids" else key
+
+    def resync(self):
+        """Recompute every cached depth sum from the levels."""
+        for side in ("bids", "asks"):
+            levels, keys = self.levels[side], self.keys[side]
+            for d in self.depths:
+                self.sums[side][d] = sum(levels[self._price(side, k)] for k in keys[:d])
+        self.changes = 0
+
+    def copy(self):
+        """Independent copy (levels and cached sums), e.g. to hand to another thread."""
+        book = OrderBook.__new__(OrderBook)
+        book.depths = self.depths
+        book.levels = {side: dict(levels) for side, levels in self.levels.items()}
+        book.keys = {side: list(keys) for side, keys in self.keys.items()}
+        book.sums = {side: dict(sums) for side, sums in self.sums.items()}
+        book.changes = self.changes
+        return book
+
+    # ── O(1) reads ──
+    def depth_volume(self, side, depth=10):
+        cached = self.sums[side].get(depth)
+        if cached is not None:
+            return cached
+        levels = self.levels[side]
+        return sum(levels[self._price(side, k)] for k in self.keys[side][:depth])
+
+    def imbalance(self, depth=10):
+        """(bid_vol - ask_vol) / (bid_vol + ask_vol) over the top depth levels."""
+        bid_vol = self.depth_volume("bids", depth)
+        ask_vol = self.depth_volume("asks", depth)
+        if bid_vol + ask_vol == 0:
+            return 0
+        return (bid_vol - ask_vol) / (bid_vol + ask_vol)
+
+    def best_bid(self):
+        keys = self.keys["bids"]
+        return -keys[0] if keys else None
+
+    def best_ask(self):
+        keys = self.keys["asks"]
+        return keys[0] if keys else None
+
+    def spread(self):
+        bid, ask = self.best_bid(), self.best_ask()
+        return ask - bid if bid is not None and ask is not None else None
+
+    def mid(self):
+        bid, ask = self.best_bid(), self.best_ask()
+        return (bid + ask) / 2 if bid is not None and ask is not None else None
+
+    def microprice(self):
+        """Top-of-book price weighted towards the side with less size."""
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        bid_size = self.levels["bids"][bid]
+        ask_size = self.levels["asks"][ask]
+        return (bid * ask_size + ask * bid_size) / (bid_size + ask_size)
+
+    # ── ccxt-shaped views ──
+    def top(self, side, limit=25):
+        levels = self.levels[side]
+        return [[self._price(side, k), levels[self._price(side, k)]] for k in self.keys[side][:limit]]
+
+    def to_dict(self, limit=25):
+        return {"bids": self.top("bids", limit), "asks": self.top("asks", limit)}
+
+    def get(self, key, default=None):
+        """Dict-style access so code written for ccxt order book dicts keeps working."""
+        if key in ("bids", "asks"):
+            return self.top(key)
+        return default
+
+
+def book_levels(book, side, depth=25):
+    """Top depth [price, size] rows from an OrderBook or a ccxt order book dict."""
+    if book is None:
+        return []
+    if hasattr(book, "top"):
+        return book.top(side, depth)
+    return [row[:2] for row in (book.get(side) or [])[:depth]]
@@ -0,0 +1,552 @@
+"""
+orders.py
+
+Append-only, indexed order-event log.
+
+Every order the engine sends (LIVE or paper) becomes one fixed-size
+ORDER_DTYPE record. Records are queued by append() and written in batches
+by a background thread into numbered segment files, so the trading loop
+never waits on the disk. index.json keeps, per segment, the record count
+and time range. Once a segment is full, its order ids are written sorted
+(with their rows) to a .ids.npy file next to it and named in its index
+entry, so an id lookup binary-searches those files and only scans the
+segment still being written. Queries memory-map only the segments whose
+time range overlaps the window and binary-search inside them.
+
+Replaces the one-text-file-per-order dumps under logs/ (import them once
+with the importer below).
+
+Usage:
+    python -m bot.orders import                      # logs/all, logs/wins, logs/losses
+    python -m bot.orders show --start 2026-01-01 --end 2026-01-02 [--side buy] [--outcome loss]
+    python -m bot.orders show --id 39ae9b04-38ee-47b8-ad40-ea92b2cce937
+"""
+
+import argparse
+import ast
+import atexit
+import csv
+import glob
+import json
+import math
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+ORDERS_DIR = os.path.join("data", "orders")
+INDEX_VERSION = 1
+
+ORDER_DTYPE = np.dtype([
+    ("timestamp", "<f8"),   # ack (or failure) time, epoch seconds
+    ("symbol", "S16"),
+    ("order_id", "S40"),
+    ("side", "S4"),         # buy / sell
+    ("reduce_only", "i1"),  # 1 for orders closing a position
+    ("qty", "<f8"),
+    ("price", "<f8"),       # reference price at submit
+    ("fill", "<f8"),        # average fill (NaN when unknown)
+    ("status", "S8"),       # ok / error / imported exchange status
+    ("outcome", "i1"),      # closing orders: 1 win, 0 loss; -1 otherwise
+    ("pnl", "<f8"),         # PnL of the trade a closing order ended (NaN otherwise)
+    ("latency", "<f4"),     # submit -> ack, seconds (NaN when unknown)
+    ("live", "i1"),
+    ("error", "S80"),
+])
+
+# Sorted order ids of one full segment and the row each one is at
+ID_DTYPE = np.dtype([("order_id", "S40"), ("row", "<i8")])
+
+OUTCOMES = {"win": 1, "loss": 0, "unknown": -1}
+
+_NAN = float("nan")
+
+
+def _num(value):
+    return _NAN if value is None or value == "" else float(value)
+
+def _text(value, size):
+    return str(value or "").encode()[:size]
+
+
+def order_event(result, live=False, timestamp=None, trade=None):
+    """
+    Event dict for one bot.execution.Executor result.
+
+    trade is the brain.apply() trade a closing order ended, which gives the
+    event its outcome and PnL.
+    """
+    order = result.get("order") or {}
+    event = {
+        "timestamp": time.time() if timestamp is None else timestamp,
+        "symbol": result.get("symbol"),
+        "order_id": order.get("id"),
+        "side": result.get("side"),
+        "reduce_only": result.get("reduce_only"),
+        "qty": result.get("qty"),
+        "price": result.get("price"),
+        "fill": order.get("average") or order.get("price"),
+        "status": "error" if result.get("error") else "ok",
+        "latency": result.get("latency"),
+        "live": live,
+        "error": result.get("error"),
+    }
+    if trade is not None:
+        event["pnl"] = trade.get("pnl")
+    return event
+
+
+def to_record(event):
+    """Map an order event dict onto ORDER_DTYPE (missing fields become NaN/empty)."""
+    pnl = _num(event.get("pnl"))
+    outcome = event.get("outcome")
+    if outcome is None:
+        outcome = -1 if math.isnan(pnl) else int(pnl > 0)
+    return (
+        _num(event.get("timestamp")),
+        _text(event.get("symbol"), 16),
+        _text(event.get("order_id"), 40),
+        _text(event.get("side"), 4),
+        1 if event.get("reduce_only") else 0,
+        _num(event.get("qty")), _num(event.get("price")), _num(event.get("fill")),
+        _text(event.get("status"), 8),
+        outcome, pnl,
+        _num(event.get("latency")),
+        1 if event.get("live") else 0,
+        _text(event.get("error"), 80),
+    )
+
+
+class OrderLog:
+    def __init__(self, root=ORDERS_DIR, segment_records=100_000, batch=256, flush_interval=0.5):
+        """
+        Args:
+            root: Directory holding the segments and index.json
+            segment_records: Records per segment before rolling to a new file
+            batch: Queued events the writer takes per write
+            flush_interval: Longest time (seconds) an event waits in the queue
+        """
+        self.root = root
+        self.segment_records = segment_records
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self.pending = queue.SimpleQueue()
+        self.lock = threading.Lock()  # guards the index (writer thread vs queries)
+        self.ids = None  # order_id -> (segment, row) of the tail segment, built on first lookup
+        self.id_files = {}  # segment -> memory map of its .ids.npy
+        self.writer = None
+        os.makedirs(root, exist_ok=True)
+        self.index = self._load_index()
+
+    # ── Index ──
+    def _index_path(self):
+        return os.path.join(self.root, "index.json")
+
+    def _load_index(self):
+        """
+        index.json, reconciled with the segment files on disk.
+
+        A crash can leave a torn record at the end of a segment (cut off
+        here) or records written after the last index save (re-summarized),
+        so the index is never trusted past what the files hold.
+        """
+        path = self._index_path()
+        known = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                index = json.load(f)
+            if index.get("version") != INDEX_VERSION:
+                raise ValueError(f"Order log at {self.root} has index version {index.get('version')}, "
+                                 f"expected {INDEX_VERSION}")
+            known = {s["name"]: s for s in index["segments"]}
+        # Without an index (first run, or it was lost) every segment is summarized from its file
+        index = {"version": INDEX_VERSION, "dtype": ORDER_DTYPE.descr, "segments": []}
+        changed = not os.path.exists(path)
+        for path in sorted(glob.glob(os.path.join(self.root, "orders-*.bin"))):
+            name = os.path.basename(path)
+            size = os.path.getsize(path)
+            count, torn = divmod(size, ORDER_DTYPE.itemsize)
+            if torn:
+                print(f"[ERROR] Dropping {torn} bytes of a torn record at the end of {path}")
+                with open(path, "r+b") as f:
+                    f.truncate(size - torn)
+            meta = known.get(name)
+            if meta is None or meta["count"] != count:
+                meta = self._summary(name, np.fromfile(path, dtype=ORDER_DTYPE, count=count))
+                changed = True
+            index["segments"].append(meta)
+        # Every segment but the tail is full and gets an id file (a new index, or one from before them)
+        for meta in index["segments"][:-1]:
+            if not meta.get("ids") or not os.path.exists(os.path.join(self.root, meta["ids"])):
+                meta["ids"] = self._write_ids(meta)
+                changed = True
+        if changed and index["segments"]:
+            self._save_index(index)
+        return index
+
+    def _write_ids(self, meta):
+        """Write the sorted id file of a full segment; returns its file name."""
+        records = np.fromfile(os.path.join(self.root, meta["name"]), dtype=ORDER_DTYPE, count=meta["count"])
+        ids = records["order_id"]
+        rows = np.flatnonzero(ids != b"")
+        out = np.empty(len(rows), dtype=ID_DTYPE)
+        out["order_id"] = ids[rows]
+        out["row"] = rows
+        out = out[np.argsort(out["order_id"], kind="stable")]  # equal ids keep log order
+        name = meta["name"].replace(".bin", ".ids.npy")
+        tmp = os.path.join(self.root, name + ".tmp.npy")
+        np.save(tmp, out)
+        os.replace(tmp, os.path.join(self.root, name))
+        return name
+
+    @staticmethod
+    def _summary(name, records):
+        ts = records["timestamp"]
+        known = ts[~np.isnan(ts)]
+        return {"name": name, "count": len(records),
+                "first": float(known.min()) if len(known) else None,
+                "last": float(known.max()) if len(known) else None,
+                "sorted": bool(len(known) == len(ts) and np.all(np.diff(ts) >= 0))}
+
+    def _save_index(self, index=None):
+        tmp = self._index_path() + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.index if index is None else index, f)
+        os.replace(tmp, self._index_path())
+
+    # ── Writing (any thread; the disk is only touched by the writer thread) ──
+    def append(self, event):
+        if self.writer is None:
+            self._start_writer()
+        self.pending.put(to_record(event))
+
+    def extend(self, events):
+        for event in events:
+            self.append(event)
+
+    def _start_writer(self):
+        with self.lock:
+            if self.writer is None:
+                self.writer = threading.Thread(target=self._run, daemon=True)
+                self.writer.start()
+
+    def _run(self):
+        while True:
+            try:
+                item = self.pending.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            records, markers = [], []
+            while True:
+                if item is None or isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    records.append(item)
+                if len(records) >= self.batch:
+                    break
+                try:
+                    item = self.pending.get_nowait()
+                except queue.Empty:
+                    break
+            if records:
+                try:
+                    self._write(np.array(records, dtype=ORDER_DTYPE))
+                except Exception as e:
+                    # Keep the writer alive: without it every later flush() waits out its timeout
+                    print(f"[ERROR] Order log write: {e}")
+            for marker in markers:
+                if marker is None:
+                    return
+                marker.set()
+
+    def _write(self, records):
+        while len(records):
+            full = None
+            with self.lock:
+                segments = self.index["segments"]
+                if not segments or segments[-1]["count"] >= self.segment_records:
+                    full = segments[-1] if segments else None
+                    segments.append(self._summary(f"orders-{len(segments) + 1:06d}.bin", records[:0]))
+                    if self.ids is not None:
+                        self.ids = {}  # the old tail's ids are served by its id file from now on
+                tail = segments[-1]
+            if full is not None:
+                ids = self._write_ids(full)
+                with self.lock:
+                    full["ids"] = ids
+            room = self.segment_records - tail["count"]
+            chunk, records = records[:room], records[room:]
+            with open(os.path.join(self.root, tail["name"]), "ab") as f:
+                f.write(chunk.tobytes())
+            self._extend_summary(len(segments) - 1, tail, chunk)
+
+    def _extend_summary(self, seg, tail, chunk):
+        ts = chunk["timestamp"]
+        known = ts[~np.isnan(ts)]
+        with self.lock:
+            start = tail["count"]
+            in_order = len(known) == len(ts) and np.all(np.diff(ts) >= 0)
+            if tail["last"] is not None and len(ts) and not ts[0] >= tail["last"]:
+                in_order = False
+            tail["sorted"] = bool(tail["sorted"] and in_order)
+            if len(known):
+                lo, hi = float(known.min()), float(known.max())
+                tail["first"] = lo if tail["first"] is None else min(tail["first"], lo)
+                tail["last"] = hi if tail["last"] is None else max(tail["last"], hi)
+            tail["count"] = start + len(chunk)
+            if self.ids is not None:
+                for row, order_id in enumerate(chunk["order_id"].tolist(), start):
+                    if order_id:
+                        self.ids[order_id] = (seg, row)
+            self._save_index()
+
+    def flush(self, timeout=10):
+        """Block until everything appended so far is on disk."""
+        if self.writer is None:
+            return
+        done = threading.Event()
+        self.pending.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout=10):
+        if self.writer is not None and self.writer.is_alive():
+            self.pending.put(None)
+            self.writer.join(timeout)
+
+    # ── Reading ──
+    def _map(self, seg):
+        """Read-only memory map of segment seg, limited to the records the index knows about."""
+        meta = self.index["segments"][seg]
+        if not meta["count"]:
+            return np.empty(0, dtype=ORDER_DTYPE)
+        return np.memmap(os.path.join(self.root, meta["name"]), dtype=ORDER_DTYPE, mode="r",
+                         shape=(meta["count"],))
+
+    def __len__(self):
+        with self.lock:
+            return sum(s["count"] for s in self.index["segments"])
+
+    def get(self, order_id):
+        """The record of one order id (the latest, if it was logged twice), or None."""
+        key = order_id.encode() if isinstance(order_id, str) else order_id
+        with self.lock:
+            segments = self.index["segments"]
+            if not segments:
+                return None
+            tail = len(segments) - 1
+            if self.ids is None:
+                self.ids = {}
+                for row, found in enumerate(self._map(tail)["order_id"].tolist()):
+                    if found:
+                        self.ids[found] = (tail, row)
+            hit = self.ids.get(key)
+            if hit is not None:
+                return np.array(self._map(hit[0])[hit[1]])
+            # Newest full segment first, so a re-logged id returns its latest record
+            for seg in range(tail - 1, -1, -1):
+                row = self._find(seg, key)
+                if row is not None:
+                    return np.array(self._map(seg)[row])
+            return None
+
+    def _find(self, seg, key):
+        """Row of the last record with order id key in full segment seg, or None."""
+        name = self.index["segments"][seg].get("ids")
+        if not name:
+            # Its id file is still being written: scan the segment instead
+            rows = np.flatnonzero(self._map(seg)["order_id"] == key)
+            return int(rows[-1]) if len(rows) else None
+        ids = self.id_files.get(seg)
+        if ids is None:
+            ids = self.id_files[seg] = np.load(os.path.join(self.root, name), mmap_mode="r")
+        i = int(np.searchsorted(ids["order_id"], key, side="right")) - 1
+        if i < 0 or ids["order_id"][i] != key:
+            return None
+        return int(ids["row"][i])
+
+    def query(self, start=None, end=None, side=None, outcome=None, symbol=None, order_id=None):
+        """
+        Records matching every given filter, in log order.
+
+        Args:
+            start, end: Time window [start, end) in epoch seconds
+            side: "buy" / "sell"
+            outcome: "win" / "loss" / "unknown" (or 1 / 0 / -1)
+            symbol: Market symbol
+            order_id: Exact order id (served from the id index)
+        """
+        if order_id is not None:
+            hit = self.get(order_id)
+            parts = [] if hit is None else [hit.reshape(1)]
+        else:
+            lo = -np.inf if start is None else start
+            hi = np.inf if end is None else end
+            windowed = start is not None or end is not None
+            with self.lock:
+                segments = [(i, dict(s)) for i, s in enumerate(self.index["segments"])]
+            parts = []
+            for i, meta in segments:
+                if not meta["count"]:
+                    continue
+                if not windowed:
+                    parts.append(self._map(i))
+                    continue
+                # Records without a timestamp (NaN) never match a time window
+                if meta["first"] is None or meta["last"] < lo or meta["first"] >= hi:
+                    continue
+                records = self._map(i)
+                if meta["sorted"]:
+                    a, b = np.searchsorted(records["timestamp"], (lo, hi))
+                    parts.append(records[a:b])
+                else:
+                    ts = records["timestamp"]
+                    parts.append(records[(ts >= lo) & (ts < hi)])
+        out = np.concatenate(parts) if parts else np.empty(0, dtype=ORDER_DTYPE)
+
+        mask = np.ones(len(out), dtype=bool)
+        if side is not None:
+            mask &= out["side"] == side.encode()
+        if outcome is not None:
+            mask &= out["outcome"] == OUTCOMES.get(outcome, outcome)
+        if symbol is not None:
+            mask &= out["symbol"] == symbol.encode()
+        if start is not None and order_id is not None:
+            mask &= out["timestamp"] >= start
+        if end is not None and order_id is not None:
+            mask &= out["timestamp"] < end
+        return out if mask.all() else out[mask]
+
+    def to_frame(self, records=None):
+        import pandas as pd
+
+        df = pd.DataFrame(self.query() if records is None else records)
+        for col in ("symbol", "order_id", "side", "status", "error"):
+            df[col] = df[col].str.decode("utf-8")
+        return df
+
+
+# ── Shared instance used by bot.engine ──
+_order_log = None
+
+def get_order_log():
+    global _order_log
+    if _order_log is None:
+        _order_log = OrderLog()
+        atexit.register(_order_log.close)
+    return _order_log
+
+
+# ── Import of the legacy logs/ order dumps ──
+def _epoch(value):
+    if value in (None, ""):
+        return None
+    try:
+        value = float(value)
+        return value / 1000 if value > 1e11 else value  # ccxt timestamps are ms
+    except ValueError:
+        return datetime.fromisoformat(str(value)).timestamp()
+
+def _read_rows(path):
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            return list(csv.DictReader(f))
+    rows = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(ast.literal_eval(line))
+            except (ValueError, SyntaxError):
+                print(f"[ERROR] Skipping unreadable line in {path}")
+    return rows
+
+def legacy_orders(logs_dir="logs"):
+    """
+    Order events from logs/all/<id>.txt (ccxt order reprs) merged with the
+    per-order copies in logs/wins and logs/losses, which give the outcome.
+
+    The trades.txt / unknown.txt files in wins/losses carry no order id;
+    they are trades, imported by python -m bot.journal migrate.
+    """
+    events = {}
+    for path in sorted(glob.glob(os.path.join(logs_dir, "all", "*.txt"))):
+        for order in _read_rows(path):
+            order_id = order.get("id") or os.path.splitext(os.path.basename(path))[0]
+            events[order_id] = {
+                "timestamp": _epoch(order.get("timestamp")),  # None (NaN): unknown, not the file's mtime
+                "symbol": order.get("symbol"),
+                "order_id": order_id,
+                "side": order.get("side"),
+                "reduce_only": order.get("reduceOnly"),
+                "qty": order.get("amount"),
+                "price": order.get("price"),
+                "fill": order.get("average"),
+                "status": order.get("status") or "ok",
+                "live": True,
+            }
+
+    for folder, outcome in (("wins", 1), ("losses", 0)):
+        for path in sorted(glob.glob(os.path.join(logs_dir, folder, "*"))):
+            name = os.path.splitext(os.path.basename(path))[0]
+            if name in ("trades", "unknown"):
+                continue
+            for row in _read_rows(path):
+                order_id = row.get("id") or name
+                event = events.setdefault(order_id, {
+                    "order_id": order_id, "status": "ok", "timestamp": None, "live": True,
+                })
+                event["outcome"] = outcome
+                event["side"] = event.get("side") or row.get("side") or row.get("direction")
+                event["qty"] = event.get("qty") or row.get("amount")
+                event["price"] = event.get("price") or row.get("price") or row.get("entry_price")
+                if row.get("profit") not in (None, ""):
+                    event["pnl"] = row["profit"]
+                stamp = _epoch(row.get("timestamp"))
+                if stamp is not None:
+                    event["timestamp"] = stamp
+    # Undated orders go last; they are kept, but time-window queries skip them
+    return sorted(events.values(), key=lambda e: (e["timestamp"] is None, e["timestamp"] or 0.0))
+
+def import_logs(log, logs_dir="logs"):
+    events = legacy_orders(logs_dir)
+    log.extend(events)
+    log.flush()
+    return len(events)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Order log tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    i = sub.add_parser("import", help="import the legacy logs/ order dumps")
+    i.add_argument("--logs", default="logs")
+    i.add_argument("--root", default=ORDERS_DIR)
+    i.add_argument("--force", action="store_true", help="import even if the log is not empty")
+    s = sub.add_parser("show", help="query the log")
+    s.add_argument("--root", default=ORDERS_DIR)
+    s.add_argument("--start", help="YYYY-MM-DD[THH:MM] (local time)")
+    s.add_argument("--end", help="YYYY-MM-DD[THH:MM] (local time)")
+    s.add_argument("--side", choices=("buy", "sell"))
+    s.add_argument("--outcome", choices=tuple(OUTCOMES))
+    s.add_argument("--symbol")
+    s.add_argument("--id")
+    s.add_argument("-n", type=int, default=50)
+    args = parser.parse_args()
+
+    log = OrderLog(args.root)
+    if args.cmd == "import":
+        if len(log) and not args.force:
+            raise SystemExit(f"[ERROR] {args.root} already holds {len(log)} orders; use --force")
+        print(f"[INFO] Imported {import_logs(log, args.logs)} orders into {args.root}")
+        log.close()
+    else:
+        t0 = time.perf_counter()
+        records = log.query(_epoch(args.start), _epoch(args.end), args.side, args.outcome,
+                            args.symbol, args.id)
+        elapsed = time.perf_counter() - t0
+        print(log.to_frame(records).tail(args.n).to_string())
+        print(f"[INFO] {len(records)} orders in {elapsed * 1000:.1f} ms")
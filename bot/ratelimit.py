@@ -0,0 +1,46 @@
+"""
+ratelimit.py
+
+Token-bucket request budget shared by every symbol session in a process.
+
+reserve() books the tokens immediately and returns how long the caller has
+to wait before sending, so the same bucket serves blocking callers
+(acquire) and asyncio callers (acquire_async) without a background thread.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    def __init__(self, rate=10.0, burst=10):
+        """
+        Args:
+            rate: Requests per second refilled into the bucket
+            burst: Bucket size (requests allowed back to back)
+        """
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, cost=1):
+        """Take cost tokens now; returns seconds to wait before using them."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= cost
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self, cost=1):
+        delay = self.reserve(cost)
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self, cost=1):
+        delay = self.reserve(cost)
+        if delay:
+            await asyncio.sleep(delay)
@@ -0,0 +1,78 @@
+"""
+ringbuffer.py
+
+Fixed-capacity, NumPy-backed price/time history.
+
+Every value is written twice (at slot i and slot i + capacity), so the
+most recent n samples always sit in one contiguous run of memory and
+window reads are zero-copy views no matter where the head is.
+"""
+
+import time
+import numpy as np
+
+
+class PriceBuffer:
+    def __init__(self, capacity=5000):
+        """
+        Args:
+            capacity: Maximum number of samples retained; older ones are overwritten
+        """
+        self.capacity = int(capacity)
+        self._prices = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._times = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._head = 0  # slot the next sample is written to
+        self._count = 0
+
+    # ── Writing ──
+    def append(self, price, ts=None):
+        """Push one sample, evicting the oldest once full."""
+        i = self._head
+        ts = time.time() if ts is None else ts
+        self._prices[i] = self._prices[i + self.capacity] = price
+        self._times[i] = self._times[i + self.capacity] = ts
+        self._head = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def extend(self, prices, times=None):
+        for i, price in enumerate(prices):
+            self.append(price, None if times is None else times[i])
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+    # ── Zero-copy windows ──
+    def window(self, n=None):
+        """
+        View of the last n prices, oldest first.
+
+        The view shares memory with the buffer and is overwritten by later
+        appends; copy it if it has to outlive the next tick.
+        """
+        n = self._count if n is None else min(n, self._count)
+        end = self._head + self.capacity
+        return self._prices[end - n:end]
+
+    def times(self, n=None):
+        """View of the last n timestamps, aligned with window(n)."""
+        n = self._count if n is None else min(n, self._count)
+        end = self._head + self.capacity
+        return self._times[end - n:end]
+
+    def last(self):
+        return self._prices[self._head + self.capacity - 1] if self._count else 0
+
+    # ── Sequence protocol (lets bot.features take a buffer like a list) ──
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, key):
+        return self.window()[key]
+
+    def __iter__(self):
+        return iter(self.window())
+
+    def tolist(self):
+        return self.window().tolist()
@@ -0,0 +1,283 @@
+"""
+simulator.py
+
+In-process exchange simulator for paper trading, load tests and CI.
+
+SimExchange implements the slice of the ccxt client that bot.trader and
+bot.execution use (balance, leverage, tickers, order books, market orders,
+positions) against local quotes: either pushed in with update() (the
+engine does this every tick) or read from any feed with get_price/book
+(MarketStream, StreamFeed, bot.capture.ReplaySource).
+
+Market orders walk the opposite side of the book level by level, pay an
+extra slippage on the average price and a taker fee on the notional.
+Positions are netted per symbol with isolated-style margin, and realized
+PnL and fees settle into the USDT wallet. No network, no threads; a few
+thousand orders per second is easy.
+
+Usage:
+    sim = SimExchange(balance=1000)
+    trader.use_exchange(sim)                                  # sync bot.trader surface
+    Executor(exchange=AsyncSimExchange(sim), price_source=sim.last_price, limiter=UNLIMITED)
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+
+from bot.orderbook import book_levels
+from bot.ratelimit import RateLimiter
+
+# Bybit linear taker fee
+TAKER_FEE = 0.00055
+
+# Budget for simulated orders, which never touch the real API
+UNLIMITED = RateLimiter(rate=1e9, burst=1e9)
+
+
+class SimError(Exception):
+    pass
+
+class InsufficientFunds(SimError):
+    pass
+
+class InvalidOrder(SimError):
+    pass
+
+
+def _market_id(symbol):
+    return symbol.replace("/", "").split(":")[0]
+
+
+class SimExchange:
+    def __init__(self, balance=1000.0, market=None, taker_fee=TAKER_FEE, slippage_bps=1.0,
+                 default_leverage=10, depth=50, orders_kept=1000):
+        """
+        Args:
+            balance: Starting USDT wallet balance
+            market: Optional feed (get_price/book) used when no quote was pushed
+            taker_fee: Fee rate charged on every fill's notional
+            slippage_bps: Extra adverse slippage on the book-walk average price
+            default_leverage: Leverage for symbols never set explicitly
+            depth: Book levels walked per fill
+            orders_kept: Recent orders retained for fetch_order()
+        """
+        self.wallet = float(balance)
+        self.market = market
+        self.taker_fee = taker_fee
+        self.slippage = slippage_bps / 10_000
+        self.default_leverage = default_leverage
+        self.depth = depth
+
+        self.quotes = {}     # symbol -> (price, book)
+        self.leverage = {}   # market id -> leverage
+        self.positions = {}  # symbol -> {"qty": signed size, "entry": average price}
+        self.orders = deque(maxlen=orders_kept)
+        self.fees_paid = 0.0
+        self.ids = itertools.count(1)
+        self.lock = threading.RLock()
+
+    # ── Market data ──
+    def update(self, symbol, price, book=None):
+        """Push the latest quote for symbol (what the bot just saw)."""
+        self.quotes[symbol] = (price, book)
+
+    def quote(self, symbol):
+        quote = self.quotes.get(symbol)
+        if quote is not None:
+            return quote
+        if self.market is not None:
+            return self.market.get_price(symbol), self.market.book(symbol)
+        return None, None
+
+    def last_price(self, symbol):
+        return self.quote(symbol)[0]
+
+    def load_markets(self, reload=False):
+        return {}
+
+    def fetch_ticker(self, symbol):
+        price, book = self.quote(symbol)
+        if not price:
+            raise SimError(f"no quote for {symbol}")
+        bids, asks = book_levels(book, "bids", 1), book_levels(book, "asks", 1)
+        return {"symbol": symbol, "last": price, "bid": bids[0][0] if bids else None,
+                "ask": asks[0][0] if asks else None, "timestamp": int(time.time() * 1000)}
+
+    def fetch_order_book(self, symbol, limit=25):
+        _, book = self.quote(symbol)
+        return {"symbol": symbol, "bids": book_levels(book, "bids", limit),
+                "asks": book_levels(book, "asks", limit), "timestamp": int(time.time() * 1000)}
+
+    # ── Account ──
+    def set_leverage(self, leverage, symbol=None, params=None):
+        self.leverage[_market_id(symbol)] = leverage
+        return {"symbol": symbol, "leverage": leverage}
+
+    def private_post_position_leverage_save(self, params):
+        self.leverage[_market_id(params["symbol"])] = float(params["buy_leverage"])
+        return {"retCode": 0}
+
+    def leverage_for(self, symbol):
+        return self.leverage.get(_market_id(symbol), self.default_leverage)
+
+    def unrealized_pnl(self, symbol):
+        position = self.positions.get(symbol)
+        price = self.last_price(symbol)
+        if not position or not price:
+            return 0.0
+        return position["qty"] * (price - position["entry"])
+
+    def used_margin(self):
+        return sum(abs(p["qty"]) * p["entry"] / self.leverage_for(s) for s, p in self.positions.items())
+
+    def equity(self):
+        return self.wallet + sum(self.unrealized_pnl(s) for s in self.positions)
+
+    def fetch_balance(self, params=None):
+        with self.lock:
+            equity, used = self.equity(), self.used_margin()
+        free = equity - used
+        return {"USDT": {"free": free, "used": used, "total": equity},
+                "free": {"USDT": free}, "used": {"USDT": used}, "total": {"USDT": equity}}
+
+    def fetch_positions(self, symbols=None, params=None):
+        out = []
+        with self.lock:
+            for symbol, position in self.positions.items():
+                if symbols and symbol not in symbols:
+                    continue
+                qty = position["qty"]
+                out.append({
+                    "symbol": symbol, "side": "long" if qty > 0 else "short", "contracts": abs(qty),
+                    "entryPrice": position["entry"], "markPrice": self.last_price(symbol),
+                    "unrealizedPnl": self.unrealized_pnl(symbol), "leverage": self.leverage_for(symbol),
+                })
+        return out
+
+    # ── Orders ──
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        """Fill a market order immediately; returns a ccxt-shaped order dict."""
+        if type != "market":
+            raise InvalidOrder(f"simulator only supports market orders, got {type}")
+        if side not in ("buy", "sell"):
+            raise InvalidOrder(f"bad side {side}")
+        amount = float(amount)
+        if amount <= 0:
+            raise InvalidOrder(f"bad amount {amount}")
+        reduce_only = bool((params or {}).get("reduceOnly"))
+
+        with self.lock:
+            held = self.positions.get(symbol, {}).get("qty", 0.0)
+            signed = amount if side == "buy" else -amount
+            if reduce_only:
+                if held == 0 or (held > 0) == (signed > 0):
+                    raise InvalidOrder(f"reduce-only {side} would not reduce the {symbol} position")
+                amount = min(amount, abs(held))
+                signed = amount if side == "buy" else -amount
+
+            average = self._walk(symbol, side, amount)
+            notional = amount * average
+            fee = notional * self.taker_fee
+
+            # Only the part that opens or extends exposure needs margin
+            opening = amount if held == 0 or (held > 0) == (signed > 0) else max(0.0, amount - abs(held))
+            if opening:
+                required = opening * average / self.leverage_for(symbol) + fee
+                free = self.equity() - self.used_margin()
+                if required > free:
+                    raise InsufficientFunds(f"need {required:.4f} USDT margin, {free:.4f} free")
+
+            realized = self._settle(symbol, held, signed, average)
+            self.wallet += realized - fee
+            self.fees_paid += fee
+
+            order = {
+                "id": f"sim-{next(self.ids)}", "symbol": symbol, "type": "market", "side": side,
+                "amount": amount, "filled": amount, "remaining": 0.0, "price": average,
+                "average": average, "cost": notional, "status": "closed",
+                "fee": {"cost": fee, "currency": "USDT"}, "reduceOnly": reduce_only,
+                "realizedPnl": realized, "timestamp": int(time.time() * 1000),
+            }
+            self.orders.append(order)
+        return order
+
+    def fetch_order(self, id, symbol=None, params=None):
+        for order in reversed(self.orders):
+            if order["id"] == id:
+                return order
+        raise InvalidOrder(f"unknown order {id}")
+
+    def _walk(self, symbol, side, amount):
+        """Average fill price for amount taken from the book, plus slippage."""
+        price, book = self.quote(symbol)
+        levels = book_levels(book, "asks" if side == "buy" else "bids", self.depth)
+        remaining, cost = amount, 0.0
+        for level_price, size in levels:
+            take = min(remaining, size)
+            cost += take * level_price
+            remaining -= take
+            if remaining <= 0:
+                break
+        if remaining > 0:
+            # Book exhausted (or missing): the rest fills at the last level / last price
+            last = levels[-1][0] if levels else price
+            if not last:
+                raise SimError(f"no quote for {symbol}")
+            cost += remaining * last
+        average = cost / amount
+        return average * (1 + self.slippage) if side == "buy" else average * (1 - self.slippage)
+
+    def _settle(self, symbol, held, signed, price):
+        """Net the fill into the position; returns realized PnL."""
+        realized = 0.0
+        if held == 0 or (held > 0) == (signed > 0):
+            entry = self.positions.get(symbol, {}).get("entry", 0.0)
+            qty = held + signed
+            entry = (abs(held) * entry + abs(signed) * price) / abs(qty)
+        else:
+            entry = self.positions[symbol]["entry"]
+            closed = min(abs(held), abs(signed))
+            realized = closed * (price - entry) * (1 if held > 0 else -1)
+            qty = held + signed
+            if abs(qty) < 1e-12:
+                qty = 0.0
+            elif (qty > 0) != (held > 0):
+                entry = price  # flipped through zero: the remainder opens at the fill price
+        if qty == 0:
+            self.positions.pop(symbol, None)
+        else:
+            self.positions[symbol] = {"qty": qty, "entry": entry}
+        return realized
+
+
+class AsyncSimExchange:
+    """Async facade over a SimExchange for bot.execution.Executor."""
+
+    def __init__(self, sim):
+        self.sim = sim
+
+    async def load_markets(self, reload=False):
+        return self.sim.load_markets(reload)
+
+    async def set_leverage(self, leverage, symbol=None, params=None):
+        return self.sim.set_leverage(leverage, symbol, params)
+
+    async def create_order(self, symbol, type, side, amount, price=None, params=None):
+        return self.sim.create_order(symbol, type, side, amount, price, params)
+
+    async def fetch_balance(self, params=None):
+        return self.sim.fetch_balance(params)
+
+    async def fetch_positions(self, symbols=None, params=None):
+        return self.sim.fetch_positions(symbols, params)
+
+    async def fetch_ticker(self, symbol):
+        return self.sim.fetch_ticker(symbol)
+
+    async def fetch_order_book(self, symbol, limit=25):
+        return self.sim.fetch_order_book(symbol, limit)
+
+    async def close(self):
+        pass
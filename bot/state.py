@@ -0,0 +1,213 @@
+"""
+state.py
+
+Typed, slotted per-symbol strategy state.
+
+TickState replaces the free-form state dict that decide()/mark()/apply()
+used to pass around: fixed __slots__ attributes mean no per-tick dict
+construction and no string hashing on the hot path. PositionState is a
+small snapshot of the position side of a TickState, handed to observers
+(the engine's tick events, the trade panel) instead of a fresh dict.
+
+Both still answer state["key"], state.get("key") and dict(state), so
+code written against the old dicts keeps working; keys that are not
+attributes (e.g. "action", "index" set by replay callbacks) live in a
+side dict on TickState.
+
+TICK_DTYPE is the equivalent structured NumPy record for batch use
+(to_records() / TickState.to_record()).
+"""
+
+import numpy as np
+
+from bot.features import orderbook_imbalance
+from bot.ringbuffer import PriceBuffer
+
+SIDES = {None: 0, "buy": 1, "sell": -1}
+SIDE_NAMES = {0: None, 1: "buy", -1: "sell"}
+BIAS = {None: 0, "up": 1, "down": -1}
+BIAS_NAMES = {0: None, 1: "up", -1: "down"}
+
+TICK_DTYPE = np.dtype([
+    ("price", "<f8"),
+    ("imbalance", "<f8"),
+    ("momentum", "<f8"),
+    ("volatility", "<f8"),
+    ("trend", "<f8"),
+    ("trend_bias", "i1"),       # 1 up, -1 down, 0 none
+    ("position", "i1"),         # 1 buy, -1 sell, 0 flat
+    ("entry_price", "<f8"),     # NaN when flat
+    ("qty", "<f8"),
+    ("pnl", "<f8"),
+    ("cooldown", "<i4"),
+    ("time_in_trade", "<i4"),
+    ("trail_stop", "<f8"),      # NaN when not armed
+    ("peak_pnl", "<f8"),
+])
+
+_NAN = float("nan")
+
+
+def _num(value):
+    return _NAN if value is None else value
+
+def _opt(value):
+    value = float(value)
+    return None if value != value else value
+
+
+class _Fields:
+    """Read-only mapping access over __slots__, for code that still expects dicts."""
+
+    __slots__ = ()
+    KEYS = ()
+
+    def keys(self):
+        return self.KEYS
+
+    def __getitem__(self, key):
+        if key in self.KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.KEYS}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={getattr(self, k)!r}' for k in self.KEYS)})"
+
+
+class PositionState(_Fields):
+    """Position, PnL, trail, cooldown and bias as of one tick (a copy; never mutated)."""
+
+    __slots__ = ("position", "entry_price", "qty", "pnl", "time_in_trade",
+                 "trail_stop", "peak_pnl", "cooldown", "trend_bias")
+    KEYS = __slots__
+
+    def __init__(self, position=None, entry_price=None, qty=0, pnl=0.0, time_in_trade=0,
+                 trail_stop=None, peak_pnl=None, cooldown=0, trend_bias=None):
+        self.position = position
+        self.entry_price = entry_price
+        self.qty = qty
+        self.pnl = pnl
+        self.time_in_trade = time_in_trade
+        self.trail_stop = trail_stop
+        self.peak_pnl = peak_pnl
+        self.cooldown = cooldown
+        self.trend_bias = trend_bias
+
+
+class TickState(_Fields):
+    __slots__ = ("price", "prices", "orderbook", "trend_bias", "features",
+                 "position", "entry_price", "qty", "pnl", "cooldown", "time_in_trade",
+                 "trail_stop", "peak_pnl", "extra")
+    KEYS = __slots__[:-1]
+
+    def __init__(self, history=500, features=None, prices=None):
+        """
+        Args:
+            history: Capacity of the PriceBuffer (ignored when prices is given)
+            features: Optional FeatureEngine kept in step by brain.mark()
+            prices: Existing price sequence (list or PriceBuffer) to use as the history
+        """
+        self.price = 0
+        self.prices = PriceBuffer(history) if prices is None else prices
+        self.orderbook = {"bids": [], "asks": []}
+        self.trend_bias = None
+        self.features = features
+        self.cooldown = 0
+        self.extra = {}
+        self.flatten()
+
+    # ── Position lifecycle ──
+    def open(self, side, price, qty):
+        self.position = side
+        self.entry_price = price
+        self.qty = qty
+        self.pnl = 0.0
+        self.time_in_trade = 0
+        self.trail_stop = None
+        self.peak_pnl = None
+
+    def flatten(self):
+        self.position = None
+        self.entry_price = None
+        self.qty = 0
+        self.pnl = 0.0
+        self.time_in_trade = 0
+        self.trail_stop = None
+        self.peak_pnl = None
+
+    def position_state(self):
+        return PositionState(self.position, self.entry_price, self.qty, self.pnl, self.time_in_trade,
+                             self.trail_stop, self.peak_pnl, self.cooldown, self.trend_bias)
+
+    # ── Legacy dict access (attributes first, then the side dict) ──
+    def __getitem__(self, key):
+        if key in self.KEYS:
+            return getattr(self, key)
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self.KEYS:
+            setattr(self, key, value)
+        else:
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        return key in self.KEYS or key in self.extra
+
+    def keys(self):
+        return self.KEYS + tuple(self.extra)
+
+    def update(self, values=(), **kwargs):
+        for key, value in dict(values, **kwargs).items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, state):
+        """Build a TickState from an old-style state dict (missing keys keep their defaults)."""
+        out = cls(features=state.get("features"), prices=state.get("prices", []))
+        for key, value in state.items():
+            if key not in ("features", "prices"):
+                out[key] = value
+        return out
+
+    # ── Records ──
+    def to_record(self):
+        """This state as a TICK_DTYPE tuple (features from the FeatureEngine when attached)."""
+        engine = self.features
+        if engine is not None:
+            mom, vol, trend = engine.momentum(), engine.volatility(), engine.trend_strength()
+        else:
+            mom = vol = trend = _NAN
+        return (self.price, orderbook_imbalance(self.orderbook), mom, vol, trend,
+                BIAS[self.trend_bias], SIDES[self.position], _num(self.entry_price), self.qty, self.pnl,
+                self.cooldown, self.time_in_trade, _num(self.trail_stop), _num(self.peak_pnl))
+
+    def load_record(self, record):
+        """Restore price, bias and position fields from a TICK_DTYPE record."""
+        self.price = float(record["price"])
+        self.trend_bias = BIAS_NAMES[int(record["trend_bias"])]
+        self.position = SIDE_NAMES[int(record["position"])]
+        self.entry_price = _opt(record["entry_price"])
+        self.qty = float(record["qty"])
+        self.pnl = float(record["pnl"])
+        self.cooldown = int(record["cooldown"])
+        self.time_in_trade = int(record["time_in_trade"])
+        self.trail_stop = _opt(record["trail_stop"])
+        self.peak_pnl = _opt(record["peak_pnl"])
+
+
+def to_records(states):
+    """Pack TickStates (e.g. one per tick of a backtest) into a TICK_DTYPE array."""
+    return np.array([s.to_record() for s in states], dtype=TICK_DTYPE)
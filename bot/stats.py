@@ -0,0 +1,101 @@
+"""
+stats.py
+
+Streaming trade statistics.
+
+TradeStats folds each closed trade into running totals (count, wins,
+Welford mean/variance, downside deviation, equity peak and drawdown), so
+every update and every read is O(1) no matter how many trades came before.
+"""
+
+import math
+
+
+class TradeStats:
+    def __init__(self, per_side=True):
+        """
+        Args:
+            per_side: Keep a nested TradeStats per trade side ("buy"/"sell")
+        """
+        self.count = 0
+        self.wins = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.downside_sq = 0.0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.best = None
+        self.worst = None
+        # Equity curve starts at 0, so a losing first trade is already a drawdown
+        self.equity = 0.0
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+        self.by_side = {} if per_side else None
+
+    def update(self, pnl, side=None):
+        pnl = float(pnl)
+        self.count += 1
+        self.total += pnl
+        delta = pnl - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (pnl - self.mean)
+
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+        else:
+            self.gross_loss -= pnl
+            self.downside_sq += pnl * pnl
+        self.best = pnl if self.best is None else max(self.best, pnl)
+        self.worst = pnl if self.worst is None else min(self.worst, pnl)
+
+        self.equity += pnl
+        if self.equity > self.peak:
+            self.peak = self.equity
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.equity)
+
+        if self.by_side is not None and side:
+            child = self.by_side.get(side)
+            if child is None:
+                child = self.by_side[side] = TradeStats(per_side=False)
+            child.update(pnl)
+
+    # ── Derived values ──
+    @property
+    def win_rate(self):
+        return self.wins / self.count * 100 if self.count else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    @property
+    def sharpe(self):
+        """Per-trade Sharpe-style ratio: mean / standard deviation."""
+        std = self.std
+        return self.mean / std if std else 0.0
+
+    @property
+    def sortino(self):
+        """Per-trade mean over downside deviation (losing trades only)."""
+        if not self.count or not self.downside_sq:
+            return 0.0
+        return self.mean / math.sqrt(self.downside_sq / self.count)
+
+    @property
+    def profit_factor(self):
+        return self.gross_profit / self.gross_loss if self.gross_loss else float("inf") if self.gross_profit else 0.0
+
+    def snapshot(self):
+        """Plain dict of every figure, safe to hand to another thread."""
+        out = {
+            "trades": self.count, "wins": self.wins, "total_pnl": self.total,
+            "win_rate": self.win_rate, "avg_pnl": self.mean, "std": self.std,
+            "sharpe": self.sharpe, "sortino": self.sortino, "profit_factor": self.profit_factor,
+            "best": self.best, "worst": self.worst,
+            "equity": self.equity, "peak": self.peak, "max_drawdown": self.max_drawdown,
+        }
+        if self.by_side is not None:
+            out["by_side"] = {side: s.snapshot() for side, s in self.by_side.items()}
+        return out
@@ -0,0 +1,269 @@
+"""
+stream.py
+
+Streaming Bybit market data over WebSocket.
+
+MarketStream subscribes to ticker, public trade and orderbook topics for a
+set of symbols and keeps an always-current local snapshot. It runs its own
+asyncio loop in a daemon thread, reconnects with backoff, and exposes
+get_price()/get_orderbook() reads that never touch the network.
+
+connected is set once every symbol has its orderbook snapshot. Deltas must
+continue the update id ("u") of the previous message; on a gap the book is
+dropped and its topic resubscribed, which makes Bybit send a new snapshot.
+Reads return None (empty for get_orderbook) for a symbol without a synced
+book or with no message for max_age seconds, so callers fall back to REST
+instead of trading on a frozen snapshot.
+
+Usage:
+    stream = MarketStream(["BTC/USDT"]).start()
+    bot.trader.use_stream(stream)
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+
+import websockets
+
+from bot.bars import BarAggregator
+from bot.orderbook import OrderBook
+
+PUBLIC_LINEAR_URL = "wss://stream.bybit.com/v5/public/linear"
+
+
+def market_id(symbol):
+    """Topic id Bybit uses for a symbol: BTC/USDT -> BTCUSDT."""
+    return symbol.split(":")[0].replace("/", "")
+
+
+class MarketStream:
+    def __init__(self, symbols, url=PUBLIC_LINEAR_URL, depth=50, trades_kept=500,
+                 ping_interval=20, max_backoff=30, book_depths=(10,),
+                 timeframes=("1s", "1m", "5m"), max_age=10.0):
+        """
+        Args:
+            symbols: Iterable of symbols ("BTC/USDT") to subscribe to
+            url: WebSocket endpoint (point it at a local server for tests)
+            depth: Orderbook depth topic (1, 50, 200 or 500 on Bybit)
+            trades_kept: Recent public trades kept per symbol
+            ping_interval: Seconds between application-level pings
+            max_backoff: Upper bound for the reconnect delay in seconds
+            book_depths: Depths whose cumulative volume each OrderBook caches
+            timeframes: Bar timeframes built from the public trades (bot.bars)
+            max_age: Seconds without a message after which a symbol's reads return None
+        """
+        self.url = url
+        self.depth = depth
+        self.ping_interval = ping_interval
+        self.max_backoff = max_backoff
+        self.max_age = max_age
+        self.ids = {market_id(s): s for s in symbols}
+
+        self.lock = threading.Lock()
+        self.tickers = {s: {} for s in self.ids.values()}
+        self.books = {s: OrderBook(book_depths) for s in self.ids.values()}
+        self.trades = {s: deque(maxlen=trades_kept) for s in self.ids.values()}
+        self.bars = {s: BarAggregator(timeframes) for s in self.ids.values()}
+        self.updated = {s: 0.0 for s in self.ids.values()}  # time.monotonic() of last message
+        # time.monotonic() each kind of message last arrived ("ticker", "trades", "book")
+        self.arrived = {s: {"ticker": 0.0, "trades": 0.0, "book": 0.0} for s in self.ids.values()}
+        self.book_ids = {s: None for s in self.ids.values()}  # "u" of the last book message applied
+        self.synced = set()  # symbols whose book is built from a snapshot of this connection
+        self.resync = set()  # symbols waiting to be resubscribed after an update id gap
+        self.gaps = 0
+        self.listeners = []  # callback(symbol) after each applied message (see bot.capture.Recorder)
+
+        self.connected = threading.Event()
+        self.reconnects = 0
+        self.loop = None
+        self.task = None
+        self.thread = None
+        self._stopping = False
+
+    # ── Lifecycle ──
+    def start(self):
+        """Run the stream in a background thread; returns self."""
+        self._stopping = False
+        self.loop = asyncio.new_event_loop()
+        self.task = self.loop.create_task(self.run())
+        self.thread = threading.Thread(target=self.loop.run_until_complete, args=(self.task,), daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stopping = True
+        if self.task is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.task.cancel)
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    async def run(self):
+        """Connect, stream, and reconnect with exponential backoff until stopped."""
+        backoff = 0.5
+        while not self._stopping:
+            try:
+                async with websockets.connect(self.url, ping_interval=None) as ws:
+                    backoff = 0.5
+                    await self._session(ws)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"[ERROR] Market stream: {e}")
+            self.connected.clear()
+            if self._stopping:
+                break
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def _session(self, ws):
+        args = []
+        for mid in self.ids:
+            args += [f"tickers.{mid}", f"publicTrade.{mid}", f"orderbook.{self.depth}.{mid}"]
+        with self.lock:
+            self.synced.clear()
+            self.resync.clear()
+        await ws.send(json.dumps({"op": "subscribe", "args": args}))
+
+        pinger = asyncio.ensure_future(self._ping(ws))
+        try:
+            async for raw in ws:
+                arrived = time.monotonic()  # before decoding: the age stage includes our own parsing
+                self.handle(json.loads(raw), arrived)
+                if self.resync:
+                    await self._resubscribe(ws)
+        finally:
+            pinger.cancel()
+
+    async def _resubscribe(self, ws):
+        """Re-request the book topics of symbols that hit an update id gap."""
+        with self.lock:
+            symbols, self.resync = self.resync, set()
+        topics = [f"orderbook.{self.depth}.{market_id(s)}" for s in symbols]
+        await ws.send(json.dumps({"op": "unsubscribe", "args": topics}))
+        await ws.send(json.dumps({"op": "subscribe", "args": topics}))
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send(json.dumps({"op": "ping"}))
+
+    # ── Message handling ──
+    def handle(self, msg, arrived=None):
+        """Apply one decoded message to the local snapshot; arrived is its time.monotonic() receipt."""
+        topic = msg.get("topic")
+        if not topic:
+            return  # subscription acks, pongs
+        kind, _, mid = topic.rpartition(".")
+        symbol = self.ids.get(mid)
+        if symbol is None:
+            return
+
+        arrived = time.monotonic() if arrived is None else arrived
+        with self.lock:
+            if kind == "tickers":
+                self._on_ticker(symbol, msg["data"], arrived)
+            elif kind == "publicTrade":
+                self._on_trades(symbol, msg["data"], arrived)
+            elif kind.startswith("orderbook"):
+                self._on_book(symbol, msg.get("type"), msg["data"], arrived)
+            self.updated[symbol] = arrived
+        for callback in self.listeners:
+            callback(symbol)
+
+    def _on_ticker(self, symbol, data, arrived):
+        # Bybit sends a full snapshot first, then deltas with only changed fields
+        self.tickers[symbol].update(data)
+        self.arrived[symbol]["ticker"] = arrived
+
+    def _on_trades(self, symbol, data, arrived):
+        self.arrived[symbol]["trades"] = arrived
+        bars = self.bars[symbol]
+        for t in data:
+            price, amount = float(t["p"]), float(t["v"])
+            self.trades[symbol].append({
+                "timestamp": t["T"], "side": t["S"].lower(),
+                "price": price, "amount": amount,
+            })
+            bars.update(price, amount, t["T"] / 1000)
+        if data:
+            self.tickers[symbol]["lastPrice"] = data[-1]["p"]
+
+    def _on_book(self, symbol, kind, data, arrived):
+        self.arrived[symbol]["book"] = arrived
+        book = self.books[symbol]
+        update_id = data.get("u")
+        if kind == "snapshot":
+            book.apply_snapshot(data.get("b", []), data.get("a", []))
+            self.book_ids[symbol] = update_id
+            self.synced.add(symbol)
+            if len(self.synced) == len(self.books):
+                self.connected.set()
+            return
+        if symbol not in self.synced:
+            return  # deltas before the (re)snapshot cannot be applied
+        last = self.book_ids[symbol]
+        if update_id is not None and last is not None and update_id != last + 1:
+            print(f"[ERROR] {symbol} book update {update_id} after {last}, resubscribing")
+            self.gaps += 1
+            self.synced.discard(symbol)
+            self.resync.add(symbol)
+            return
+        book.apply_delta(data.get("b", []), data.get("a", []))
+        self.book_ids[symbol] = update_id
+
+    # ── Reads (no network I/O) ──
+    def fresh(self, symbol):
+        """True when symbol had a message within max_age seconds."""
+        return self.age(symbol) <= self.max_age
+
+    def get_price(self, symbol):
+        """Last traded price, or None when unknown or stale."""
+        last = self.tickers.get(symbol, {}).get("lastPrice")
+        if last is None or not self.fresh(symbol):
+            return None
+        return float(last)
+
+    def get_orderbook(self, symbol, limit=25):
+        """ccxt-shaped {"bids": [[price, size], ...], "asks": [...]} copy of the local book."""
+        with self.lock:
+            book = self.books.get(symbol)
+            if book is None or symbol not in self.synced or not self.fresh(symbol):
+                return {"bids": [], "asks": []}
+            return book.to_dict(limit)
+
+    def book(self, symbol):
+        """
+        Copy of symbol's OrderBook taken under the lock, or None while it is unsynced or stale.
+
+        The copy never changes underneath the caller, so a whole tick (or
+        another thread) can read levels and cached sums consistently.
+        """
+        with self.lock:
+            book = self.books.get(symbol)
+            if book is None or symbol not in self.synced or not self.fresh(symbol):
+                return None
+            return book.copy()
+
+    def get_trades(self, symbol, n=50):
+        with self.lock:
+            return list(self.trades.get(symbol, ()))[-n:]
+
+    def get_bars(self, symbol):
+        """bot.bars.BarAggregator of symbol's public trades (real traded volume)."""
+        return self.bars.get(symbol)
+
+    def age(self, symbol, kind=None):
+        """
+        Seconds since the last message for symbol (inf before the first one).
+
+        kind ("ticker", "trades" or "book") narrows it to that message type.
+        """
+        if kind is None:
+            updated = self.updated.get(symbol, 0.0)
+        else:
+            updated = self.arrived.get(symbol, {}).get(kind, 0.0)
+        return time.monotonic() - updated if updated else float("inf")
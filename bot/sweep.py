@@ -0,0 +1,156 @@
+"""
+sweep.py
+
+Multi-process parameter sweep over the strategy params in bot.brain.
+
+The price and imbalance series are placed in shared memory once; every
+pool worker attaches to it in its initializer, computes the
+parameter-independent features a single time and then only runs
+bot.backtest.run_backtest() per candidate.
+
+Usage:
+    python -m bot.sweep candles.csv --grid base_target=0.3,0.5,0.7 --grid trail_activate=0.2,0.3
+    python -m bot.sweep candles.csv --random 200 --range entry_imbalance=0.1:0.4
+"""
+
+import argparse
+import itertools
+import os
+import random
+from multiprocessing import Pool, shared_memory, util
+
+import numpy as np
+
+from bot import brain
+from bot.backtest import base_features, load_csv, run_backtest, summarize
+
+
+# ── Candidate generation ──
+def grid(space):
+    """Every combination of {name: [values, ...]}."""
+    names = list(space)
+    return [brain.make_params(**dict(zip(names, combo)))
+            for combo in itertools.product(*(space[n] for n in names))]
+
+def random_search(space, n, seed=None):
+    """
+    n random candidates from {name: (low, high)} or {name: [choices]}.
+
+    Integer bounds sample integers, float bounds sample uniformly.
+    """
+    rng = random.Random(seed)
+    candidates = []
+    for _ in range(n):
+        values = {}
+        for name, spec in space.items():
+            if isinstance(spec, tuple):
+                lo, hi = spec
+                values[name] = rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) \
+                    else rng.uniform(lo, hi)
+            else:
+                values[name] = rng.choice(list(spec))
+        candidates.append(brain.make_params(**values))
+    return candidates
+
+
+# ── Workers ──
+_worker = {}
+
+def _init_worker(shm_name, length, leverage, usdt_per_trade):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    data = np.ndarray((2, length), dtype=np.float64, buffer=shm.buf)
+    _worker.update(
+        shm=shm, close=data[0], imbalance=data[1], base=base_features(data[0]),
+        leverage=leverage, usdt_per_trade=usdt_per_trade,
+    )
+    # Runs when the worker exits normally (pool.close() + join())
+    util.Finalize(None, _close_worker, exitpriority=10)
+
+def _close_worker():
+    shm = _worker.pop("shm", None)
+    _worker.clear()  # drop the views into the buffer before closing it
+    if shm is not None:
+        shm.close()
+
+def _evaluate(params):
+    trades = run_backtest(
+        _worker["close"], _worker["imbalance"], leverage=_worker["leverage"],
+        usdt_per_trade=_worker["usdt_per_trade"], params=params, base=_worker["base"],
+    )
+    result = dict(params)
+    result.update(summarize(trades))
+    return result
+
+
+# ── Runner ──
+def run_sweep(close, imbalance, candidates, processes=None, leverage=10, usdt_per_trade=10):
+    """
+    Evaluate candidates across a process pool.
+
+    Returns a DataFrame ranked by PnL (then by lower drawdown), with one
+    column per swept parameter plus trades, pnl, win_rate and max_drawdown.
+    """
+    import pandas as pd
+
+    if not candidates:
+        return pd.DataFrame(columns=list(summarize([])))
+
+    close = np.asarray(close, dtype=np.float64)
+    imbalance = np.asarray(imbalance, dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=2 * close.nbytes)
+    try:
+        data = np.ndarray((2, len(close)), dtype=np.float64, buffer=shm.buf)
+        data[0] = close
+        data[1] = imbalance
+        with Pool(processes or os.cpu_count(), initializer=_init_worker,
+                  initargs=(shm.name, len(close), leverage, usdt_per_trade)) as pool:
+            results = pool.map(_evaluate, candidates, chunksize=max(1, len(candidates) // 64))
+            pool.close()
+            pool.join()
+        del data
+    finally:
+        shm.close()
+        shm.unlink()
+
+    df = pd.DataFrame(results)
+    fixed = [name for name in brain.DEFAULT_PARAMS if df[name].nunique() <= 1]
+    df = df.drop(columns=fixed)
+    return df.sort_values(["pnl", "max_drawdown"], ascending=[False, True]).reset_index(drop=True)
+
+
+def _parse_values(text):
+    values = []
+    for item in text.split(","):
+        try:
+            values.append(int(item))
+        except ValueError:
+            values.append(float(item))
+    return values
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parameter sweep for bot.brain.decide")
+    parser.add_argument("csv")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...")
+    parser.add_argument("--random", type=int, default=0, metavar="N", help="random search with N samples")
+    parser.add_argument("--range", action="append", default=[], metavar="NAME=LOW:HIGH")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.random:
+        space = {}
+        for spec in args.range:
+            name, bounds = spec.split("=")
+            lo, hi = _parse_values(bounds.replace(":", ","))
+            space[name] = (lo, hi)
+        candidates = random_search(space, args.random, seed=args.seed)
+    else:
+        space = {name: _parse_values(values) for name, values in (g.split("=") for g in args.grid)}
+        candidates = grid(space)
+
+    close, imb = load_csv(args.csv)
+    print(f"[INFO] Sweeping {len(candidates)} candidates over {len(close)} candles")
+    table = run_sweep(close, imb, candidates, processes=args.processes)
+    print(table.head(args.top).to_string())
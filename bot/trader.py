@@ -1,66 +1,197 @@
-import ccxt
+from bot.config import get_config
+from bot.ratelimit import RateLimiter
 
 API_KEY = "key"
 API_SECRET = "key"
 
-exchange = ccxt.bybit({
-    "apiKey": API_KEY,
-    "secret": API_SECRET,
-    "enableRateLimit": True,
-    "options": {"defaultType": "linear"}
-})
+# Shared ccxt client, built on first use by get_exchange(): importing ccxt
+# and constructing the client costs more than the rest of startup combined.
+exchange = None
+
+def get_exchange():
+    global exchange
+    if exchange is None:
+        import ccxt
+
+        exchange = ccxt.bybit({
+            "apiKey": API_KEY,
+            "secret": API_SECRET,
+            "enableRateLimit": True,
+            "options": {"defaultType": "linear"}
+        })
+    return exchange
 
 SYMBOL = "BTC/USDT"
 
-USDT_PER_TRADE = 10
+# Margin per trade comes from the bot.config snapshot (the Settings panel)
+
+# Optional bot.stream.MarketStream; when attached, price/orderbook reads are
+# served from its local snapshot and REST is only a fallback.
+STREAM = None
+
+# Optional bot.account.AccountCache; balance reads are served from it while
+# it is fresher than ACCOUNT_MAX_AGE seconds, REST is only a fallback.
+ACCOUNT = None
+ACCOUNT_MAX_AGE = 120
+
+# Last leverage the exchange accepted per symbol, so entries skip the call
+LEVERAGE = {}
+
+# One request budget for every symbol traded by this process
+LIMITER = RateLimiter(rate=10, burst=10)
+
+
+class Trader:
+    """
+    Symbol-scoped view of the exchange.
+
+    Traders for different symbols share the exchange connection, the stream,
+    the leverage cache and the rate limiter, but never each other's symbol,
+    so sessions can run concurrently without touching the SYMBOL global.
+    """
+
+    def __init__(self, symbol, client=None, stream=None, limiter=None):
+        self.symbol = symbol
+        self.client = client
+        self.stream = stream
+        self.limiter = limiter
+
+    # Shared resources resolve lazily so use_stream()/tests can swap them later
+    @property
+    def ex(self):
+        return self.client if self.client is not None else get_exchange()
+
+    @property
+    def feed(self):
+        return self.stream if self.stream is not None else STREAM
+
+    def _budget(self):
+        (self.limiter or LIMITER).acquire()
+
+    def set_leverage(self, leverage):
+        try:
+            self._budget()
+            self.ex.private_post_position_leverage_save({
+                "symbol": self.symbol.replace("/", ""),
+                "buy_leverage": leverage,
+                "sell_leverage": leverage
+            })
+            LEVERAGE[self.symbol] = leverage
+        except Exception as e:
+            print(f"[ERROR] Failed to set leverage: {e}")
 
+    def get_balance(self):
+        """
+        Total USDT equity, or None when it cannot be known right now.
+
+        A failed request is not an empty account: callers must treat None
+        as "unknown" (skip the trade / keep the last value), never as 0.
+        """
+        account = ACCOUNT
+        if account is not None and account.age("wallet") < ACCOUNT_MAX_AGE:
+            cached = account.balance("USDT")
+            if cached is not None:
+                return cached
+        try:
+            self._budget()
+            bal = self.ex.fetch_balance({"accountType": "UNIFIED"})
+            total = bal["total"].get("USDT")
+            return None if total is None else float(total)
+        except Exception as e:
+            print(f"[ERROR] Failed to fetch balance: {e}")
+            return None
+
+    def get_price(self):
+        feed = self.feed
+        if feed is not None:
+            price = feed.get_price(self.symbol)
+            if price:
+                return price
+        try:
+            self._budget()
+            return self.ex.fetch_ticker(self.symbol)["last"]
+        except Exception as e:
+            print(f"[ERROR] Failed to fetch {self.symbol} price: {e}")
+            return 0
+
+    def get_orderbook(self):
+        feed = self.feed
+        if feed is not None and feed.connected.is_set():
+            book = feed.book(self.symbol)
+            if book is not None and book.best_bid() is not None:
+                return book
+        try:
+            self._budget()
+            return self.ex.fetch_order_book(self.symbol, limit=25)
+        except Exception as e:
+            print(f"[ERROR] Failed to fetch {self.symbol} order book: {e}")
+            return {"bids":[], "asks":[]}
+
+    def open_position(self, side, leverage, usdt=None):
+        if LEVERAGE.get(self.symbol) != leverage:
+            self.set_leverage(leverage)
+        price = self.get_price()
+        qty = round(((get_config().current.usdt_per_trade if usdt is None else usdt) * leverage) / price, 6)
+        try:
+            self._budget()
+            order = self.ex.create_order(self.symbol, "market", side, qty)
+        except Exception as e:
+            print(f"[ERROR] Failed to open {side} {self.symbol}: {e}")
+            order = None
+        return qty, price, order
+
+    def close_position(self, position):
+        side = "sell" if position["side"] == "buy" else "buy"
+        try:
+            self._budget()
+            self.ex.create_order(self.symbol, "market", side, position["qty"])
+        except Exception as e:
+            print(f"[ERROR] Failed to close {self.symbol}: {e}")
+
+
+TRADERS = {}
+
+def get_trader(symbol):
+    """Shared Trader for symbol (created on first use)."""
+    t = TRADERS.get(symbol)
+    if t is None:
+        t = TRADERS[symbol] = Trader(symbol)
+    return t
+
+
+# ── Module-level API (acts on the current SYMBOL) ──
 def set_symbol(symbol):
     global SYMBOL
     SYMBOL = symbol
 
+def use_stream(stream):
+    global STREAM
+    STREAM = stream
+
+def use_account(cache):
+    """Serve balance reads from a bot.account.AccountCache (None detaches it)."""
+    global ACCOUNT
+    ACCOUNT = cache
+
+def use_exchange(client):
+    """Swap the shared client, e.g. for a bot.simulator.SimExchange."""
+    global exchange
+    exchange = client
+
 def set_leverage(leverage):
-    try:
-        exchange.private_post_position_leverage_save({
-            "symbol": SYMBOL.replace("/", ""),
-            "buy_leverage": leverage,
-            "sell_leverage": leverage
-        })
-    except Exception as e:
-        print(f"[ERROR] Failed to set leverage: {e}")
+    get_trader(SYMBOL).set_leverage(leverage)
 
 def get_balance():
-    try:
-        bal = exchange.fetch_balance({"accountType": "UNIFIED"})
-        return float(bal["total"].get("USDT", 0))
-    except:
-        return 0
+    return get_trader(SYMBOL).get_balance()
 
 def get_price():
-    try:
-        return exchange.fetch_ticker(SYMBOL)["last"]
-    except:
-        return 0
+    return get_trader(SYMBOL).get_price()
 
 def get_orderbook():
-    try:
-        return exchange.fetch_order_book(SYMBOL, limit=25)
-    except:
-        return {"bids":[], "asks":[]}
+    return get_trader(SYMBOL).get_orderbook()
 
 def open_position(side, leverage):
-    set_leverage(leverage)
-    price = get_price()
-    qty = round((USDT_PER_TRADE * leverage) / price, 6)
-    try:
-        order = exchange.create_order(SYMBOL, "market", side, qty)
-    except:
-        order = None
-    return qty, price, order
+    return get_trader(SYMBOL).open_position(side, leverage)
 
 def close_position(position):
-    side = "sell" if position["side"] == "buy" else "buy"
-    try:
-        exchange.create_order(SYMBOL, "market", side, position["qty"])
-    except:
-        pass
-
+    get_trader(SYMBOL).close_position(position)
@@ -1,46 +1,89 @@
-import tkinter as tk
-from ui.app import App
-from bot.brain import Brain
-from bot.trader import get_price, get_orderbook, get_balance, open_position, close_position
-from threading import Thread
-import time
+import os
+import subprocess
+import sys
+
+# Modules a GUI launch imports before the window appears
+STARTUP_IMPORTS = "import tkinter, ui.app, bot.engine, bot.brain"
+
+
+def profile_imports(top=25):
+    """
+    Print the slowest imports of a GUI launch.
+
+    Runs the startup imports in a fresh interpreter under
+    `python -X importtime` and ranks modules by cumulative time.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", STARTUP_IMPORTS],
+                         cwd=here, capture_output=True, text=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(cumulative_us), int(self_us), depth, name.strip()))
+    if out.returncode:
+        print(out.stderr.strip().splitlines()[-1])
+
+    total = sum(c for c, _, depth, _ in rows if depth == 0)
+    print(f"[INFO] {len(rows)} modules, {total / 1000:.1f} ms total ({STARTUP_IMPORTS})")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative, self_us, _, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
 
 # ── Launcher ──
 if __name__ == "__main__":
+    # Headless: run the engine straight from the CLI without importing tkinter/matplotlib
+    if "--headless" in sys.argv:
+        from bot.engine import main as run_engine
+        run_engine([a for a in sys.argv[1:] if a != "--headless"])
+        sys.exit(0)
+
+    # Import-time report: python main.py --profile-imports
+    if "--profile-imports" in sys.argv:
+        profile_imports()
+        sys.exit(0)
+
+    import tkinter as tk
+    from bot import brain
+    from bot.config import get_config
+    from bot.engine import Engine
+
+    # ── Trading engine (GUI observes it), configured from the saved settings ──
+    engine = Engine(symbol=get_config().current.symbol)
+    # After a crash/restart, trade first and build the window while the engine runs
+    if "--autostart" in sys.argv:
+        engine.start()
+
+    from ui.app import App
+
     root = tk.Tk()
     root.title("Bybit Smart Micro Bot - Final Product")
     root.geometry("1200x720")
     root.configure(bg="#121212")
 
-    # ── Brain / Bot instance ──
-    brain = Brain()
-
     # ── Trade callback for replay / simulation ──
     def trade_callback(state):
         """
         Called by replay_window for each historical candle.
-        Simulates trading decisions based on brain logic.
+        Simulates trading decisions based on brain logic on the replay's
+        own state (already marked with the candle).
         """
         action = brain.decide(state)
         state["action"] = action
-        # Save simulated trade if exit
-        if action == "exit" and state.get("position"):
-            pnl = (state["price"] - state["entry_price"]) * state["qty"]
-            if state["position"] == "sell":
-                pnl *= -1
-            trade_data = {
-                "side": state["position"],
-                "entry": state["entry_price"],
-                "exit": state["price"],
-                "pnl": pnl,
-                "confidence": 100,  # placeholder, can be calculated
-                "live": False
-            }
-            brain.save_trade(trade_data)
+        price = state.price
+        qty = round((engine.usdt_per_trade * engine.leverage) / price, 6) if price else 0
+        trade = brain.apply(state, action, price, qty)
+        # Save simulated trade on exit
+        if trade is not None:
+            trade.update(confidence=100, live=False)  # placeholder confidence
+            brain.save_trade(trade)
 
     # ── App / UI ──
-    app = App(root, brain, trade_callback)
+    app = App(root, engine=engine, trade_callback=trade_callback)
 
     # ── Start Tkinter mainloop ──
     root.mainloop()
-
+    engine.stop()
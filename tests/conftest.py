@@ -0,0 +1,78 @@
+"""
+conftest.py
+
+Shared pytest fixtures. Run the suite from the repository root:
+
+    python -m pytest -q
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    """Point the shared trade journal at a temporary directory."""
+    from bot import journal as journal_module
+
+    trades = journal_module.TradeJournal(str(tmp_path / "journal"), flush_interval=None)
+    monkeypatch.setattr(journal_module, "_journal", trades)
+    return trades
+
+
+@pytest.fixture
+def ws_server():
+    """
+    Start local WebSocket servers: ws_server(handler) -> "ws://127.0.0.1:<port>".
+
+    handler(ws) is a coroutine run per connection on the servers' own loop
+    in a background thread; everything is shut down after the test.
+    """
+    import asyncio
+    import threading
+
+    import websockets
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    servers = []
+
+    def start(handler):
+        async def serve():
+            return await websockets.serve(handler, "127.0.0.1", 0)
+
+        server = asyncio.run_coroutine_threadsafe(serve(), loop).result(5)
+        servers.append(server)
+        return f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+    yield start
+
+    async def shutdown():
+        # Handlers parked on their own queues outlive the connection; end them first
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for server in servers:
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+def wait_for(predicate, timeout=5.0):
+    """Poll predicate until it is truthy; fails the test on timeout."""
+    import time
+
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            pytest.fail("condition not met in time")
+        time.sleep(0.01)
@@ -0,0 +1,207 @@
+"""
+test_account.py
+
+AccountStream against a local private-stream server (auth, wallet,
+position and execution topics) and REST reconciliation against a stub.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+
+from bot import trader
+from bot.account import AccountCache, AccountStream
+
+from conftest import wait_for
+
+KEY, SECRET = "test-key", "test-secret"
+
+
+def _wallet(equity, free):
+    return {"topic": "wallet", "data": [{"accountType": "UNIFIED", "coin": [
+        {"coin": "USDT", "equity": str(equity), "walletBalance": str(equity),
+         "availableToWithdraw": str(free), "totalPositionIM": "0", "totalOrderIM": "0"}]}]}
+
+
+def _position(size, side="Buy"):
+    return {"topic": "position", "data": [{"symbol": "BTCUSDT", "side": side if size else "", "size": str(size),
+                                           "entryPrice": "30000", "leverage": "10", "markPrice": "30010",
+                                           "unrealisedPnl": "0.1"}]}
+
+
+def _execution(order_id, price):
+    return {"topic": "execution", "data": [{"symbol": "BTCUSDT", "orderId": order_id, "side": "Buy",
+                                            "execPrice": str(price), "execQty": "0.001", "execFee": "0.0165",
+                                            "execTime": "1700000000000"}]}
+
+
+class PrivateServer:
+    """Checks the HMAC auth, then replays queued messages to the client."""
+
+    def __init__(self, accept=True):
+        self.accept = accept
+        self.received = []
+        self.outbox = None
+        self.loop = None
+        self.auths = 0
+
+    async def handler(self, ws):
+        auth = json.loads(await ws.recv())
+        self.received.append(auth)
+        key, expires, signature = auth["args"]
+        expected = hmac.new(SECRET.encode(), f"GET/realtime{expires}".encode(), hashlib.sha256).hexdigest()
+        ok = self.accept and key == KEY and signature == expected and expires > time.time() * 1000
+        self.auths += 1
+        await ws.send(json.dumps({"op": "auth", "success": ok, "ret_msg": "" if ok else "invalid signature"}))
+        if not ok:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.outbox = asyncio.Queue()
+
+        async def reader():
+            async for raw in ws:
+                self.received.append(json.loads(raw))
+
+        task = asyncio.ensure_future(reader())
+        try:
+            while True:
+                await ws.send(json.dumps(await self.outbox.get()))
+        finally:
+            task.cancel()
+
+    def send(self, *messages):
+        wait_for(lambda: self.outbox is not None)
+        for msg in messages:
+            self.loop.call_soon_threadsafe(self.outbox.put_nowait, msg)
+
+
+class StubRest:
+    """fetch_balance / fetch_positions snapshot; hold() blocks the next fetch until release()."""
+
+    def __init__(self, total=1000.0, free=900.0, positions=()):
+        self.total, self.free, self.positions = total, free, list(positions)
+        self.gate = None
+        self.entered = threading.Event()
+        self.calls = 0
+
+    def hold(self):
+        self.gate = threading.Event()
+        self.entered.clear()
+
+    def fetch_balance(self, params=None):
+        self.calls += 1
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+            self.gate = None
+        return {"total": {"USDT": self.total}, "free": {"USDT": self.free}, "used": {"USDT": self.total - self.free}}
+
+    def fetch_positions(self, symbols=None, params=None):
+        return list(self.positions)
+
+
+def _stream(url, rest, **kwargs):
+    return AccountStream(["BTC/USDT"], url=url, api_key=KEY, api_secret=SECRET, exchange=rest,
+                         reconcile_every=0, **kwargs).start()
+
+
+def test_auth_and_topics_update_the_cache(ws_server):
+    server = PrivateServer()
+    rest = StubRest(total=500, free=500)
+    account = _stream(ws_server(server.handler), rest)
+    try:
+        assert account.connected.wait(5)
+        wait_for(lambda: any(m.get("op") == "subscribe" for m in server.received))
+        assert server.received[0]["op"] == "auth"
+        subscribe = next(m for m in server.received if m.get("op") == "subscribe")
+        assert subscribe["args"] == ["wallet", "position", "execution"]
+        wait_for(lambda: rest.calls == 1)  # reconciled once on connect
+
+        server.send(_wallet(1234.5, 1100), _position(0.002), _execution("o-1", 30001))
+        cache = account.cache
+        wait_for(lambda: cache.recent_fills())
+        assert cache.balance("USDT") == 1234.5
+        assert cache.free("USDT") == 1100
+        assert cache.position("BTC/USDT") == {"side": "buy", "qty": 0.002, "entry": 30000.0, "leverage": 10.0,
+                                              "mark": 30010.0, "unrealized": 0.1}
+        fill = cache.recent_fills()[-1]
+        assert (fill["symbol"], fill["order_id"], fill["price"], fill["fee"]) == ("BTC/USDT", "o-1", 30001.0, 0.0165)
+        assert cache.age("wallet") < 5 and cache.age("execution") < 5
+
+        server.send(_position(0))
+        wait_for(lambda: cache.position("BTC/USDT") is None)
+    finally:
+        account.stop()
+
+
+def test_rejected_auth_never_connects(ws_server):
+    server = PrivateServer(accept=False)
+    account = _stream(ws_server(server.handler), StubRest(), max_backoff=0.1)
+    try:
+        wait_for(lambda: server.auths >= 2)  # rejected, then retried
+        assert not account.connected.is_set()
+        assert account.reconnects >= 1
+    finally:
+        account.stop()
+
+
+def test_reconcile_keeps_stream_updates_newer_than_the_snapshot(ws_server):
+    server = PrivateServer()
+    rest = StubRest(total=1000, free=1000,
+                    positions=[{"symbol": "BTC/USDT:USDT", "contracts": 0.001, "side": "long", "entryPrice": 29000,
+                                "leverage": 10, "markPrice": 29100, "unrealizedPnl": 0.1}])
+    account = _stream(ws_server(server.handler), rest)
+    cache = account.cache
+    try:
+        wait_for(lambda: cache.balance("USDT") == 1000)
+        assert cache.position("BTC/USDT")["entry"] == 29000
+
+        # A reconcile is in flight when the stream reports a fill, a new balance and a closed position
+        rest.hold()
+        reconciling = threading.Thread(target=account.reconcile)
+        reconciling.start()
+        assert rest.entered.wait(5)
+        server.send(_wallet(990, 980), _position(0))
+        wait_for(lambda: cache.balance("USDT") == 990 and cache.position("BTC/USDT") is None)
+        rest.gate.set()
+        reconciling.join(5)
+
+        assert cache.balance("USDT") == 990  # the older REST 1000 did not win
+        assert cache.position("BTC/USDT") is None  # nor did its stale open position
+        assert cache.age("rest") < 5
+
+        # The next snapshot taken after those messages applies again
+        rest.total, rest.free = 985.0, 985.0
+        account.reconcile()
+        assert cache.balance("USDT") == 985
+        assert cache.position("BTC/USDT")["qty"] == 0.001
+    finally:
+        account.stop()
+
+
+def test_apply_rest_defaults_since_to_now():
+    cache = AccountCache(["BTC/USDT"])
+    cache.apply_wallet(_wallet(10, 10)["data"], now=100)
+    cache.apply_rest({"total": {"USDT": 20}, "free": {"USDT": 15}}, [], now=50)
+    assert cache.balance("USDT") == 10  # written by the stream at 100, after the snapshot at 50
+    cache.apply_rest({"total": {"USDT": 20}, "free": {"USDT": 15}}, [], now=150)
+    assert cache.balance("USDT") == 20 and cache.free("USDT") == 15
+
+
+def test_engine_ignores_a_stale_wallet(tmp_path, journal, monkeypatch):
+    from bot.config import ConfigStore
+    from bot.engine import Engine
+    from bot.orders import OrderLog
+
+    cache = AccountCache(["BTC/USDT"])
+    engine = Engine(live=True, account=cache, executor=object(), orders=OrderLog(str(tmp_path)),
+                    config=ConfigStore(), latency_path=None)
+    assert engine._margin_ok("BTC/USDT", 10)  # never seen: unknown
+    cache.apply_wallet(_wallet(5, 5)["data"])
+    assert not engine._margin_ok("BTC/USDT", 10)
+    monkeypatch.setattr(trader, "ACCOUNT_MAX_AGE", 0.05)
+    time.sleep(0.1)
+    assert engine._margin_ok("BTC/USDT", 10)  # too old to block an entry
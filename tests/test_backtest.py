@@ -0,0 +1,78 @@
+"""
+test_backtest.py
+
+run_backtest must close the same trades as the per-tick run_reference,
+whichever exit (trailing stop, profit target, invalidation) ends them and
+however long the wick filter holds a losing trade open.
+"""
+
+import numpy as np
+import pytest
+
+from bot import brain
+from bot.backtest import base_features, compute_features, run_backtest, run_reference
+
+
+def _market(n, seed, sigma=8.0, imb_scale=0.3):
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, sigma, n))
+    imbalance = np.clip(rng.normal(0, imb_scale, n), -1, 1)
+    return close, imbalance
+
+
+def _exit_reason(trade, feats, p):
+    """Which decide() rule closed a reference trade."""
+    x = trade["exit_index"]
+    pnl = trade["pnl"]
+    if pnl >= feats["target"][x]:
+        return "target"
+    if pnl >= p["trail_activate"]:
+        return "trail"
+    return "stop"
+
+
+def _wick_held(trade, close, imbalance, feats, p):
+    """Ticks where the stop was hit but the wick filter kept the trade open."""
+    e, x = trade["entry_index"], trade["exit_index"]
+    pnl = (close[e + 1:x] - trade["entry"]) * trade["qty"]
+    if trade["side"] == "sell":
+        pnl = -pnl
+    imb = imbalance[e + 1:x]
+    wick = (pnl < 0) & ((imb > -p["wick_imbalance"]) if trade["side"] == "buy" else (imb < p["wick_imbalance"]))
+    held = np.arange(1, x - e)
+    return int((wick & (pnl <= feats["stop"][e + 1:x]) & (held >= p["min_hold"])).sum())
+
+
+# Each set leans on one exit rule, so every rule is compared against the reference
+CASES = {
+    "trail": (brain.make_params(trail_activate=0.1, trail_distance=0.05, target_vol_factor=2.0), "trail"),
+    "target": (brain.make_params(trail_activate=100.0, base_target=0.3, target_vol_factor=0.0), "target"),
+    "stop": (brain.make_params(base_target=5.0, stop_floor=0.1, stop_vol_factor=0.01, wick_imbalance=0.5), "stop"),
+}
+
+
+@pytest.mark.parametrize("case", list(CASES))
+def test_matches_reference(case):
+    params, expected = CASES[case]
+    reasons = dict.fromkeys(("trail", "target", "stop"), 0)
+    wick_held = 0
+    for seed in range(20):
+        close, imbalance = _market(1200, seed)
+        fast = run_backtest(close, imbalance, params=params, base=base_features(close))
+        slow = run_reference(close, imbalance, params=params)
+        assert len(fast) == len(slow), f"seed {seed}"
+        feats = compute_features(close, imbalance, params)
+        for a, b in zip(fast, slow):
+            assert (a["side"], a["entry_index"], a["exit_index"]) == (b["side"], b["entry_index"], b["exit_index"])
+            assert a["entry"] == b["entry"] and a["exit"] == b["exit"] and a["qty"] == b["qty"]
+            assert a["pnl"] == pytest.approx(b["pnl"])
+            reasons[_exit_reason(b, feats, params)] += 1
+            wick_held += _wick_held(b, close, imbalance, feats, params)
+    assert reasons[expected] >= 20, reasons
+    if case == "stop":
+        assert wick_held > 0  # losing trades the wick filter kept open past their stop
+
+
+def test_flat_market_never_trades():
+    close = np.full(500, 30000.0)
+    assert run_backtest(close) == run_reference(close) == []
@@ -0,0 +1,67 @@
+"""
+test_bars.py
+
+Streaming bars (BarSeries / BarAggregator) against resample().
+"""
+
+import numpy as np
+import pytest
+
+from bot.bars import BAR_DTYPE, BarAggregator, BarSeries, resample
+
+
+def _ticks(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    times = 1_700_000_000 + np.cumsum(rng.exponential(0.7, n))
+    prices = 30000 + np.cumsum(rng.normal(0, 3, n))
+    volumes = rng.uniform(0.001, 0.5, n)
+    return times, prices, volumes
+
+
+@pytest.mark.parametrize("timeframe", ["1s", "1m", "5m"])
+def test_streaming_matches_resample(timeframe):
+    times, prices, volumes = _ticks()
+    series = BarSeries(timeframe, capacity=10_000)
+    for t, p, v in zip(times, prices, volumes):
+        series.update(p, v, t)
+    live = series.bars()
+    batch = resample(times, prices, timeframe, volumes)
+    assert len(live) == len(batch)
+    for field in ("start", "open", "high", "low", "close", "volume"):
+        np.testing.assert_allclose(live[field], batch[field])
+    np.testing.assert_array_equal(live["ticks"], batch["ticks"])
+
+
+def test_late_tick_is_dropped():
+    series = BarSeries("1m")
+    series.update(100.0, 1.0, ts=60)
+    series.update(101.0, 1.0, ts=125)  # closes the 60s bar, opens 120s
+    series.update(102.0, 1.0, ts=130)
+    version = series.version
+    assert series.update(90.0, 2.0, ts=110) is False  # late: belongs to the closed 60s bucket
+    bar = series.current()
+    assert bar["start"] == 120
+    assert (bar["open"], bar["high"], bar["low"], bar["close"]) == (101.0, 102.0, 101.0, 102.0)
+    assert bar["volume"] == 2.0 and bar["ticks"] == 2
+    assert series.closed()[-1]["close"] == 100.0
+    assert series.late == 1 and series.version == version
+
+    times, prices = [60, 125, 130], [100.0, 101.0, 102.0]  # what resample() sees without the late tick
+    np.testing.assert_array_equal(series.bars(), resample(times, prices, "1m", [1.0, 1.0, 1.0]))
+
+
+def test_capacity_wraps_to_contiguous_view():
+    series = BarSeries(1, capacity=4)
+    for i in range(10):
+        series.update(float(i), ts=float(i))
+    closed = series.closed()
+    assert closed.dtype == BAR_DTYPE
+    assert list(closed["close"]) == [5.0, 6.0, 7.0, 8.0]
+    assert list(series.closes(2)) == [7.0, 8.0]
+
+
+def test_aggregator_reports_closed_timeframes():
+    agg = BarAggregator(("1s", "1m"))
+    assert agg.update(1.0, ts=0.5) == []
+    assert agg.update(2.0, ts=1.5) == ["1s"]
+    assert sorted(agg.update(3.0, ts=60.2)) == ["1m", "1s"]
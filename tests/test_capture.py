@@ -0,0 +1,149 @@
+"""
+test_capture.py
+
+Recording a MarketStream (every update plus the engine's reads) and
+replaying the capture.
+"""
+
+import asyncio
+import glob
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from bot.capture import Capture, Recorder, ReplaySource
+from bot.engine import StreamFeed
+from bot.stream import MarketStream
+
+
+def _msg(kind, u, bids, asks):
+    return {"topic": "orderbook.50.BTCUSDT", "type": kind, "data": {"s": "BTCUSDT", "b": bids, "a": asks, "u": u}}
+
+
+def _trade(price):
+    return {"topic": "publicTrade.BTCUSDT", "data": [{"T": 1_700_000_000_000, "S": "Buy", "p": str(price), "v": "0.1"}]}
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_records_every_update_and_replays_reads(tmp_path, compress):
+    stream = MarketStream(["BTC/USDT"])
+    path = str(tmp_path / "capture")
+    rec = Recorder(StreamFeed(stream), path, depth=5, compress=compress, stream=stream)
+
+    stream.handle(_msg("snapshot", 1, [["99", "1"]], [["101", "1"]]))
+    stream.handle(_trade(100))
+    stream.handle(_msg("delta", 2, [["99.5", "2"]], []))
+    assert rec.get_price("BTC/USDT") == 100
+    rec.book("BTC/USDT")  # tick 0 read: bid 99.5
+    asyncio.run(rec.wait(0))
+    stream.handle(_trade(100.5))
+    stream.handle(_msg("delta", 3, [["99.5", "0"], ["100", "3"]], []))
+    rec.get_price("BTC/USDT")
+    rec.book("BTC/USDT")  # tick 1 read: bid 100
+    rec.close()
+
+    suffix = ".npz" if compress else ".npy"
+    assert all(p.endswith(suffix) for p in glob.glob(os.path.join(path, "chunk-*")))
+    records = Capture(path).records()
+    assert list(records["read"]) == [0, 0, 0, 1, 0, 0, 1]
+    assert list(records["tick"]) == [0, 0, 0, 0, 1, 1, 1]
+    assert records["bids"][1, 0, 0] == 99.0 and records["bids"][2, 0, 0] == 99.5
+
+    replay = ReplaySource(path)
+    assert replay.book("BTC/USDT").best_bid() == 99.5
+    assert replay.get_price("BTC/USDT") == 100
+    asyncio.run(replay.wait(0))
+    assert replay.book("BTC/USDT").best_bid() == 100
+    assert replay.get_price("BTC/USDT") == 100.5
+    asyncio.run(replay.wait(0))
+    assert replay.finished
+
+    prices, _ = Capture(path).series("BTC/USDT")
+    assert list(prices) == [100, 100.5]
+    prices, _ = Capture(path).series("BTC/USDT", updates=True)
+    assert len(prices) == 7 and np.isnan(prices[0])  # the snapshot arrived before any trade
+
+
+class GappyFeed:
+    """Prices every tick, but no usable book on the ticks listed in gaps."""
+
+    def __init__(self, prices, gaps):
+        self.prices = prices
+        self.gaps = set(gaps)
+        self.i = -1
+
+    def get_price(self, symbol):
+        self.i += 1
+        return self.prices[self.i]
+
+    def book(self, symbol):
+        if self.i in self.gaps:
+            return None
+        price = self.prices[self.i]
+        return {"bids": [[price - 1, 2.0]], "asks": [[price + 1, 1.0]]}
+
+
+def test_a_missing_book_replays_as_none(tmp_path):
+    path = str(tmp_path / "capture")
+    rec = Recorder(GappyFeed([100.0, 101.0, 102.0], gaps=[1]), path, depth=3)
+    for _ in range(3):
+        rec.get_price("BTC/USDT")
+        rec.book("BTC/USDT")
+        asyncio.run(rec.wait(0))
+    rec.close()
+
+    replay = ReplaySource(path)
+    books = []
+    while not replay.finished:
+        book = replay.book("BTC/USDT")
+        books.append((replay.get_price("BTC/USDT"), None if book is None else book.best_bid()))
+        asyncio.run(replay.wait(0))
+    assert [price for price, _ in books] == [100.0, 101.0, 102.0]
+    assert books[1][1] is None  # not an empty book: the engine skips this tick, as it did live
+    assert books[0][1] == 99.0 and books[2][1] == 101.0
+
+    prices, _ = Capture(path).series("BTC/USDT")
+    assert list(prices) == [100.0, 102.0]
+
+
+def test_chunks_never_split_a_tick(tmp_path):
+    stream = MarketStream(["BTC/USDT"])
+    path = str(tmp_path / "capture")
+    rec = Recorder(StreamFeed(stream), path, depth=3, chunk_records=5, stream=stream)
+    stream.handle(_msg("snapshot", 1, [["99", "1"]], [["101", "1"]]))
+    stream.handle(_trade(100))
+
+    stop = threading.Event()
+
+    def updates():
+        u = 2
+        while not stop.is_set():
+            stream.handle(_msg("delta", u, [["99", str(u % 7 + 1)]], []))
+            u += 1
+
+    thread = threading.Thread(target=updates)
+    thread.start()
+    try:
+        for _ in range(200):
+            rec.get_price("BTC/USDT")
+            rec.book("BTC/USDT")
+            asyncio.run(rec.wait(0))
+    finally:
+        stop.set()
+        thread.join(5)
+    rec.close()
+
+    capture = Capture(path)
+    seen = set()
+    for chunk in capture.chunks():
+        ticks = set(np.unique(chunk["tick"]).tolist())
+        assert not ticks & seen
+        seen |= ticks
+    replay = ReplaySource(path)
+    reads = 0
+    while not replay.finished:
+        reads += replay.book("BTC/USDT") is not None
+        asyncio.run(replay.wait(0))
+    assert reads == 200
@@ -0,0 +1,126 @@
+"""
+test_config.py
+
+Config snapshots and ConfigStore publishing/persistence, the Settings
+panel's debounce, and engine overrides that must stay out of the store.
+"""
+
+import json
+
+import pytest
+
+from bot import brain
+from bot.config import DEFAULTS, Config, ConfigStore
+
+
+def test_snapshots_are_immutable_and_versioned():
+    store = ConfigStore()
+    first = store.current
+    assert first.version == 0 and first.as_dict() == DEFAULTS
+    with pytest.raises(AttributeError):
+        first.max_leverage = 50
+    with pytest.raises(KeyError):
+        Config(bogus=1)
+
+    seen = []
+    store.subscribe(seen.append)
+    second = store.publish(max_leverage=20, usdt_per_trade=15)
+    assert store.current is second and second.version == 1
+    assert (second.max_leverage, second.usdt_per_trade) == (20, 15.0)
+    assert (first.max_leverage, first.usdt_per_trade) == (10, 10.0)  # a reader's snapshot never changes
+    assert store.publish(max_leverage=20) is second  # no change, no new version
+    assert seen == [second]
+
+    third = store.publish(trailing_stop=0.3)
+    assert third.version == 2 and third.params["trail_distance"] == 0.3
+    assert second.params["trail_distance"] == brain.TRAIL_DISTANCE
+
+
+def test_save_and_load_round_trip(tmp_path, capsys):
+    path = str(tmp_path / "config.json")
+    store = ConfigStore(path=path)
+    store.publish(max_leverage=25, symbol="ETH/USDT")
+    store.save()
+
+    loaded = ConfigStore(path=path).current
+    assert loaded.version == 1
+    assert loaded.as_dict() == dict(DEFAULTS, max_leverage=25, symbol="ETH/USDT")
+
+    with open(path, "w") as f:
+        json.dump({"version": 4, "values": {"max_leverage": 30, "retired_key": 1}}, f)
+    assert ConfigStore(path=path).current.as_dict() == dict(DEFAULTS, max_leverage=30)
+
+    with open(path, "w") as f:
+        f.write("{not json")
+    assert ConfigStore(path=path).current.as_dict() == DEFAULTS
+    assert "Failed to load config" in capsys.readouterr().out
+
+
+class FakeFrame:
+    """Stands in for the panel's Tk frame: after() callbacks run when the test advances time."""
+
+    def __init__(self):
+        self.now = 0
+        self.jobs = {}
+
+    def after(self, ms, callback):
+        job = len(self.jobs) + 1
+        self.jobs[job] = (self.now + ms, callback)
+        return job
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def advance(self, ms):
+        self.now += ms
+        for job, (due, callback) in sorted(self.jobs.items(), key=lambda item: item[1][0]):
+            if due <= self.now:
+                del self.jobs[job]
+                callback()
+
+
+def test_settings_debounce_publishes_once(tmp_path):
+    pytest.importorskip("tkinter")
+    from ui.settings import Settings
+
+    store = ConfigStore(path=str(tmp_path / "config.json"))
+    panel = Settings.__new__(Settings)  # the widgets need a display; the debounce does not
+    panel.master = FakeFrame()
+    panel.update_callback = None
+    panel.store = store
+    panel.debounce_ms = 250
+    panel.pending = {}
+    panel.flush_id = None
+    panel.settings = store.current.as_dict()
+
+    for leverage in range(11, 31):  # a slider drag
+        panel.update_setting("max_leverage", leverage)
+        panel.master.advance(50)
+    panel.update_setting("usdt_per_trade", 12.0)
+    assert store.current.version == 0 and panel.get("max_leverage") == 30
+
+    panel.master.advance(250)
+    assert store.current.version == 1
+    assert (store.current.max_leverage, store.current.usdt_per_trade) == (30, 12.0)
+    assert ConfigStore(path=store.path).current.max_leverage == 30  # saved with the publish
+
+    panel.update_setting("max_leverage", 30)  # unchanged: nothing scheduled
+    assert panel.flush_id is None
+
+
+def test_engine_overrides_stay_local(tmp_path, journal):
+    from bot.engine import Engine
+    from bot.orders import OrderLog
+
+    path = str(tmp_path / "config.json")
+    store = ConfigStore(path=path)
+    engine = Engine(leverage=50, usdt_per_trade=5, config=store, latency_path=None,
+                    orders=OrderLog(str(tmp_path / "orders")))
+    assert store.current.version == 0 and store.current.max_leverage == DEFAULTS["max_leverage"]
+    assert (engine.leverage, engine.usdt_per_trade) == (50, 5.0)
+    assert engine.current_config() is engine.current_config()  # derived once per store snapshot
+
+    store.publish(trailing_stop=0.4, max_leverage=3)
+    cfg = engine.current_config()
+    assert cfg.max_leverage == 50 and cfg.params["trail_distance"] == 0.4  # the rest still follows the store
+    assert Engine(config=store, latency_path=None).leverage == 3
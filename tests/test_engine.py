@@ -0,0 +1,287 @@
+"""
+test_engine.py
+
+Engine lifecycle, sessions and paper trading, driven by scripted feeds.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from bot import brain
+from bot.config import ConfigStore
+from bot.engine import Engine, StreamFeed
+from bot.orders import OrderLog
+from bot.ratelimit import RateLimiter
+from bot.simulator import TAKER_FEE, SimExchange
+from bot.stream import MarketStream
+from bot.trader import Trader
+
+
+@pytest.fixture
+def make_engine(tmp_path, journal):
+    engines = []
+
+    def make(**kwargs):
+        kwargs.setdefault("orders", OrderLog(str(tmp_path / "orders")))
+        kwargs.setdefault("config", ConfigStore())
+        kwargs.setdefault("latency_path", None)
+        engine = Engine(**kwargs)
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.stop()
+        if engine.thread is not None:
+            engine.thread.join(5)
+        if engine.paper_executor is not None:
+            engine.paper_executor.stop()
+
+
+class SlowFeed:
+    """Counts how many engine loops read it at the same time."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = 0
+        self.overlap = 0
+        self.reads = 0
+
+    def get_price(self, symbol):
+        with self.lock:
+            self.active += 1
+            self.overlap = max(self.overlap, self.active)
+            self.reads += 1
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return None  # no decision: only the loop itself is under test
+
+    def book(self, symbol):
+        return {"bids": [], "asks": []}
+
+    blocking = True
+
+
+def test_restart_never_runs_two_loops(make_engine):
+    feed = SlowFeed()
+    engine = make_engine(feed=feed, interval=0.01)
+    engine.start()
+    time.sleep(0.1)
+    for _ in range(5):
+        engine.stop()
+        engine.start()
+        time.sleep(0.03)
+    time.sleep(0.1)
+    engine.stop()
+    engine.thread.join(5)
+    assert feed.reads > 5
+    assert feed.overlap == 1
+    assert not engine.thread.is_alive()
+
+
+class ScriptedFeed:
+    """Per-symbol price paths with a book skewed towards one side around each price."""
+
+    def __init__(self, paths, skew):
+        self.paths = {s: np.asarray(p, dtype=np.float64) for s, p in paths.items()}
+        self.skew = skew  # symbol -> +1 (bid heavy) / -1 (ask heavy)
+        self.i = dict.fromkeys(paths, -1)
+        self.reads = dict.fromkeys(paths, 0)
+
+    def get_price(self, symbol):
+        self.reads[symbol] += 1
+        self.i[symbol] = min(self.i[symbol] + 1, len(self.paths[symbol]) - 1)
+        return float(self.paths[symbol][self.i[symbol]])
+
+    def book(self, symbol):
+        price = self.paths[symbol][self.i[symbol]]
+        heavy, light = ([[price - 0.5, 5.0]], [[price + 0.5, 1.0]])
+        if self.skew[symbol] < 0:
+            heavy, light = [[price - 0.5, 1.0]], [[price + 0.5, 5.0]]
+        return {"bids": heavy, "asks": light}
+
+
+def _paths(n=400):
+    rng = np.random.default_rng(7)
+    up = 30000 + np.cumsum(np.abs(rng.normal(0, 20, n)))
+    down = 2000 - np.cumsum(np.abs(rng.normal(0, 0.5, n)))
+    return {"BTC/USDT": up, "ETH/USDT": down}
+
+
+def _run_ticks(engine, n):
+    async def go():
+        for _ in range(n):
+            await engine.tick()
+            await asyncio.sleep(0)
+        await engine.drain()
+    asyncio.run(go())
+
+
+# ── Paper trading on the simulator ──
+def test_paper_fills_fees_and_balance(make_engine, journal):
+    feed = ScriptedFeed({"BTC/USDT": _paths()["BTC/USDT"]}, {"BTC/USDT": 1})
+    paper = SimExchange(balance=1000, slippage_bps=0)
+    params = brain.make_params(target_vol_factor=0.01)  # quick exits: several round trips
+    engine = make_engine(symbol="BTC/USDT", feed=feed, paper=paper, interval=0, params=params)
+    trades = []
+    engine.subscribe(lambda e: e["type"] == "trade" and trades.append(e["trade"]))
+    _run_ticks(engine, 300)
+
+    assert len(trades) >= 3
+    orders = list(paper.orders)
+    entries = [o for o in orders if not o["reduceOnly"]]
+    exits = [o for o in orders if o["reduceOnly"]]
+    assert len(entries) == len(exits) + (engine.state.position is not None)
+
+    # Market orders walk the book: buys at the ask, sells at the bid (prices are 0.5 off the last)
+    for trade, entry, exit in zip(trades, entries, exits):
+        assert entry["side"] == "buy" and exit["side"] == "sell"
+        assert trade["entry"] == pytest.approx(entry["average"])
+        assert trade["exit"] == pytest.approx(exit["average"])
+        assert exit["realizedPnl"] == pytest.approx((exit["average"] - entry["average"]) * exit["amount"])
+        assert trade["pnl"] == pytest.approx(exit["realizedPnl"])
+
+    fees = sum(o["cost"] * TAKER_FEE for o in orders)
+    assert paper.fees_paid == pytest.approx(fees)
+    for o in orders:
+        assert o["fee"]["cost"] == pytest.approx(o["cost"] * TAKER_FEE)
+    assert paper.wallet == pytest.approx(1000 + sum(o["realizedPnl"] for o in orders) - fees)
+
+    balance = paper.fetch_balance()
+    if engine.state.position is None:
+        assert balance["total"]["USDT"] == pytest.approx(paper.wallet)
+        assert balance["used"]["USDT"] == 0
+    assert engine.stats.snapshot()["trades"] == len(trades)
+    journal.flush()
+    assert len(journal) == len(trades)
+
+
+# ── Several symbols (sessions, shared budget) ──
+def test_sessions_trade_their_own_symbol(make_engine):
+    feed = ScriptedFeed(_paths(), {"BTC/USDT": 1, "ETH/USDT": -1})
+    paper = SimExchange(balance=10_000)
+    engine = make_engine(symbols=["BTC/USDT", "ETH/USDT"], feed=feed, paper=paper, interval=0)
+    trades = []
+    engine.subscribe(lambda e: e["type"] == "trade" and trades.append(e["trade"]))
+    _run_ticks(engine, 300)
+
+    btc, eth = engine.sessions["BTC/USDT"].state, engine.sessions["ETH/USDT"].state
+    assert btc is not eth and btc.features is not eth.features
+    assert btc.price == pytest.approx(feed.paths["BTC/USDT"][feed.i["BTC/USDT"]])
+    assert eth.price == pytest.approx(feed.paths["ETH/USDT"][feed.i["ETH/USDT"]])
+    assert max(btc.prices) > 29000 > max(eth.prices)  # no price leaked across sessions
+
+    sides = {t["symbol"]: {x["side"] for x in trades if x["symbol"] == t["symbol"]} for t in trades}
+    assert sides == {"BTC/USDT": {"buy"}, "ETH/USDT": {"sell"}}
+    assert {o["symbol"] for o in paper.orders} == {"BTC/USDT", "ETH/USDT"}
+
+
+class HeldExecutor:
+    """Executor stand-in: orders for held symbols stay pending until release()."""
+
+    def __init__(self, held):
+        self.held = set(held)
+        self.pending = []
+        self.sent = []
+
+    def submit(self, symbol, side, leverage, usdt=None, qty=None, reduce_only=False, price=None):
+        future = concurrent.futures.Future()
+        qty = qty or round(usdt * leverage / price, 6)
+        result = {"symbol": symbol, "side": side, "qty": qty, "price": price, "reduce_only": reduce_only,
+                  "order": {"id": str(len(self.sent)), "average": price}, "latency": 0.0, "rtt": 0.0,
+                  "error": None}
+        self.sent.append(symbol)
+        if symbol in self.held:
+            self.pending.append((future, result))
+        else:
+            future.set_result(result)
+        return future
+
+    def close_position(self, symbol, position, price=None):
+        side = "sell" if position["side"] == "buy" else "buy"
+        return self.submit(symbol, side, position.get("leverage"), qty=position["qty"], reduce_only=True,
+                           price=price)
+
+    def release(self):
+        for future, result in self.pending:
+            future.set_result(result)
+        self.pending = []
+
+
+def test_pending_order_does_not_stall_other_sessions(make_engine):
+    feed = ScriptedFeed(_paths(), {"BTC/USDT": 1, "ETH/USDT": -1})
+    executor = HeldExecutor(held={"BTC/USDT"})
+    engine = make_engine(symbols=["BTC/USDT", "ETH/USDT"], feed=feed, executor=executor, live=True,
+                         interval=0)
+
+    async def go():
+        for _ in range(200):
+            await engine.tick()
+            await asyncio.sleep(0)
+        btc_reads = feed.reads["BTC/USDT"]
+        assert engine.sessions["BTC/USDT"].busy
+        assert executor.sent.count("BTC/USDT") == 1
+        assert executor.sent.count("ETH/USDT") > 2  # kept entering and exiting meanwhile
+        assert feed.reads["ETH/USDT"] > btc_reads
+
+        executor.release()
+        await engine.drain()
+        assert not engine.sessions["BTC/USDT"].busy
+        assert engine.sessions["BTC/USDT"].state.position == "buy"
+
+    asyncio.run(go())
+
+
+def test_rate_limiter_throttles_shared_budget():
+    sim = SimExchange()
+    sim.update("BTC/USDT", 30000.0)
+    sim.update("ETH/USDT", 2000.0)
+    limiter = RateLimiter(rate=50, burst=2)
+    traders = [Trader(s, client=sim, limiter=limiter) for s in ("BTC/USDT", "ETH/USDT")]
+    prices = []
+
+    def poll(t):
+        for _ in range(5):
+            prices.append(t.get_price())
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=poll, args=(t,)) for t in traders]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    assert sorted(set(prices)) == [2000.0, 30000.0]
+    assert elapsed >= (10 - 2) / 50 * 0.9  # 8 requests past the burst at 50/s
+
+
+def test_rate_limiter_async_reservations_queue_up():
+    limiter = RateLimiter(rate=100, burst=1)
+
+    async def go():
+        started = time.monotonic()
+        await asyncio.gather(*(limiter.acquire_async() for _ in range(6)))
+        return time.monotonic() - started
+
+    assert asyncio.run(go()) >= 5 / 100 * 0.9
+
+
+def test_stream_book_age_is_its_own_stage(make_engine):
+    stream = MarketStream(["BTC/USDT"])
+    stream.handle({"topic": "orderbook.50.BTCUSDT", "type": "snapshot",
+                   "data": {"b": [["99", "1"]], "a": [["101", "1"]], "u": 1}}, arrived=time.monotonic() - 0.25)
+    stream.handle({"topic": "tickers.BTCUSDT", "data": {"lastPrice": "100"}})
+    engine = make_engine(feed=StreamFeed(stream), interval=0)
+    _run_ticks(engine, 1)
+
+    stages = engine.latency.snapshot()["stages"]
+    assert list(stages)[:2] == ["age", "data"]
+    assert 240 < stages["age"]["BTC/USDT"]["p50"] < 1000  # ms since the book arrived
+    assert stages["data"]["BTC/USDT"]["max"] < 100
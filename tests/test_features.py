@@ -0,0 +1,60 @@
+"""
+test_features.py
+
+FeatureEngine must match the list-based reference functions tick for tick,
+before the ring is full, after it wraps and across resyncs.
+"""
+
+import numpy as np
+import pytest
+
+from bot import features
+from bot.features import FeatureEngine
+
+
+def _walk(n, seed):
+    rng = np.random.default_rng(seed)
+    return list(30000 + np.cumsum(rng.normal(0, 5, n)))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_engine_matches_reference(seed):
+    prices = _walk(400, seed)
+    engine = FeatureEngine()
+    for i, price in enumerate(prices):
+        engine.update(price)
+        history = prices[:i + 1]
+        assert engine.momentum() == pytest.approx(features.momentum(history))
+        assert engine.trend_strength() == pytest.approx(features.trend_strength(history))
+        assert engine.volatility() == pytest.approx(features.volatility(history), abs=1e-7)
+    assert engine.count > engine.size  # the ring wrapped several times
+
+
+def test_custom_lookbacks_and_resync(monkeypatch):
+    monkeypatch.setattr(FeatureEngine, "RESYNC_EVERY", 37)
+    prices = _walk(500, 3)
+    engine = FeatureEngine(mom_lookback=3, vol_lookback=11, trend_lookback=7)
+    for i, price in enumerate(prices):
+        engine.update(price)
+        history = prices[:i + 1]
+        assert engine.momentum() == pytest.approx(features.momentum(history, 3))
+        assert engine.trend_strength() == pytest.approx(features.trend_strength(history, 7))
+        assert engine.volatility() == pytest.approx(features.volatility(history, 11), abs=1e-7)
+
+
+def test_seed_replays_history():
+    prices = _walk(120, 4)
+    engine = FeatureEngine()
+    engine.seed(prices)
+    assert engine.price() == prices[-1]
+    assert engine.momentum() == pytest.approx(features.momentum(prices))
+    assert engine.volatility() == pytest.approx(features.volatility(prices), abs=1e-7)
+
+
+def test_short_history_is_zero():
+    engine = FeatureEngine()
+    for price in _walk(5, 5):
+        engine.update(price)
+    assert engine.momentum() == 0
+    assert engine.volatility() == 0
+    assert engine.trend_strength() == 0
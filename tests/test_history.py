@@ -0,0 +1,122 @@
+"""
+test_history.py
+
+KlineCache against a stub exchange: paging, partial days and gap refill.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from bot.history import DAY, KlineCache, first_missing
+from bot.ratelimit import RateLimiter
+
+T0 = 1_709_251_200  # 2024-03-01 00:00 UTC
+
+
+class StubExchange:
+    """fetch_ohlcv over a synthetic 1m series, honouring since/limit like ccxt."""
+
+    def __init__(self, start, end, holes=()):
+        self.starts = np.arange(start, end, 60, dtype=np.float64)
+        for lo, hi in holes:
+            self.starts = self.starts[(self.starts < lo) | (self.starts >= hi)]
+        self.calls = []
+        self.now = end
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=1000):
+        self.calls.append(since)
+        visible = self.starts[self.starts <= self.now]  # only bars that have opened
+        visible = visible[visible >= since / 1000][:limit]
+        return [[t * 1000, t, t + 2, t - 2, t + 1, 1.0] for t in visible]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    def make(exchange, now):
+        return KlineCache(exchange, root=str(tmp_path), limiter=RateLimiter(1e9, 1e9),
+                          page_limit=500, clock=lambda: now[0])
+    return make
+
+
+def _files(root):
+    return sorted(os.listdir(os.path.join(root, "BTCUSDT", "1m")))
+
+
+def test_pages_through_whole_days(cache, tmp_path):
+    ex = StubExchange(T0, T0 + 2 * DAY)
+    now = [T0 + 2 * DAY + 60]
+    kc = cache(ex, now)
+    bars = kc.bars("BTC/USDT", "1m", T0, T0 + 2 * DAY)
+    assert len(bars) == 2 * 1440
+    assert np.all(np.diff(bars["start"]) == 60)
+    assert kc.requests == 2 * 3  # 1440 bars a day in pages of 500
+    assert _files(tmp_path) == ["2024-03-01.npy", "2024-03-02.npy"]
+
+    ex.calls.clear()
+    again = kc.bars("BTC/USDT", "1m", T0, T0 + 2 * DAY)
+    assert ex.calls == []  # complete days never touch the network again
+    np.testing.assert_array_equal(again, bars)
+
+
+def test_partial_day_completes_later(cache, tmp_path):
+    ex = StubExchange(T0, T0 + DAY)
+    now = [T0 + 10 * 3600 + 30]
+    ex.now = now[0]
+    kc = cache(ex, now)
+    bars = kc.bars("BTC/USDT", "1m", T0, T0 + DAY)
+    assert bars["start"][-1] == T0 + 10 * 3600  # the bar still forming
+    assert _files(tmp_path) == ["2024-03-01.partial.npy"]
+
+    # The day is over, but the exchange has not served 23:59 yet: still partial
+    now[0] = T0 + DAY + 5
+    ex.now = T0 + DAY - 61
+    kc.bars("BTC/USDT", "1m", T0, T0 + DAY)
+    assert _files(tmp_path) == ["2024-03-01.partial.npy"]
+
+    ex.calls.clear()
+    ex.now = T0 + DAY + 60
+    bars = kc.bars("BTC/USDT", "1m", T0, T0 + DAY)
+    assert ex.calls[0] == (T0 + DAY - 120) * 1000  # resumed from the last stored bar
+    assert _files(tmp_path) == ["2024-03-01.npy"]
+    assert len(bars) == 1440 and np.all(np.diff(bars["start"]) == 60)
+
+
+def test_empty_page_is_a_gap_not_the_end(cache, tmp_path):
+    # Nothing for the first 20 hours (not listed yet), then data
+    ex = StubExchange(T0 + 20 * 3600, T0 + DAY)
+    now = [T0 + DAY + 60]
+    kc = cache(ex, now)
+    bars = kc.bars("BTC/USDT", "1m", T0, T0 + DAY)
+    assert bars["start"][0] == T0 + 20 * 3600
+    assert bars["start"][-1] == T0 + DAY - 60
+    assert _files(tmp_path) == ["2024-03-01.npy"]
+
+
+def test_hole_in_partial_day_is_refilled(cache, tmp_path):
+    hole = (T0 + 3600, T0 + 2 * 3600)
+    ex = StubExchange(T0, T0 + DAY, holes=[hole])
+    now = [T0 + 5 * 3600]
+    ex.now = now[0]
+    kc = cache(ex, now)
+    kc.bars("BTC/USDT", "1m", T0, T0 + DAY)
+    path = os.path.join(str(tmp_path), "BTCUSDT", "1m", "2024-03-01.partial.npy")
+    assert first_missing(np.load(path)["start"], T0, 60) == hole[0]
+
+    # The exchange backfilled its outage; the next read fetches from the hole on
+    ex.starts = np.arange(T0, T0 + DAY, 60, dtype=np.float64)
+    ex.calls.clear()
+    now[0] = ex.now = T0 + DAY + 60
+    bars = kc.bars("BTC/USDT", "1m", T0, T0 + DAY)
+    assert ex.calls[0] == hole[0] * 1000
+    assert len(bars) == 1440 and np.all(np.diff(bars["start"]) == 60)
+    assert _files(tmp_path) == ["2024-03-01.npy"]
+
+
+def test_first_missing():
+    starts = np.array([0, 60, 120, 300, 360], dtype=np.float64)
+    assert first_missing(starts, 0, 60) == 180
+    assert first_missing(starts[:3], 0, 60) == 120
+    assert first_missing(starts[1:], 0, 60) == 0
+    assert first_missing(np.empty(0), 0, 60) == 0
@@ -0,0 +1,119 @@
+"""
+test_journal.py
+
+TradeJournal round trips, torn-record recovery, the schema check and the
+migration of the legacy CSV and logs/ dumps.
+"""
+
+import json
+import math
+import os
+import time
+
+import numpy as np
+import pytest
+
+from bot.journal import TRADE_DTYPE, TradeJournal, migrate, to_record
+
+
+def _trade(i, pnl=1.5):
+    return {"timestamp": 1_700_000_000 + i, "symbol": "BTC/USDT", "side": "buy", "entry": 30000.0 + i,
+            "exit": 30010.0 + i, "qty": 0.001, "pnl": pnl, "live": i % 2 == 0, "order_id": f"order-{i}"}
+
+
+def test_round_trip_across_segments(tmp_path):
+    root = str(tmp_path / "journal")
+    journal = TradeJournal(root, flush_every=4, segment_records=5, flush_interval=None)
+    for i in range(11):
+        journal.append(_trade(i, pnl=1.0 if i % 3 else -2.0))
+    assert len(journal) == 11  # 8 flushed by flush_every, 3 still buffered
+    assert len(journal.read(include_buffer=False)) == 8
+    journal.close()
+
+    reopened = TradeJournal(root, flush_interval=None)
+    records = reopened.read()
+    assert [os.path.getsize(p) // TRADE_DTYPE.itemsize for p in reopened.segments()] == [5, 5, 1]
+    assert list(records["entry"]) == [30000.0 + i for i in range(11)]
+    assert list(records["outcome"]) == [0 if i % 3 == 0 else 1 for i in range(11)]
+    assert records["order_id"][7] == b"order-7" and records["symbol"][0] == b"BTC/USDT"
+    assert list(records["live"][:3]) == [1, 0, 1]
+    assert math.isnan(records["confidence"][0])
+    frame = reopened.to_frame()
+    assert frame["side"].tolist() == ["buy"] * 11
+
+
+def test_timer_flushes_a_lone_trade(tmp_path):
+    journal = TradeJournal(str(tmp_path / "journal"), flush_interval=0.05)
+    journal.append(_trade(0))
+    deadline = time.time() + 5
+    while not journal.segments() and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(journal.read(include_buffer=False)) == 1
+
+
+def test_torn_tail_is_cut_on_open(tmp_path, capsys):
+    root = str(tmp_path / "journal")
+    journal = TradeJournal(root, flush_interval=None)
+    for i in range(3):
+        journal.append(_trade(i))
+    journal.flush()
+    segment = journal.segments()[-1]
+    with open(segment, "ab") as f:
+        f.write(np.array([to_record(_trade(3))], dtype=TRADE_DTYPE).tobytes()[:17])  # crash mid-write
+
+    reopened = TradeJournal(root, flush_interval=None)
+    assert "torn record" in capsys.readouterr().out
+    assert os.path.getsize(segment) == 3 * TRADE_DTYPE.itemsize
+    reopened.append(_trade(4))
+    reopened.flush()
+    assert list(reopened.read()["entry"]) == [30000.0, 30001.0, 30002.0, 30004.0]
+
+
+def test_schema_mismatch_is_refused(tmp_path):
+    root = str(tmp_path / "journal")
+    TradeJournal(root, flush_interval=None)
+    path = os.path.join(root, "schema.json")
+    with open(path) as f:
+        schema = json.load(f)
+
+    schema["dtype"][1] = ["symbol", "|S8"]  # same version, narrower field
+    with open(path, "w") as f:
+        json.dump(schema, f)
+    with pytest.raises(ValueError, match="record layout"):
+        TradeJournal(root)
+
+    schema["version"] = 99
+    with open(path, "w") as f:
+        json.dump(schema, f)
+    with pytest.raises(ValueError, match="schema version 99"):
+        TradeJournal(root)
+
+
+def test_migrates_legacy_csv_and_logs(tmp_path):
+    csv_path = tmp_path / "trade_history.csv"
+    csv_path.write_text(
+        "direction,entry_price,won\n"
+        "hold,88997.6,\n"
+        "buy,89048.2,True,\"{'id': 'abc-1', 'symbol': 'BTC/USDT:USDT', 'amount': 0.001, 'price': None}\"\n"
+        "sell,89047.2,False,Failed\n")
+    logs = tmp_path / "logs"
+    (logs / "wins").mkdir(parents=True)
+    (logs / "losses").mkdir()
+    (logs / "wins" / "w1.txt").write_text(
+        "{'id': 'w1', 'direction': 'buy', 'entry_price': 87885.7, 'amount': 0.001138, 'timestamp': 1767267932}\n"
+        "not a dict\n")
+    (logs / "losses" / "l1.csv").write_text(
+        "id,direction,price,take_profit_pct,stop_loss_pct,timestamp\n"
+        "l1,sell,87949.7,0.3,0.2,2026-01-01 22:47:40.697586\n")
+
+    journal = TradeJournal(str(tmp_path / "journal"), flush_interval=None)
+    assert migrate(journal, str(csv_path), str(logs)) == 5
+    records = journal.read()
+    assert [s.decode() for s in records["side"]] == ["hold", "buy", "sell", "buy", "sell"]
+    assert list(records["entry"]) == [88997.6, 89048.2, 89047.2, 87885.7, 87949.7]
+    assert list(records["outcome"]) == [-1, 1, 0, 1, 0]
+    assert list(records["live"]) == [0, 1, 0, 0, 0]  # only a parsed exchange order counts as live
+    assert [s.decode() for s in records["order_id"]] == ["", "abc-1", "", "w1", "l1"]
+    assert records["qty"][3] == 0.001138
+    assert records["timestamp"][3] == 1767267932 and not math.isnan(records["timestamp"][4])
+    assert math.isnan(records["timestamp"][0]) and math.isnan(records["pnl"][0])
@@ -0,0 +1,138 @@
+"""
+test_orders.py
+
+OrderLog: queries, crash recovery of the index, undated imports.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from bot.orders import ORDER_DTYPE, OrderLog, legacy_orders
+
+
+def _event(i, ts, **extra):
+    return dict({"timestamp": ts, "symbol": "BTC/USDT", "order_id": f"id-{i}", "side": "buy" if i % 2 else "sell",
+                 "qty": 0.001, "price": 30000 + i, "fill": 30000 + i, "status": "ok", "live": False}, **extra)
+
+
+def _log(root, events, **kwargs):
+    log = OrderLog(str(root), **kwargs)
+    log.extend(events)
+    log.flush()
+    return log
+
+
+def test_query_by_window_side_and_id(tmp_path):
+    log = _log(tmp_path, [_event(i, 1000.0 + i) for i in range(50)], segment_records=16)
+    assert len(log) == 50 and len(log.index["segments"]) == 4
+    hits = log.query(start=1010, end=1020)
+    assert list(hits["timestamp"]) == [1010.0 + i for i in range(10)]
+    assert len(log.query(start=1010, end=1020, side="buy")) == 5
+    assert log.get("id-33")["price"] == 30033
+    log.close()
+
+
+def test_reopen_reconciles_index_with_segments(tmp_path):
+    log = _log(tmp_path, [_event(i, 1000.0 + i) for i in range(10)])
+    log.close()
+    index_path = os.path.join(tmp_path, "index.json")
+    with open(index_path) as f:
+        stale = json.load(f)
+
+    # Records written after the last index save, then a torn one (crash mid-write)
+    segment = os.path.join(tmp_path, stale["segments"][0]["name"])
+    extra = np.zeros(2, dtype=ORDER_DTYPE)
+    extra["timestamp"] = (2000.0, 2001.0)
+    extra["order_id"] = (b"late-1", b"late-2")
+    with open(segment, "ab") as f:
+        f.write(extra.tobytes())
+        f.write(b"\0" * 17)
+    with open(index_path, "w") as f:
+        json.dump(stale, f)
+
+    log = OrderLog(str(tmp_path))
+    assert len(log) == 12
+    assert os.path.getsize(segment) == 12 * ORDER_DTYPE.itemsize
+    assert log.index["segments"][0]["last"] == 2001.0
+    assert log.get("late-2")["timestamp"] == 2001.0
+    log.append(_event(99, 3000.0))
+    log.flush()
+    assert list(log.query(start=1999)["timestamp"]) == [2000.0, 2001.0, 3000.0]
+    log.close()
+
+
+def test_unknown_timestamps_stay_out_of_windows(tmp_path):
+    log = _log(tmp_path, [_event(1, 1000.0), _event(2, None), _event(3, 1002.0)])
+    assert np.isnan(log.get("id-2")["timestamp"])
+    assert list(log.query(start=0, end=5000)["order_id"]) == [b"id-1", b"id-3"]
+    assert list(log.query(end=5000)["order_id"]) == [b"id-1", b"id-3"]
+    assert len(log.query()) == 3  # no window: everything, undated included
+    log.close()
+
+
+def test_legacy_orders_without_timestamp_are_undated(tmp_path):
+    logs = tmp_path / "logs"
+    (logs / "all").mkdir(parents=True)
+    (logs / "wins").mkdir()
+    (logs / "all" / "a.txt").write_text(repr({"id": "a", "side": "buy", "amount": 0.001,
+                                               "timestamp": 1_700_000_000_000, "status": "closed"}))
+    (logs / "all" / "b.txt").write_text(repr({"id": "b", "side": "sell", "amount": 0.001}))
+    (logs / "wins" / "c.txt").write_text(repr({"id": "c", "side": "buy", "profit": 0.4}))
+    events = legacy_orders(str(logs))
+    assert [e["order_id"] for e in events] == ["a", "b", "c"]
+    assert events[0]["timestamp"] == 1_700_000_000
+    assert events[1]["timestamp"] is None and events[2]["timestamp"] is None
+    assert events[2]["outcome"] == 1
+
+
+def test_id_lookup_uses_sorted_id_files(tmp_path):
+    events = [_event(i, 1000.0 + i) for i in range(40)]
+    events.append(_event(5, 2000.0, price=1.0))  # id-5 again, in a later segment
+    log = _log(tmp_path, events, segment_records=16)
+    segments = log.index["segments"]
+    assert [s.get("ids") for s in segments] == ["orders-000001.ids.npy", "orders-000002.ids.npy", None]
+    assert log.get("id-20")["price"] == 30020
+    assert log.get("id-5")["price"] == 1.0  # the latest record of a re-logged id
+    log.close()
+
+    # An index from before the id files gets them on open
+    index_path = os.path.join(tmp_path, "index.json")
+    with open(index_path) as f:
+        index = json.load(f)
+    for meta in index["segments"]:
+        meta.pop("ids", None)
+    os.remove(os.path.join(tmp_path, "orders-000002.ids.npy"))
+    with open(index_path, "w") as f:
+        json.dump(index, f)
+
+    log = OrderLog(str(tmp_path), segment_records=16)
+    assert log.index["segments"][1]["ids"] == "orders-000002.ids.npy"
+    assert log.get("id-17")["timestamp"] == 1017.0
+    assert log.get("id-36")["timestamp"] == 1036.0
+    assert log.get("missing") is None
+    assert len(log.ids) == 9  # only the tail segment is scanned into memory
+    log.close()
+
+
+def test_writer_survives_a_failed_write(tmp_path, monkeypatch, capsys):
+    log = OrderLog(str(tmp_path))
+    write = log._write
+    calls = []
+
+    def flaky(records):
+        calls.append(len(records))
+        if len(calls) == 1:
+            raise RuntimeError("disk on fire")
+        write(records)
+
+    monkeypatch.setattr(log, "_write", flaky)
+    log.append(_event(1, 1000.0))
+    log.flush(timeout=5)
+    assert "disk on fire" in capsys.readouterr().out
+    log.append(_event(2, 1001.0))
+    log.flush(timeout=5)
+    assert log.writer.is_alive()
+    assert list(log.query()["order_id"]) == [b"id-2"]
+    log.close()
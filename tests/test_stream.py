@@ -0,0 +1,141 @@
+"""
+test_stream.py
+
+MarketStream against a local WebSocket server replaying Bybit messages.
+"""
+
+import asyncio
+import json
+import time
+
+from bot.stream import MarketStream
+
+from conftest import wait_for
+
+
+def _book(kind, u, bids, asks, mid="BTCUSDT"):
+    return {"topic": f"orderbook.50.{mid}", "type": kind, "ts": 0,
+            "data": {"s": mid, "b": bids, "a": asks, "u": u}}
+
+
+def _ticker(price, mid="BTCUSDT"):
+    return {"topic": f"tickers.{mid}", "type": "snapshot", "data": {"symbol": mid, "lastPrice": str(price)}}
+
+
+class Script:
+    """Server side of one test: records what the client sends and replays messages on cue."""
+
+    def __init__(self):
+        self.received = []
+        self.outbox = None
+        self.loop = None
+
+    async def handler(self, ws):
+        self.loop = asyncio.get_running_loop()
+        self.outbox = asyncio.Queue()
+
+        async def reader():
+            async for raw in ws:
+                self.received.append(json.loads(raw))
+
+        task = asyncio.ensure_future(reader())
+        try:
+            while True:
+                await ws.send(json.dumps(await self.outbox.get()))
+        finally:
+            task.cancel()
+
+    def send(self, *messages):
+        wait_for(lambda: self.outbox is not None)
+        for msg in messages:
+            self.loop.call_soon_threadsafe(self.outbox.put_nowait, msg)
+
+    def ops(self, op):
+        return [m for m in self.received if m.get("op") == op]
+
+
+def test_snapshot_delta_and_price(ws_server):
+    script = Script()
+    stream = MarketStream(["BTC/USDT"], url=ws_server(script.handler)).start()
+    try:
+        wait_for(lambda: script.ops("subscribe"))
+        assert "orderbook.50.BTCUSDT" in script.ops("subscribe")[0]["args"]
+        assert not stream.connected.is_set()  # subscribed, but no book yet
+
+        script.send(_ticker(30000.5),
+                    _book("snapshot", 100, [["29999", "2"], ["29998", "1"]], [["30001", "1"], ["30002", "3"]]))
+        assert stream.connected.wait(5)
+        assert stream.get_price("BTC/USDT") == 30000.5
+
+        script.send(_book("delta", 101, [["29999", "0"], ["30000", "4"]], [["30001", "2"]]))
+        wait_for(lambda: stream.book_ids["BTC/USDT"] == 101)
+        book = stream.book("BTC/USDT")
+        assert book.best_bid() == 30000.0
+        assert book.best_ask() == 30001.0
+        assert stream.get_orderbook("BTC/USDT") == {"bids": [[30000.0, 4.0], [29998.0, 1.0]],
+                                                   "asks": [[30001.0, 2.0], [30002.0, 3.0]]}
+    finally:
+        stream.stop()
+
+
+def test_update_id_gap_resubscribes(ws_server):
+    script = Script()
+    stream = MarketStream(["BTC/USDT"], url=ws_server(script.handler)).start()
+    try:
+        script.send(_ticker(100), _book("snapshot", 1, [["99", "1"]], [["101", "1"]]))
+        assert stream.connected.wait(5)
+
+        script.send(_book("delta", 3, [["99.5", "1"]], []))  # 2 went missing
+        wait_for(lambda: script.ops("unsubscribe"))
+        assert stream.gaps == 1
+        assert stream.book("BTC/USDT") is None
+        assert script.ops("unsubscribe")[0]["args"] == ["orderbook.50.BTCUSDT"]
+        assert script.ops("subscribe")[-1]["args"] == ["orderbook.50.BTCUSDT"]
+
+        script.send(_book("delta", 4, [["99.7", "1"]], []))  # ignored until the new snapshot
+        script.send(_book("snapshot", 50, [["99.6", "2"]], [["100.4", "1"]]))
+        wait_for(lambda: stream.book_ids["BTC/USDT"] == 50)
+        assert stream.book("BTC/USDT").best_bid() == 99.6
+    finally:
+        stream.stop()
+
+
+def test_stale_symbol_reads_none(ws_server):
+    script = Script()
+    stream = MarketStream(["BTC/USDT"], url=ws_server(script.handler), max_age=0.2).start()
+    try:
+        script.send(_ticker(100), _book("snapshot", 1, [["99", "1"]], [["101", "1"]]))
+        assert stream.connected.wait(5)
+        assert stream.get_price("BTC/USDT") == 100
+        time.sleep(0.3)
+        assert stream.get_price("BTC/USDT") is None
+        assert stream.book("BTC/USDT") is None
+        assert stream.get_orderbook("BTC/USDT") == {"bids": [], "asks": []}
+    finally:
+        stream.stop()
+
+
+def test_book_is_a_snapshot(ws_server):
+    script = Script()
+    stream = MarketStream(["BTC/USDT"], url=ws_server(script.handler)).start()
+    try:
+        script.send(_ticker(100), _book("snapshot", 1, [["99", "1"]], [["101", "3"]]))
+        assert stream.connected.wait(5)
+        before = stream.book("BTC/USDT")
+        script.send(_book("delta", 2, [["99", "0"], ["99.5", "5"]], []))
+        wait_for(lambda: stream.book_ids["BTC/USDT"] == 2)
+        assert before.best_bid() == 99.0
+        assert before.imbalance() == -0.5
+        assert stream.book("BTC/USDT").best_bid() == 99.5
+    finally:
+        stream.stop()
+
+
+def test_arrival_stamps_per_message_kind():
+    stream = MarketStream(["BTC/USDT"])
+    stream.handle(_book("snapshot", 1, [["99", "1"]], [["101", "1"]]), arrived=time.monotonic() - 2)
+    stream.handle(_ticker(100), arrived=time.monotonic() - 0.5)
+    assert 1.9 < stream.age("BTC/USDT", "book") < 3
+    assert 0.4 < stream.age("BTC/USDT", "ticker") < 1
+    assert stream.age("BTC/USDT") < 1  # newest message of any kind
+    assert stream.age("BTC/USDT", "trades") == float("inf")
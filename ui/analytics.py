@@ -1,14 +1,18 @@
 import tkinter as tk
 from tkinter import ttk
-import pandas as pd
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
+from bot.stats import TradeStats
 
 class Analytics:
-    def __init__(self, master):
+    def __init__(self, master, stats=None):
         """
         master: parent frame or Toplevel
+        stats: optional shared bot.stats.TradeStats (e.g. the engine's); a private one otherwise
         """
+        # Plotting libraries load with the panel, not with the ui package
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        import matplotlib.pyplot as plt
+        from ui.charting import LiveLine
+
         self.master = tk.Frame(master, bg="#121212", bd=2, relief=tk.RIDGE)
         self.master.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=5, pady=5)
 
@@ -36,6 +40,10 @@ class Analytics:
         self.avg_pnl_label.pack(side=tk.LEFT, padx=5)
         self.max_drawdown_label = tk.Label(stats_frame, text="Max Drawdown: 0", fg="red", bg="#121212")
         self.max_drawdown_label.pack(side=tk.LEFT, padx=5)
+        self.sharpe_label = tk.Label(stats_frame, text="Sharpe: 0", fg="white", bg="#121212")
+        self.sharpe_label.pack(side=tk.LEFT, padx=5)
+        self.side_label = tk.Label(stats_frame, text="", fg="white", bg="#121212")
+        self.side_label.pack(side=tk.LEFT, padx=5)
 
         # ── Performance Graph ──
         self.fig, self.ax = plt.subplots(figsize=(5,3))
@@ -45,17 +53,22 @@ class Analytics:
         self.ax.set_title("Cumulative PnL", color="white")
         self.canvas = FigureCanvasTkAgg(self.fig, self.master)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.curve = LiveLine(self.canvas, self.ax, color="lime", window=2000, fps=4)
+        self.curve.start_clock(self.master)
 
-        # Internal storage
-        self.trades = pd.DataFrame(columns=["entry", "exit", "side", "qty", "pnl", "confidence", "live"])
-        self.cum_pnl = []
+        # Internal storage: running statistics + the equity curve, both O(1) per trade
+        self.stats = stats if stats is not None else TradeStats()
+        self.owns_stats = stats is None
+        self.cum_pnl = 0.0
 
     # ── Add trade record ──
     def add_trade(self, trade):
         """
         trade: dict with keys ['entry','exit','side','qty','pnl','confidence','live']
         """
-        self.trades = pd.concat([self.trades, pd.DataFrame([trade])], ignore_index=True)
+        if self.owns_stats:
+            self.stats.update(trade["pnl"], trade.get("side"))
+        self.cum_pnl += trade["pnl"]
         self.table.insert("", tk.END, values=(
             trade["entry"], trade["exit"], trade["side"], trade["qty"],
             round(trade["pnl"],2), trade["confidence"], "LIVE" if trade["live"] else "SIM"
@@ -65,29 +78,24 @@ class Analytics:
 
     # ── Update stats labels ──
     def update_stats(self):
-        if self.trades.empty:
+        s = self.stats
+        if not s.count:
             return
-        total_pnl = self.trades["pnl"].sum()
-        wins = len(self.trades[self.trades["pnl"] > 0])
-        total = len(self.trades)
-        win_rate = (wins / total) * 100 if total > 0 else 0
-        avg_pnl = self.trades["pnl"].mean()
-        drawdown = (self.trades["pnl"].cumsum().min())
-
-        self.total_pnl_label.config(text=f"Total PnL: {round(total_pnl,2)}")
-        self.win_rate_label.config(text=f"Win Rate: {round(win_rate,1)}%")
-        self.avg_pnl_label.config(text=f"Avg PnL: {round(avg_pnl,2)}")
-        self.max_drawdown_label.config(text=f"Max Drawdown: {round(abs(drawdown),2)}")
+        self.total_pnl_label.config(text=f"Total PnL: {round(s.total,2)}")
+        self.win_rate_label.config(text=f"Win Rate: {round(s.win_rate,1)}%")
+        self.avg_pnl_label.config(text=f"Avg PnL: {round(s.mean,2)}")
+        # Peak-to-trough on the equity curve (starting from 0)
+        self.max_drawdown_label.config(text=f"Max Drawdown: {round(s.max_drawdown,2)}")
+        self.sharpe_label.config(text=f"Sharpe: {round(s.sharpe,2)}  Sortino: {round(s.sortino,2)}")
+        self.side_label.config(text="  ".join(
+            f"{side.upper()}: {side_stats.count} / {round(side_stats.total,2)}"
+            for side, side_stats in s.by_side.items()))
 
     # ── Update cumulative PnL graph ──
     def update_graph(self):
-        if self.trades.empty:
-            return
-        self.ax.clear()
-        cum_pnl = self.trades["pnl"].cumsum()
-        self.ax.plot(cum_pnl, color="lime" if cum_pnl.iloc[-1] >= 0 else "red")
-        self.ax.set_facecolor("#121212")
-        self.ax.set_title("Cumulative PnL", color="white")
-        self.ax.tick_params(axis='x', colors='white')
-        self.ax.tick_params(axis='y', colors='white')
-        self.canvas.draw()
+        """Append the new equity point; the curve's render clock draws it."""
+        color = "lime" if self.cum_pnl >= 0 else "red"
+        if self.curve.line.get_color() != color:
+            self.curve.line.set_color(color)
+            self.curve.dirty = True
+        self.curve.append(self.cum_pnl)
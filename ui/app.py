@@ -11,61 +11,109 @@ Components:
 - Analytics (trade analytics)
 - Settings (configurable parameters)
 - ReplayWindow (backtesting)
+- LatencyPanel (engine hot-path timings)
+
+The trading loop itself lives in bot.engine.Engine; the App only
+subscribes to its events and forwards them onto the Tk thread.
+
+Startup is kept light: the plain Tk panels are built immediately, the
+Matplotlib-backed Dashboard right after the window is first shown,
+Analytics on the first trade, and ReplayWindow / LatencyPanel (with
+their imports) only when opened.
 """
 
+import queue
 import tkinter as tk
-from ui.dashboard import Dashboard
 from ui.trade_panel import TradePanel
 from ui.controls import Controls
 from ui.terminal import Terminal
-from ui.analytics import Analytics
 from ui.settings import Settings
-from ui.replay_window import ReplayWindow
+
+# Panel slots (x, y, width, height)
+DASHBOARD_AREA = (10, 10, 800, 400)
+ANALYTICS_AREA = (10, 720, 1370, 70)
 
 
 class App:
-    def __init__(self, master):
+    def __init__(self, master, engine=None, trade_callback=None):
         """
         Initialize main application GUI.
+
+        Args:
+            master: Root Tk window
+            engine: Optional bot.engine.Engine driven by Start/Stop and the mode toggle
+            trade_callback: Optional function(state) passed to the ReplayWindow
         """
         self.master = master
         master.title("Bybit Smart Micro Bot")
         master.geometry("1400x800")
         master.configure(bg="#121212")
 
-        # ── Components ──
-        self.dashboard = Dashboard(master)
+        # ── Components (charts are deferred, see build_dashboard / analytics) ──
+        self.dashboard = None
+        self._analytics = None
         self.trade_panel = TradePanel(master)
-        self.settings = Settings(master)
+        self.settings = Settings(master, store=engine.config if engine is not None else None)
         self.controls = Controls(master, start_callback=self.start_bot,
                                  stop_callback=self.stop_bot, mode_callback=self.toggle_mode,
-                                 settings=self.settings)
+                                 settings=self.settings, latency_callback=self.open_latency)
         self.terminal = Terminal(master)
-        self.analytics = Analytics(master)
         self.replay_window = None
+        self.latency_panel = None
 
         # ── Layout ──
-        self.dashboard.frame.place(x=10, y=10, width=800, height=400)
         self.trade_panel.master.place(x=820, y=10, width=560, height=400)
         self.controls.master.place(x=10, y=420, width=1370, height=80)
         self.terminal.frame.place(x=10, y=510, width=1370, height=200)
-        self.analytics.frame.place(x=10, y=720, width=1370, height=70)
+        self.master.after(50, self.build_dashboard)
 
         # ── State ──
-        self.running = False
-        self.live = False
-        self.symbol = "BTC/USDT"
+        self.running = bool(engine is not None and engine.running)
+        self.live = bool(engine is not None and engine.live)
+        self.symbol = self.settings.get("symbol")
         self.timeframe = "1m"
+        self.trade_callback = trade_callback
+
+        # ── Engine events (engine thread -> Tk thread) ──
+        self.engine = engine
+        self.events = queue.SimpleQueue()
+        if self.engine is not None:
+            self.engine.subscribe(self.events.put)
+            self.master.after(100, self.drain_events)
+
+    # ── Deferred panels ──
+    def build_dashboard(self):
+        """Create the chart once the window is up (imports Matplotlib on first call)."""
+        if self.dashboard is None:
+            from ui.dashboard import Dashboard
+            self.dashboard = Dashboard(self.master, timeframe=self.timeframe)
+            x, y, width, height = DASHBOARD_AREA
+            self.dashboard.frame.place(x=x, y=y, width=width, height=height)
+        return self.dashboard
+
+    @property
+    def analytics(self):
+        """Analytics panel, built on first use (normally the first trade)."""
+        if self._analytics is None:
+            from ui.analytics import Analytics
+            self._analytics = Analytics(self.master)
+            x, y, width, height = ANALYTICS_AREA
+            self._analytics.master.place(x=x, y=y, width=width, height=height)
+        return self._analytics
 
     # ── Bot Control Methods ──
     def start_bot(self):
         if not self.running:
             self.running = True
+            if self.engine is not None:
+                self.engine.start()
             self.terminal.log("[INFO] Bot started")
 
     def stop_bot(self):
         if self.running:
             self.running = False
+            if self.engine is not None:
+                self.engine.stop()
             self.terminal.log("[INFO] Bot stopped")
 
     def toggle_mode(self, mode=None):
@@ -76,12 +124,54 @@ class App:
             self.live = (mode.upper() == "LIVE")
         else:
             self.live = not self.live
+        if self.engine is not None:
+            self.engine.set_live(self.live)
 
         self.terminal.log(f"[INFO] Mode switched to {'LIVE' if self.live else 'LEARNING'}")
 
     # ── Replay Window ──
     def open_replay(self):
         if self.replay_window is None or not tk.Toplevel.winfo_exists(self.replay_window.master):
-            self.replay_window = ReplayWindow(self.master)
+            from ui.replay_window import ReplayWindow
+            self.replay_window = ReplayWindow(self.master, trade_callback=self.trade_callback, timeframe=self.timeframe)
+
+    # ── Latency Panel ──
+    def open_latency(self):
+        if self.engine is None:
+            self.terminal.log("No engine attached", "ERROR")
+            return
+        if self.latency_panel is None or not tk.Toplevel.winfo_exists(self.latency_panel.master):
+            from ui.latency_panel import LatencyPanel
+            self.latency_panel = LatencyPanel(self.master, self.engine.latency)
+
+    # ── Engine Events ──
+    def drain_events(self, budget=200):
+        """Apply queued engine events on the Tk thread, then reschedule."""
+        last_tick = None
+        for _ in range(budget):
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event["type"] == "tick":
+                if event["symbol"] != self.symbol:
+                    continue
+                last_tick = event
+                if self.dashboard is not None:
+                    self.dashboard.use_bars(event["bars"])
+                    self.dashboard.add_price(event["price"])
+            elif event["type"] == "trade":
+                trade = dict(event["trade"])
+                trade.setdefault("confidence", 100)
+                self.analytics.add_trade(trade)
+                self.terminal.log(f"{trade['side']} {trade['entry']} -> {trade['exit']} pnl {trade['pnl']:.4f}", "TRADE")
+            elif event["type"] == "error":
+                self.terminal.log(event["error"], "ERROR")
+
+        # Only the latest tick matters for the panels and the chart
+        if last_tick is not None:
+            state = dict(last_tick["state"], leverage=last_tick["leverage"])
+            self.trade_panel.update_all(state)
+        self.master.after(100, self.drain_events)
 
 
@@ -0,0 +1,217 @@
+"""
+charting.py
+
+Incremental Matplotlib line and candlestick charts for the Tkinter panels.
+
+Features:
+- One persistent Line2D per chart, updated with set_data() instead of ax.clear()
+- Capped visible window backed by a bot.ringbuffer.PriceBuffer
+- LiveCandles: persistent body/wick collections drawn straight from a
+  bot.bars.BarSeries, redrawn only when the series changed
+- Blitting: only the line is redrawn while it stays inside the axes limits;
+  a full draw happens only when the limits have to grow
+- Throttled render clock driven by Tk after(), so drawing always happens on
+  the Tk thread and never more often than the configured frame rate
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from bot.ringbuffer import PriceBuffer
+
+
+def _fit_ylim(ax, lo, hi, margin):
+    """Grow the y limits when the data escapes, shrink once it only uses a sliver; True if changed."""
+    y0, y1 = ax.get_ylim()
+    pad = max((hi - lo) * margin, abs(hi) * 1e-6, 1e-9)
+    if lo < y0 or hi > y1 or (y1 - y0) > 4 * (hi - lo + 2 * pad):
+        ax.set_ylim(lo - pad, hi + pad)
+        return True
+    return False
+
+
+class LiveLine:
+    def __init__(self, canvas, ax, color="lime", window=500, fps=10, margin=0.1):
+        """
+        Args:
+            canvas: FigureCanvasTkAgg (or any canvas supporting blit)
+            ax: Axes the line lives on
+            color: Initial line color
+            window: Number of most recent points kept visible
+            fps: Maximum redraws per second from the render clock
+            margin: Fractional headroom added when the limits grow
+        """
+        self.canvas = canvas
+        self.ax = ax
+        self.window = window
+        self.interval_ms = max(1, int(1000 / fps))
+        self.margin = margin
+
+        self.data = PriceBuffer(window)
+        self.count = 0  # x coordinate of the next point
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.background = None
+        self.last_render = 0.0
+
+        (self.line,) = ax.plot([], [], color=color, animated=True)
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    # ── Data (safe from any thread) ──
+    def append(self, y):
+        with self.lock:
+            self.data.append(y, self.count)
+            self.count += 1
+            self.dirty = True
+
+    def extend(self, ys):
+        with self.lock:
+            for y in ys:
+                self.data.append(y, self.count)
+                self.count += 1
+            self.dirty = True
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.count = 0
+            self.dirty = True
+
+    def last(self):
+        return self.data.last()
+
+    # ── Rendering (Tk thread only) ──
+    def _on_draw(self, event):
+        # A full draw just happened: grab the static background, then paint the line on it
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
+
+    def render(self, force=False):
+        """Push pending points to the screen; cheap no-op when nothing changed."""
+        if not (self.dirty or force):
+            return
+        with self.lock:
+            xs = self.data.times().copy()
+            ys = self.data.window().copy()
+            self.dirty = False
+        self.line.set_data(xs, ys)
+        self.last_render = time.monotonic()
+
+        if len(ys) and self._rescale(xs, ys) or self.background is None or force:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
+
+    def _rescale(self, xs, ys):
+        """Grow or slide the limits if the data left them; True when a full draw is needed."""
+        x0, x1 = self.ax.get_xlim()
+        changed = False
+        if xs[-1] > x1 or xs[0] < x0:
+            # Slide with headroom so the next few points blit without a full draw
+            self.ax.set_xlim(xs[0], xs[0] + self.window * (1 + self.margin))
+            changed = True
+        return _fit_ylim(self.ax, float(ys.min()), float(ys.max()), self.margin) or changed
+
+    def start_clock(self, widget):
+        """Render at most fps times per second from the Tk event loop."""
+        def tick():
+            try:
+                self.render()
+            finally:
+                widget.after(self.interval_ms, tick)
+        widget.after(self.interval_ms, tick)
+
+
+class LiveCandles:
+    def __init__(self, canvas, ax, series=None, window=120, fps=4, margin=0.1,
+                 up="lime", down="red", width=0.6):
+        """
+        Args:
+            canvas: FigureCanvasTkAgg (or any canvas supporting blit)
+            ax: Axes the candles live on
+            series: bot.bars.BarSeries to draw (can be swapped later with set_series)
+            window: Number of most recent bars kept visible
+            fps: Maximum redraws per second from the render clock
+            margin: Fractional headroom added when the limits grow
+            up, down: Colors of rising and falling bars
+            width: Body width as a fraction of the bar spacing
+        """
+        from matplotlib.collections import LineCollection, PolyCollection
+
+        self.canvas = canvas
+        self.ax = ax
+        self.series = series
+        self.window = window
+        self.interval_ms = max(1, int(1000 / fps))
+        self.margin = margin
+        self.colors = np.array([down, up], dtype=object)
+        self.half = width / 2
+        self.seen = None  # (series, version) last drawn
+        self.background = None
+
+        # Bars sit at x = 0..window-1 (newest on the right), so the x limits never move
+        self.wicks = LineCollection([], linewidths=1, animated=True)
+        self.bodies = PolyCollection([], animated=True)
+        ax.add_collection(self.wicks)
+        ax.add_collection(self.bodies)
+        ax.set_xlim(-1, window)
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def set_series(self, series):
+        self.series = series
+        self.seen = None
+
+    # ── Rendering (Tk thread only) ──
+    def _draw_artists(self):
+        self.ax.draw_artist(self.wicks)
+        self.ax.draw_artist(self.bodies)
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_artists()
+        self.canvas.blit(self.ax.bbox)
+
+    def render(self, force=False):
+        """Redraw from the series; cheap no-op while it has not changed."""
+        series = self.series
+        if series is None:
+            return
+        seen = (series, series.version)
+        if seen == self.seen and not force:
+            return
+        self.seen = seen
+        bars = series.bars(self.window)
+        if not len(bars):
+            return
+
+        x = np.arange(self.window - len(bars), self.window, dtype=np.float64)
+        o, h, l, c = bars["open"], bars["high"], bars["low"], bars["close"]
+        left, right = x - self.half, x + self.half
+        self.bodies.set_verts(np.stack([np.column_stack([left, o]), np.column_stack([left, c]),
+                                        np.column_stack([right, c]), np.column_stack([right, o])], axis=1))
+        colors = self.colors[(c >= o).astype(np.intp)]
+        self.bodies.set_facecolor(colors)
+        self.bodies.set_edgecolor(colors)
+        self.wicks.set_segments(np.stack([np.column_stack([x, l]), np.column_stack([x, h])], axis=1))
+        self.wicks.set_color(colors)
+
+        if _fit_ylim(self.ax, float(l.min()), float(h.max()), self.margin) or self.background is None or force:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_artists()
+        self.canvas.blit(self.ax.bbox)
+
+    def start_clock(self, widget):
+        """Render at most fps times per second from the Tk event loop."""
+        def tick():
+            try:
+                self.render()
+            finally:
+                widget.after(self.interval_ms, tick)
+        widget.after(self.interval_ms, tick)
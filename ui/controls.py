@@ -6,7 +6,9 @@ Bot control panel for Tkinter GUI.
 Features:
 - Start / Stop buttons
 - Mode toggle (LEARNING / LIVE)
-- Optional sliders synced with Settings: Leverage, Risk %, Trailing Stop
+- Optional latency panel button
+- Optional sliders for Leverage, Risk % and Trailing Stop that share the
+  Settings panel's variables (one value, two widgets)
 """
 
 import tkinter as tk
@@ -14,7 +16,8 @@ from tkinter import ttk
 
 
 class Controls:
-    def __init__(self, master, start_callback=None, stop_callback=None, mode_callback=None, settings=None):
+    def __init__(self, master, start_callback=None, stop_callback=None, mode_callback=None, settings=None,
+                 latency_callback=None):
         """
         Initialize the Controls panel.
 
@@ -24,6 +27,7 @@ class Controls:
             stop_callback: function() called when Stop is pressed
             mode_callback: function(mode) called when mode changes
             settings: Settings object (optional, to sync sliders)
+            latency_callback: function() called when the Latency button is pressed
         """
         self.master = tk.Frame(master, bg="#121212", bd=2, relief=tk.RIDGE)
         self.master.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=5)
@@ -51,6 +55,10 @@ class Controls:
         self.mode_toggle.pack(side=tk.LEFT, padx=10)
         self.mode_toggle.bind("<<ComboboxSelected>>", self.change_mode)
 
+        if latency_callback is not None:
+            tk.Button(self.master, text="⏱ Latency", fg="white", bg="#333333",
+                      command=latency_callback).pack(side=tk.LEFT, padx=5)
+
         # ── Optional Sliders from Settings ──
         if self.settings:
             self.create_leverage_slider()
@@ -80,7 +88,7 @@ class Controls:
     # ── Sliders ──
     def create_leverage_slider(self):
         tk.Label(self.master, text="Max Leverage", fg="white", bg="#121212").pack(side=tk.LEFT, padx=5)
-        self.leverage_var = tk.IntVar(value=self.settings.get("max_leverage"))
+        self.leverage_var = self.settings.leverage_var
         self.leverage_slider = tk.Scale(
             self.master, from_=1, to=150, orient=tk.HORIZONTAL,
             variable=self.leverage_var, length=150,
@@ -91,7 +99,7 @@ class Controls:
 
     def create_risk_slider(self):
         tk.Label(self.master, text="Risk %", fg="white", bg="#121212").pack(side=tk.LEFT, padx=5)
-        self.risk_var = tk.DoubleVar(value=self.settings.get("risk_percent"))
+        self.risk_var = self.settings.risk_var
         self.risk_slider = tk.Scale(
             self.master, from_=0.1, to=10.0, resolution=0.1, orient=tk.HORIZONTAL,
             variable=self.risk_var, length=150,
@@ -102,7 +110,7 @@ class Controls:
 
     def create_trailing_slider(self):
         tk.Label(self.master, text="Trailing Stop ($)", fg="white", bg="#121212").pack(side=tk.LEFT, padx=5)
-        self.trail_var = tk.DoubleVar(value=self.settings.get("trailing_stop"))
+        self.trail_var = self.settings.trail_var
         self.trail_slider = tk.Scale(
             self.master, from_=0.05, to=1.0, resolution=0.01, orient=tk.HORIZONTAL,
             variable=self.trail_var, length=150,
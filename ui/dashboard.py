@@ -4,31 +4,39 @@ dashboard.py
 A Tkinter-based dashboard for visualizing live trading data.
 
 Features:
-- Candlestick chart plotting using mplfinance
+- OHLCV candlestick chart (ui.charting.LiveCandles) drawn from bot.bars
+  series: the engine's own bars when attached (use_bars), else bars built
+  here from the polled prices
 - Trend and confidence meters
-- Live updating loop for price data
+- Live updating loop for price data; drawing happens only on the Tk thread
 """
 
+import queue
 import tkinter as tk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import mplfinance as mpf
-import pandas as pd
 from threading import Thread
 import time
 
-# Import your trading data functions
-from bot.trader import get_price, get_orderbook
+from bot.bars import BarAggregator
+from bot.ringbuffer import PriceBuffer
 
 
 class Dashboard:
-    def __init__(self, master):
+    def __init__(self, master, history=5000, visible=120, fps=10, timeframe="1m"):
         """
         Initialize the Dashboard GUI.
 
         Args:
             master: Parent Tkinter frame or window
+            history: Number of price samples kept for meters and charting
+            visible: Number of most recent bars shown on the chart
+            fps: Maximum chart redraws per second
+            timeframe: Bar timeframe drawn (a key of bot.bars.TIMEFRAMES)
         """
+        # Plotting libraries load with the first Dashboard, not with the ui package
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        import matplotlib.pyplot as plt
+        from ui.charting import LiveCandles
+
         self.master = master
         self.frame = tk.Frame(master, bg="#1E1E1E", bd=2, relief=tk.RIDGE)
 
@@ -39,6 +47,10 @@ class Dashboard:
         self.ax.tick_params(axis='y', colors='white')
         self.canvas = FigureCanvasTkAgg(self.fig, self.frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.timeframe = timeframe
+        self.bars = BarAggregator()
+        self.own_bars = True  # False once the engine's bars are attached
+        self.chart = LiveCandles(self.canvas, self.ax, self.bars[timeframe], window=visible, fps=fps)
 
         # ── Trend / Confidence meters ──
         self.trend_var = tk.DoubleVar(value=50)
@@ -58,9 +70,14 @@ class Dashboard:
         self.confidence_meter.pack(side=tk.LEFT, padx=5)
 
         # ── Chart Data Storage ──
-        self.prices = []
+        self.prices = PriceBuffer(history)
         self.running = False
 
+        # Prices fetched by the update thread, applied on the Tk thread by the render clock
+        self.incoming = queue.SimpleQueue()
+        self.chart.start_clock(self.frame)
+        self.frame.after(self.chart.interval_ms, self.drain_incoming)
+
     # ── Start / Stop ──
     def start(self, symbol="BTC/USDT", timeframe="1m", update_interval=2):
         """
@@ -71,6 +88,7 @@ class Dashboard:
             timeframe: Timeframe for charting
             update_interval: Seconds between updates
         """
+        self.set_timeframe(timeframe)
         self.running = True
         Thread(target=self.update_loop, args=(symbol, timeframe, update_interval), daemon=True).start()
 
@@ -80,17 +98,48 @@ class Dashboard:
 
     # ── Update Loop ──
     def update_loop(self, symbol, timeframe, interval):
-        """Main loop that fetches price data, updates meters, and redraws the chart."""
+        """Worker loop that only fetches prices; the Tk thread does all drawing."""
+        from bot.trader import get_price
+
         while self.running:
             try:
-                price = get_price()
-                self.prices.append(price)
-                self.update_meters()
-                self.plot_chart()
+                self.incoming.put(get_price())
             except Exception as e:
                 print(f"[ERROR] Dashboard update: {e}")
             time.sleep(interval)
 
+    def drain_incoming(self):
+        """Apply prices queued by update_loop (runs on the Tk thread)."""
+        try:
+            while True:
+                self.add_price(self.incoming.get_nowait())
+        except queue.Empty:
+            pass
+        self.frame.after(self.chart.interval_ms, self.drain_incoming)
+
+    def add_price(self, price, ts=None):
+        """Push a price from the Tk thread (e.g. engine ticks) and refresh the meters."""
+        self.prices.append(price, ts)
+        if self.own_bars:
+            self.bars.update(price, ts=ts)
+        self.update_meters()
+
+    # ── Bars ──
+    def use_bars(self, bars):
+        """Draw an existing bot.bars.BarAggregator (e.g. the engine session's) instead of our own."""
+        if bars is self.bars:
+            return
+        self.bars = bars
+        self.own_bars = False
+        self.set_timeframe(self.timeframe)
+
+    def set_timeframe(self, timeframe):
+        if timeframe not in self.bars:
+            print(f"[ERROR] No {timeframe} bars; showing {self.timeframe}")
+            return
+        self.timeframe = timeframe
+        self.chart.set_series(self.bars[timeframe])
+
     # ── Trend & Confidence ──
     def update_meters(self):
         """Update the trend and confidence meters based on price changes."""
@@ -104,12 +153,6 @@ class Dashboard:
 
     # ── Plotting ──
     def plot_chart(self):
-        """Plot candlestick chart from collected prices using mplfinance."""
-        if len(self.prices) < 10:
-            return
-        self.ax.clear()
-        df = pd.DataFrame({"close": self.prices})
-        df.index = pd.date_range(end=pd.Timestamp.now(), periods=len(df), freq='S')
-        mpf.plot(df, type='candle', style='charles', ax=self.ax, volume=False, show_nontrading=True)
-        self.canvas.draw()
+        """Render pending bars now (the render clock also does this at its own pace)."""
+        self.chart.render()
 
@@ -0,0 +1,58 @@
+"""
+latency_panel.py
+
+A Tkinter window showing the engine's hot-path latency histograms.
+
+Features:
+- One row per stage (all symbols merged) plus one row per stage and symbol
+- Count, mean, p50, p90, p99, p99.9 and max in milliseconds
+- Refreshes from a bot.latency.LatencyRecorder snapshot on the Tk thread
+- Reset button to start a fresh measurement window
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+COLUMNS = ("Stage", "Symbol", "Count", "Mean", "p50", "p90", "p99", "p99.9", "Max")
+
+
+class LatencyPanel:
+    def __init__(self, master, recorder, refresh_ms=1000):
+        """
+        Args:
+            master: Parent Tkinter window
+            recorder: bot.latency.LatencyRecorder (e.g. engine.latency)
+            refresh_ms: Interval between table refreshes
+        """
+        self.master = tk.Toplevel(master)
+        self.master.title("Latency (ms)")
+        self.master.geometry("760x360")
+        self.master.configure(bg="#121212")
+
+        self.recorder = recorder
+        self.refresh_ms = refresh_ms
+
+        self.table = ttk.Treeview(self.master, columns=COLUMNS, show="headings")
+        for col in COLUMNS:
+            self.table.heading(col, text=col)
+            self.table.column(col, anchor=tk.CENTER, width=90 if col in ("Stage", "Symbol") else 70)
+        self.table.tag_configure("all", foreground="cyan")
+        self.table.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        tk.Button(self.master, text="↺ Reset", fg="white", bg="#333333",
+                  command=self.recorder.reset).pack(pady=5)
+
+        self.refresh()
+
+    def refresh(self):
+        """Rebuild the table from a fresh snapshot, then reschedule."""
+        if not self.master.winfo_exists():
+            return
+        snap = self.recorder.snapshot()
+        self.table.delete(*self.table.get_children())
+        for stage, symbols in snap["stages"].items():
+            for symbol, s in symbols.items():
+                self.table.insert("", tk.END, tags=("all",) if symbol == "all" else (), values=(
+                    stage, symbol, s["count"], f"{s['mean']:.3f}", f"{s['p50']:.3f}", f"{s['p90']:.3f}",
+                    f"{s['p99']:.3f}", f"{s['p99.9']:.3f}", f"{s['max']:.3f}"))
+        self.master.after(self.refresh_ms, self.refresh)
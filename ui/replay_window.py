@@ -4,9 +4,15 @@ replay_window.py
 A Tkinter-based window for replaying historical trade data (CSV) for backtesting.
 
 Features:
-- Load CSV files containing historical prices
-- Adjustable replay speed
-- Real-time plotting of price data with Matplotlib
+- Load CSV files containing historical prices (preloaded once into arrays),
+  or the last N days of exchange bars from the bot.history cache (only
+  the missing part is downloaded, on a worker thread)
+- Adjustable replay speed, or "as fast as possible" with no per-candle sleeps
+- Real-time plotting of price data with Matplotlib (incremental, blitted);
+  fast mode only pushes the chart every chart_every candles
+- Candles/second readout
+- Jump to any candle: the strategy state is reseeded from the preceding
+  prices instead of replaying from zero
 - Callback support for simulating trades
 """
 
@@ -14,19 +20,29 @@ import tkinter as tk
 from tkinter import filedialog
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 from threading import Thread
 import time
 
+from bot import brain
+from bot.backtest import StaticImbalance, bar_arrays, frame_arrays
+from bot.features import FeatureEngine
+from ui.charting import LiveLine
+
 
 class ReplayWindow:
-    def __init__(self, master, trade_callback=None):
+    def __init__(self, master, trade_callback=None, chart_every=500, history=500, timeframe="1m"):
         """
         Initialize the Replay/Backtesting window.
 
         Args:
             master: Parent Tkinter window
-            trade_callback: Optional function(bot_state_dict) called on each simulated trade
+            trade_callback: Optional function(state) called on each candle with the replay's
+                bot.state.TickState (already marked with the candle's close and imbalance)
+            chart_every: Candles between chart pushes in fast mode
+            history: Price history kept in the replay state
+            timeframe: Bar timeframe loaded from the history cache
         """
         self.master = tk.Toplevel(master)
         self.master.title("Replay / Backtesting")
@@ -34,11 +50,26 @@ class ReplayWindow:
         self.master.configure(bg="#121212")
 
         self.trade_callback = trade_callback
+        self.chart_every = chart_every
+        self.history = history
+        self.timeframe = timeframe
         self.running = False
         self.speed_var = tk.DoubleVar(value=1.0)  # seconds per candle
+        self.fast_var = tk.BooleanVar(value=False)
+        # Plain mirrors of the Tk variables for the replay thread
+        self.delay = self.speed_var.get()
+        self.fast = False
+        self.speed_var.trace_add("write", lambda *_: setattr(self, "delay", self.speed_var.get()))
+        self.fast_var.trace_add("write", lambda *_: setattr(self, "fast", self.fast_var.get()))
 
         self.df = pd.DataFrame()
+        self.close = np.empty(0)
+        self.imbalance = np.empty(0)
         self.index = 0
+        self.drawn = 0  # candles already pushed to the chart
+        self.pending_jump = None
+        self.pending_load = None  # (close, imbalance) fetched by the history thread
+        self.state = self.new_state()
 
         # ── Load CSV Button ──
         self.load_btn = tk.Button(
@@ -47,6 +78,17 @@ class ReplayWindow:
         )
         self.load_btn.pack(pady=5)
 
+        # ── History cache ──
+        history_frame = tk.Frame(self.master, bg="#121212")
+        history_frame.pack(pady=5)
+        self.symbol_var = tk.StringVar(value="BTC/USDT")
+        self.days_var = tk.StringVar(value="7")
+        tk.Entry(history_frame, textvariable=self.symbol_var, width=12).grid(row=0, column=0, padx=5)
+        tk.Entry(history_frame, textvariable=self.days_var, width=4).grid(row=0, column=1)
+        tk.Label(history_frame, text=f"days of {timeframe}", fg="white", bg="#121212").grid(row=0, column=2, padx=5)
+        tk.Button(history_frame, text="📥 Load history", fg="white", bg="#333333",
+                  command=self.load_history).grid(row=0, column=3, padx=5)
+
         # ── Speed Slider ──
         tk.Label(self.master, text="Replay Speed (sec/candle)", fg="white", bg="#121212").pack()
         self.speed_slider = tk.Scale(
@@ -54,71 +96,176 @@ class ReplayWindow:
             variable=self.speed_var, length=300, bg="#121212", fg="white", troughcolor="#333333"
         )
         self.speed_slider.pack()
+        tk.Checkbutton(
+            self.master, text="⏩ As fast as possible", variable=self.fast_var,
+            fg="white", bg="#121212", selectcolor="#333333", activebackground="#121212"
+        ).pack()
 
         # ── Control Buttons ──
         control_frame = tk.Frame(self.master, bg="#121212")
         control_frame.pack(pady=5)
         tk.Button(control_frame, text="▶ Start Replay", fg="white", bg="#333333", command=self.start).grid(row=0, column=0, padx=5)
         tk.Button(control_frame, text="⏹ Stop Replay", fg="white", bg="#333333", command=self.stop).grid(row=0, column=1, padx=5)
+        self.jump_var = tk.StringVar(value="0")
+        tk.Entry(control_frame, textvariable=self.jump_var, width=10).grid(row=0, column=2, padx=5)
+        tk.Button(control_frame, text="↪ Jump", fg="white", bg="#333333",
+                  command=lambda: self.jump(self.jump_var.get())).grid(row=0, column=3, padx=5)
+
+        self.status_label = tk.Label(self.master, text="No data", fg="white", bg="#121212")
+        self.status_label.pack()
 
         # ── Matplotlib Figure ──
         self.fig, self.ax = plt.subplots(figsize=(8, 4))
         self.ax.set_facecolor("#121212")
         self.ax.tick_params(axis='x', colors='white')
         self.ax.tick_params(axis='y', colors='white')
+        self.ax.set_title("Replay / Backtesting", color="white")
         self.canvas = FigureCanvasTkAgg(self.fig, self.master)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.chart = LiveLine(self.canvas, self.ax, color="lime", window=1000, fps=15)
+        self.chart.start_clock(self.master)
+
+        self.rate_mark = (time.monotonic(), 0)
+        self.update_status()
+
+    def new_state(self):
+        return brain.new_state(history=self.history, features=FeatureEngine())
 
     # ── CSV Handling ──
     def load_csv(self):
-        """Prompt user to load a CSV file and initialize the DataFrame."""
+        """Prompt user to load a CSV file and preload its columns as arrays."""
         path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
         if not path:
             return
+        self.stop()
         try:
             self.df = pd.read_csv(path)
             if "timestamp" in self.df.columns:
                 self.df["timestamp"] = pd.to_datetime(self.df["timestamp"])
             else:
                 self.df["timestamp"] = pd.RangeIndex(len(self.df))
-            self.index = 0
-            self.plot_current()
+            self.use_arrays(*frame_arrays(self.df))
         except Exception as e:
             print(f"[ERROR] Failed to load CSV: {e}")
 
+    def load_history(self):
+        """Load the last N days of bars from the local cache, backfilling what is missing."""
+        try:
+            days = float(self.days_var.get())
+        except ValueError:
+            print(f"[ERROR] Invalid number of days: {self.days_var.get()}")
+            return
+        self.stop()
+        self.status_label.config(text="Loading history...")
+        Thread(target=self._fetch_history, args=(self.symbol_var.get().strip(), days), daemon=True).start()
+
+    def _fetch_history(self, symbol, days):
+        from bot.history import DAY, KlineCache
+        try:
+            now = time.time()
+            bars = KlineCache().bars(symbol, self.timeframe, now - days * DAY, now)
+            self.pending_load = bar_arrays(bars)  # picked up by update_status on the Tk thread
+        except Exception as e:
+            print(f"[ERROR] Failed to load history for {symbol}: {e}")
+
+    def use_arrays(self, close, imbalance):
+        self.close, self.imbalance = close, imbalance
+        self.seek(0)
+
     # ── Replay Control ──
     def start(self):
         """Start the replay loop in a separate thread."""
-        if self.df.empty:
-            print("[ERROR] No CSV loaded")
+        if not len(self.close):
+            print("[ERROR] No data loaded")
             return
         if self.running:
             return
         self.running = True
+        self.rate_mark = (time.monotonic(), self.index)
         Thread(target=self.run, daemon=True).start()
 
     def stop(self):
         """Stop the replay loop."""
         self.running = False
 
+    def jump(self, index):
+        """Continue the replay from candle index (handed to the replay thread when running)."""
+        try:
+            index = int(index)
+        except (TypeError, ValueError):
+            print(f"[ERROR] Invalid candle index: {index}")
+            return
+        index = min(max(index, 0), len(self.close))
+        if self.running:
+            self.pending_jump = index
+        else:
+            self.seek(index)
+
+    def seek(self, index):
+        """
+        Rebuild the replay state as if candles [0, index) had been seen.
+
+        Features and the price history are seeded from the preceding closes,
+        so this costs O(history) no matter how far the jump goes. Any open
+        simulated position is dropped.
+        """
+        past = self.close[:index]
+        state = self.new_state()
+        state.prices.extend(past[-self.history:])
+        state.features.seed(past)
+        if index:
+            state.price = float(past[-1])
+            trend = state.features.trend_strength()
+            state.trend_bias = "up" if trend > 0 else "down" if trend < 0 else None
+        self.state = state
+        self.index = index
+        self.chart.clear()
+        self.drawn = max(0, index - self.chart.window)
+        self.draw_upto(index)
+        self.rate_mark = (time.monotonic(), index)
+
     def run(self):
-        """Replay loop that updates the chart and calls trade_callback."""
-        while self.running and self.index < len(self.df):
-            self.plot_current()
+        """Replay loop that feeds the strategy state and calls trade_callback."""
+        close, imbalance = self.close, self.imbalance
+        while self.running and self.index < len(close):
+            if self.pending_jump is not None:
+                index, self.pending_jump = self.pending_jump, None
+                self.seek(index)
+                continue
+
+            i = self.index
+            price = float(close[i])
+            brain.mark(self.state, price, StaticImbalance(float(imbalance[i])))
+            self.state["index"] = i
             if callable(self.trade_callback):
-                state = self.df.iloc[self.index].to_dict()
-                self.trade_callback(state)
-            self.index += 1
-            time.sleep(self.speed_var.get())
+                self.trade_callback(self.state)
+            self.index = i + 1
+
+            if not self.fast:
+                self.draw_upto(self.index)
+                time.sleep(self.delay)
+            elif self.index - self.drawn >= self.chart_every:
+                self.draw_upto(self.index)
+        self.draw_upto(self.index)
         self.running = False
 
     # ── Plotting ──
-    def plot_current(self):
-        """Plot the price data up to the current index."""
-        self.ax.clear()
-        if not self.df.empty:
-            df_plot = self.df.iloc[:self.index + 1]
-            self.ax.plot(df_plot["close"], color="lime")
-            self.ax.set_title("Replay / Backtesting", color="white")
-        self.canvas.draw()
+    def draw_upto(self, end):
+        """Push candles up to end to the chart; only the visible window is ever copied."""
+        start = max(self.drawn, end - self.chart.window)
+        if end > start:
+            self.chart.extend(self.close[start:end].tolist())
+        self.drawn = end
 
+    def update_status(self):
+        """Candle position and replay rate, refreshed from the Tk loop."""
+        if self.pending_load is not None:
+            loaded, self.pending_load = self.pending_load, None
+            self.use_arrays(*loaded)
+        now, index = time.monotonic(), self.index
+        then, seen = self.rate_mark
+        rate = (index - seen) / (now - then) if self.running and now > then else 0.0
+        self.rate_mark = (now, index)
+        if len(self.close):
+            self.status_label.config(text=f"Candle {index:,} / {len(self.close):,}  |  {rate:,.0f} candles/s")
+        self.master.after(500, self.update_status)
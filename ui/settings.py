@@ -5,38 +5,40 @@ A GUI panel for configuring Spot Bot settings using Tkinter.
 
 Features:
 - Adjustable starting balance, trade size, max leverage, and risk per trade
-- Trailing stop, default mode, and trading symbol selection
+- Trailing stop, default mode, and trading symbol selection (the symbol applies on restart)
+- Changes are coalesced and debounced, then published as one new
+  bot.config snapshot (and saved to disk) instead of on every pixel of a drag
 - Optional callback function for dynamic updates
 """
 
 import tkinter as tk
 from tkinter import ttk
 
+from bot.config import get_config
+
 
 class Settings:
-    def __init__(self, master, update_callback=None):
+    def __init__(self, master, update_callback=None, store=None, debounce_ms=250):
         """
         Initialize the settings panel.
 
         Args:
             master: Parent Tkinter frame or Toplevel
-            update_callback: Optional function called when a setting changes
+            update_callback: Optional function(key, value) called when a change is published
+            store: bot.config.ConfigStore edited by the panel (defaults to the shared one)
+            debounce_ms: Quiet time after the last change before it is published
         """
         self.master = tk.Frame(master, bg="#121212", bd=2, relief=tk.RIDGE)
         self.master.pack(side=tk.LEFT, fill=tk.Y, padx=5, pady=5)
 
         self.update_callback = update_callback
+        self.store = store if store is not None else get_config()
+        self.debounce_ms = debounce_ms
+        self.pending = {}  # changes not yet published
+        self.flush_id = None
 
-        # Internal settings storage with defaults
-        self.settings = {
-            "balance": 1000.0,
-            "usdt_per_trade": 10.0,
-            "max_leverage": 10,
-            "risk_percent": 1.0,
-            "trailing_stop": 0.15,
-            "default_mode": "LEARNING",
-            "symbol": "BTC/USDT"
-        }
+        # What the panel shows (runs ahead of the store while a change is pending)
+        self.settings = self.store.current.as_dict()
 
         # Create UI controls
         self.create_balance_setting()
@@ -102,8 +104,14 @@ class Settings:
         menu.bind("<<ComboboxSelected>>", lambda e: self.update_setting("default_mode", self.mode_var.get()))
 
     def create_symbol_setting(self):
-        """Create a dropdown to select trading symbol."""
-        tk.Label(self.master, text="Trading Symbol", fg="white", bg="#121212").pack(pady=3)
+        """
+        Create a dropdown to select trading symbol.
+
+        The engine's sessions and the dashboard are built for the symbol at
+        startup (a session may hold an open position), so a new symbol is
+        saved now and traded from the next start.
+        """
+        tk.Label(self.master, text="Trading Symbol (applies on restart)", fg="white", bg="#121212").pack(pady=3)
         self.symbol_var = tk.StringVar(value=self.settings["symbol"])
         menu = ttk.Combobox(self.master, textvariable=self.symbol_var,
                             values=["BTC/USDT", "ETH/USDT"], state="readonly")
@@ -112,10 +120,29 @@ class Settings:
 
     # ── Update Methods ──
     def update_setting(self, key, value):
-        """Update a setting and call the callback if provided."""
+        """Record a change; publishing waits until the value stops moving for debounce_ms."""
+        if self.settings.get(key) == value:
+            return
         self.settings[key] = value
+        self.pending[key] = value
+        if self.flush_id is not None:
+            self.master.after_cancel(self.flush_id)
+        self.flush_id = self.master.after(self.debounce_ms, self.publish)
+
+    def publish(self):
+        """Publish every pending change as one config snapshot and save it."""
+        self.flush_id = None
+        changes, self.pending = self.pending, {}
+        if not changes:
+            return
+        self.store.publish(**changes)
+        try:
+            self.store.save()
+        except OSError as e:
+            print(f"[ERROR] Failed to save config: {e}")
         if callable(self.update_callback):
-            self.update_callback(key, value)
+            for key, value in changes.items():
+                self.update_callback(key, value)
 
     def get(self, key):
         """Get the current value of a setting."""
@@ -6,23 +6,35 @@ A GUI terminal/log panel for the Spot Bot using Tkinter.
 Features:
 - Scrollable log area with color-coded messages
 - Filters for INFO, TRADE, ERROR, and REASON logs
-- Thread-safe logging
+- Thread-safe logging: any thread only pushes onto a queue; the Tk thread
+  drains it in batches through after()
+- Bounded history with per-level indexes, so filter changes re-render only
+  the visible tail
 - Redirects stdout and stderr to the terminal
 """
 
+import heapq
+import itertools
+import queue
 import tkinter as tk
 from tkinter import scrolledtext
 import sys
-import threading
+from collections import deque
+
+LEVELS = ("INFO", "TRADE", "ERROR", "REASON")
 
 
 class Terminal:
-    def __init__(self, master):
+    def __init__(self, master, max_lines=5000, visible_lines=1000, drain_ms=50, batch_limit=2000):
         """
         Initialize the terminal GUI panel.
 
         Args:
             master: Parent Tkinter frame
+            max_lines: Log lines retained in memory (per level and overall)
+            visible_lines: Lines kept in the text widget
+            drain_ms: Interval between queue drains on the Tk thread
+            batch_limit: Maximum lines rendered per drain
         """
         self.frame = tk.Frame(master, bg="#1E1E1E", bd=2, relief=tk.RIDGE)
         self.frame.pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -58,9 +70,15 @@ class Terminal:
         tk.Checkbutton(filter_frame, text="REASON", bg="#1E1E1E", fg="yellow", variable=self.show_reason,
                        command=self.refresh).pack(side=tk.LEFT)
 
-        # Internal log storage
-        self.logs = []  # list of tuples: (type, message)
-        self.lock = threading.Lock()
+        # Internal log storage: bounded ring of (seq, type, message) plus one index per level
+        self.logs = deque(maxlen=max_lines)
+        self.by_level = {level: deque(maxlen=max_lines) for level in LEVELS}
+        self.seq = itertools.count()
+        self.visible_lines = visible_lines
+        self.drain_ms = drain_ms
+        self.batch_limit = batch_limit
+        self.pending = queue.SimpleQueue()  # written from any thread, read only by the Tk thread
+        self.frame.after(self.drain_ms, self.drain)
 
         # Redirect stdout & stderr
         sys.stdout = self
@@ -85,43 +103,71 @@ class Terminal:
             log_type = "INFO"
             msg = message
 
-        with self.lock:
-            self.logs.append((log_type, msg))
-            self.display(log_type, msg)
+        self.pending.put((log_type, msg.rstrip("\n")))
 
     def flush(self):
         """Needed for stdout/stderr redirect."""
         pass
 
-    # ── Display message in text area ──
-    def display(self, log_type, msg):
-        """Display a message in the terminal if its filter is active."""
-        show = {
+    # ── Batched drain (Tk thread) ──
+    def drain(self):
+        """Move queued lines into history and render the visible ones in one widget update."""
+        batch = []
+        try:
+            for _ in range(self.batch_limit):
+                log_type, msg = self.pending.get_nowait()
+                entry = (next(self.seq), log_type, msg)
+                self.logs.append(entry)
+                if log_type in self.by_level:
+                    self.by_level[log_type].append(entry)
+                batch.append(entry)
+        except queue.Empty:
+            pass
+
+        if batch:
+            self.render(batch)
+        # Come straight back if the batch limit was hit, otherwise wait for the next tick
+        self.frame.after(1 if len(batch) == self.batch_limit else self.drain_ms, self.drain)
+
+    def active_levels(self):
+        return {
             "INFO": self.show_info.get(),
             "TRADE": self.show_trade.get(),
             "ERROR": self.show_error.get(),
             "REASON": self.show_reason.get()
-        }.get(log_type, True)
+        }
 
-        if show:
-            self.text_area.configure(state=tk.NORMAL)
-            self.text_area.insert(tk.END, f"[{log_type}] {msg}\n", log_type)
-            self.text_area.see(tk.END)
-            self.text_area.configure(state=tk.DISABLED)
+    def render(self, entries, replace=False):
+        """Insert entries (oldest first) as runs of same-level text, then trim the widget."""
+        active = self.active_levels()
+        entries = [e for e in entries if active.get(e[1], True)][-self.visible_lines:]
 
-    # ── Refresh display based on filters ──
-    def refresh(self):
-        """Refresh displayed logs based on filter settings."""
         self.text_area.configure(state=tk.NORMAL)
-        self.text_area.delete(1.0, tk.END)
-        with self.lock:
-            for log_type, msg in self.logs:
-                self.display(log_type, msg)
+        if replace:
+            self.text_area.delete(1.0, tk.END)
+        for log_type, run in itertools.groupby(entries, key=lambda e: e[1]):
+            text = "".join(f"[{log_type}] {msg}\n" for _, _, msg in run)
+            self.text_area.insert(tk.END, text, log_type)
+
+        excess = int(self.text_area.index("end-1c").split(".")[0]) - 1 - self.visible_lines
+        if excess > 0:
+            self.text_area.delete(1.0, f"{excess + 1}.0")
+        self.text_area.see(tk.END)
         self.text_area.configure(state=tk.DISABLED)
 
+    # ── Refresh display based on filters ──
+    def refresh(self):
+        """Re-render only the visible tail of the enabled levels."""
+        active = self.active_levels()
+        tails = []
+        for level, entries in self.by_level.items():
+            if active[level]:
+                tail = list(itertools.islice(reversed(entries), self.visible_lines))
+                tails.append(reversed(tail))
+        merged = list(heapq.merge(*tails))[-self.visible_lines:]
+        self.render(merged, replace=True)
+
     # ── Add log manually (optional) ──
     def log(self, msg, log_type="INFO"):
-        """Manually log a message."""
-        with self.lock:
-            self.logs.append((log_type, msg))
-            self.display(log_type, msg)
+        """Manually log a message (safe from any thread)."""
+        self.pending.put((log_type, msg))